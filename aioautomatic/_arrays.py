@@ -0,0 +1,40 @@
+"""Optional numpy support shared by the array based modules."""
+from datetime import timezone
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+
+def require_numpy(feature):
+    """Raise ImportError if numpy is not installed.
+
+    :param feature: Name of the feature requiring numpy, for the message
+    """
+    if np is None:
+        raise ImportError('{} requires numpy, install aioautomatic with the '
+                          'numpy extra'.format(feature))
+
+
+def lat_lon(point):
+    """Return the (lat, lon) of a location, event, dict or pair.
+
+    Missing points or coordinates are NaN.
+    """
+    if point is None:
+        return (np.nan, np.nan)
+    if isinstance(point, dict):
+        lat, lon = point.get('lat'), point.get('lon')
+    elif isinstance(point, (list, tuple)):
+        lat, lon = point
+    else:
+        lat, lon = getattr(point, 'lat', None), getattr(point, 'lon', None)
+    return (np.nan if lat is None else lat, np.nan if lon is None else lon)
+
+
+def utc_naive(value):
+    """Return a datetime as naive UTC, as numpy expects."""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
@@ -0,0 +1,149 @@
+"""Incremental daily and weekly trip aggregates for aioautomatic."""
+import collections
+from datetime import timedelta, timezone
+import functools
+import logging
+
+from aioautomatic import data
+
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:  # pragma: no cover
+    ZoneInfo = None
+
+try:
+    from dateutil import tz as dateutil_tz
+except ImportError:  # pragma: no cover
+    dateutil_tz = None
+
+_LOGGER = logging.getLogger(__name__)
+
+# Trip fields summed in every bucket, missing values count as 0
+METRICS = (
+    'distance_m',
+    'duration_s',
+    'fuel_cost_usd',
+    'hard_brakes',
+    'hard_accels',
+    'duration_over_70_s',
+    'duration_over_75_s',
+    'duration_over_80_s',
+    'idling_time_s',
+)
+
+Totals = collections.namedtuple('Totals', ('trips',) + METRICS)
+
+_EMPTY = Totals(*(0 for _ in Totals._fields))
+
+
+@functools.lru_cache(maxsize=None)
+def get_timezone(name):
+    """Return the tzinfo of an IANA time zone name.
+
+    zoneinfo is used when available, then dateutil. UTC is returned for
+    unknown names, or when neither is installed.
+    """
+    if name:
+        if ZoneInfo is not None:
+            try:
+                return ZoneInfo(name)
+            except (KeyError, ValueError):
+                pass
+        elif dateutil_tz is not None:
+            zone = dateutil_tz.gettz(name)
+            if zone is not None:
+                return zone
+        _LOGGER.debug("Unknown time zone %s, using UTC.", name)
+    return timezone.utc
+
+
+class AggregateSnapshot():
+    """Totals of an aggregator at a point in time.
+
+    ``daily`` and ``weekly`` map ``(vehicle, date)`` keys to Totals, where
+    date is the local start date of the day or of the week, starting on
+    Monday.
+    """
+
+    def __init__(self, daily, weekly):
+        """Create a snapshot from the dicts of totals."""
+        self.daily = daily
+        self.weekly = weekly
+
+    def vehicle_daily(self, vehicle):
+        """Return the daily totals of a vehicle, by date."""
+        return {day: totals for (key, day), totals in self.daily.items()
+                if key == vehicle}
+
+    def vehicle_weekly(self, vehicle):
+        """Return the weekly totals of a vehicle, by week start date."""
+        return {week: totals for (key, week), totals in self.weekly.items()
+                if key == vehicle}
+
+
+class TripAggregator():
+    """Daily and weekly totals of trips per vehicle, updated incrementally.
+
+    Trips are bucketed by the local date of their start, in the time zone
+    of their ``start_timezone``. Adding a trip only updates its day and
+    week, and trips already added are ignored, so pages may be fetched
+    again and realtime events may repeat trips of earlier pages.
+    """
+
+    def __init__(self, default_timezone=None):
+        """Create an empty aggregator.
+
+        :param default_timezone: Time zone name of trips without
+                                 start_timezone, defaults to UTC
+        """
+        self._default_timezone = default_timezone
+        self._daily = {}
+        self._weekly = {}
+        self._trip_ids = set()
+
+    def add_trip(self, trip):
+        """Add a trip to its daily and weekly totals.
+
+        :param trip: data.Trip object or raw trip dict
+        :returns: True if the trip was added, False if it was already added
+                  or has no start time
+        """
+        if isinstance(trip, dict):
+            trip = data.Trip(trip, True)
+        if trip.id in self._trip_ids or trip.started_at is None:
+            return False
+        self._trip_ids.add(trip.id)
+
+        zone = get_timezone(trip.start_timezone or self._default_timezone)
+        day = trip.started_at.astimezone(zone).date()
+        week = day - timedelta(days=day.weekday())
+        values = (1,) + tuple(getattr(trip, name) or 0 for name in METRICS)
+        for buckets, key in ((self._daily, (trip.vehicle, day)),
+                             (self._weekly, (trip.vehicle, week))):
+            totals = buckets.get(key, _EMPTY)
+            buckets[key] = Totals(*map(sum, zip(totals, values)))
+        return True
+
+    def add_trips(self, trips):
+        """Add trips, such as a ResultList or the results of a page.
+
+        :returns: Number of trips added
+        """
+        return sum(self.add_trip(trip) for trip in trips)
+
+    def on_event(self, name, event):
+        """Add the trip of a trip:finished realtime event.
+
+        Can be registered as a callback with Client.on or
+        Client.on_app_event, other events are ignored.
+        """
+        if name == 'trip:finished':
+            self.add_trip(event.trip)
+
+    def snapshot(self):
+        """Return the current totals.
+
+        Totals are immutable, so the snapshot only copies the dicts and is
+        not modified by trips added afterwards.
+        """
+        return AggregateSnapshot(dict(self._daily), dict(self._weekly))
@@ -0,0 +1,256 @@
+"""Append-only binary archive of trips for aioautomatic."""
+from datetime import datetime, timezone
+import json
+import mmap
+import os
+
+from aioautomatic import data
+from aioautomatic import validation
+from aioautomatic._arrays import np, require_numpy, utc_naive
+from aioautomatic.frame import DATETIME_FIELDS, NUMERIC_FIELDS
+
+VERSION = 1
+
+# Numeric fields restored as integers
+INTEGER_FIELDS = (
+    'hard_brakes',
+    'hard_accels',
+    'duration_over_70_s',
+    'duration_over_75_s',
+    'duration_over_80_s',
+)
+
+# Coordinate columns of the trip start and end locations
+LOCATION_COLUMNS = (
+    ('start_lat', 'start_location', 'lat'),
+    ('start_lon', 'start_location', 'lon'),
+    ('end_lat', 'end_location', 'lat'),
+    ('end_lon', 'end_location', 'lon'),
+)
+
+_RECORDS = 'trips.rec'
+_BLOBS = 'trips.blob'
+_META = 'archive.json'
+
+
+def record_dtype():
+    """Return the numpy dtype of an archived trip record."""
+    require_numpy('TripArchive')
+    return np.dtype(
+        [(name, '<M8[us]') for name in DATETIME_FIELDS] +
+        [(name, '<f8') for name in NUMERIC_FIELDS] +
+        [(column, '<f8') for column, _, _ in LOCATION_COLUMNS] +
+        [('blob_offset', '<u8'), ('blob_size', '<u4')])
+
+
+class TripArchive():
+    """Append-only archive of trips in a directory.
+
+    Numeric fields, start and end times and the start and end coordinates
+    are stored as fixed width records, which are memory mapped and can be
+    scanned as numpy columns without decoding any json. Every other field,
+    such as the path, addresses and tags, is stored as json in a blob file
+    indexed by the offset and size kept in each record.
+
+    Trips can only be appended by a single writer at a time. An interrupted
+    append leaves at worst a partial last record, which is ignored.
+    """
+
+    def __init__(self, path, lazy_validation=True):
+        """Open an archive, creating it if required.
+
+        :param path: Directory of the archive
+        :param lazy_validation: Create returned trips in lazy mode
+        """
+        require_numpy('TripArchive')
+        self._path = path
+        self._lazy = lazy_validation
+        self._dtype = record_dtype()
+        os.makedirs(path, exist_ok=True)
+        meta = {'version': VERSION, 'fields': list(self._dtype.names)}
+        meta_path = os.path.join(path, _META)
+        try:
+            with open(meta_path, encoding='utf-8') as file:
+                existing = json.load(file)
+        except FileNotFoundError:
+            with open(meta_path, 'w', encoding='utf-8') as file:
+                json.dump(meta, file)
+        else:
+            if existing != meta:
+                raise ValueError('Unsupported trip archive format {}'.format(
+                    existing))
+        self._records = None
+        self._blobs = None
+        self._blob_file = None
+        self._sorted = None
+
+    def _file(self, name):
+        """Return the path of an archive file."""
+        return os.path.join(self._path, name)
+
+    def _map(self):
+        """Memory map the archive files if not mapped yet."""
+        if self._records is not None:
+            return
+        try:
+            size = os.path.getsize(self._file(_RECORDS))
+        except FileNotFoundError:
+            size = 0
+        count = size // self._dtype.itemsize
+        if count:
+            self._records = np.memmap(self._file(_RECORDS), self._dtype,
+                                      mode='r', shape=(count,))
+            self._blob_file = open(self._file(_BLOBS), 'rb')
+            self._blobs = mmap.mmap(self._blob_file.fileno(), 0,
+                                    access=mmap.ACCESS_READ)
+        else:
+            self._records = np.zeros(0, self._dtype)
+
+    def close(self):
+        """Unmap the archive files."""
+        # Memory mapped records are released once no longer referenced
+        self._records = None
+        self._sorted = None
+        if self._blobs is not None:
+            self._blobs.close()
+            self._blob_file.close()
+            self._blobs = self._blob_file = None
+
+    @property
+    def records(self):
+        """Memory mapped array of every trip record."""
+        self._map()
+        return self._records
+
+    def __len__(self):
+        """Return the number of archived trips."""
+        return len(self.records)
+
+    def __getitem__(self, key):
+        """Return a trip by index, or a column by field name."""
+        if isinstance(key, str):
+            return self.records[key]
+        return self._trip(self.records[key])
+
+    def append(self, trips):
+        """Append trips to the archive.
+
+        :param trips: Iterable of data.Trip objects or raw trip dicts, such
+                      as a ResultList or the results of a list response
+        """
+        trips = [data.Trip(trip) if isinstance(trip, dict) else trip
+                 for trip in trips]
+        if not trips:
+            return
+        records_path = self._file(_RECORDS)
+        try:
+            size = os.path.getsize(records_path)
+        except FileNotFoundError:
+            size = 0
+        # Drop a partial record left by an interrupted append
+        complete = size - size % self._dtype.itemsize
+        self.close()
+
+        records = np.zeros(len(trips), self._dtype)
+        blobs = []
+        with open(self._file(_BLOBS), 'ab') as blob_file:
+            offset = blob_file.tell()
+            for index, trip in enumerate(trips):
+                item = trip.data
+                record = records[index]
+                for name in DATETIME_FIELDS:
+                    value = utc_naive(item.pop(name, None))
+                    record[name] = np.datetime64('NaT') if value is None \
+                        else np.datetime64(value, 'us')
+                for name in NUMERIC_FIELDS:
+                    value = item.pop(name, None)
+                    record[name] = np.nan if value is None else value
+                for column, location, key in LOCATION_COLUMNS:
+                    record[column] = item[location][key]
+                blob = json.dumps(item, default=validation.json_default,
+                                  separators=(',', ':')).encode('utf-8')
+                record['blob_offset'] = offset
+                record['blob_size'] = len(blob)
+                offset += len(blob)
+                blobs.append(blob)
+            blob_file.write(b''.join(blobs))
+            blob_file.flush()
+            os.fsync(blob_file.fileno())
+
+        # Records are written after their blobs, so every record is valid
+        with open(records_path, 'ab') as records_file:
+            records_file.truncate(complete)
+            records_file.write(records.tobytes())
+            records_file.flush()
+            os.fsync(records_file.fileno())
+
+    def append_page(self, page):
+        """Append the trips of a list response page.
+
+        :param page: Raw list response dict or ResultList of trips
+        """
+        self.append(page['results'] if isinstance(page, dict) else page)
+
+    def _trip(self, record):
+        """Create a trip from a record and its blob."""
+        start = int(record['blob_offset'])
+        item = json.loads(
+            self._blobs[start:start + int(record['blob_size'])].decode(
+                'utf-8'))
+        for name in DATETIME_FIELDS:
+            value = record[name]
+            item[name] = None if np.isnat(value) else value.astype(
+                datetime).replace(tzinfo=timezone.utc)
+        for name in NUMERIC_FIELDS:
+            value = float(record[name])
+            if value != value:
+                item[name] = None
+            else:
+                item[name] = int(value) if name in INTEGER_FIELDS else value
+        return data.Trip(item, self._lazy)
+
+    def trips(self, indexes=None):
+        """Return archived trips.
+
+        :param indexes: Index, slice or array of indexes of the trips, such
+                        as returned by between(). Defaults to every trip.
+        :returns: List of data.Trip objects
+        """
+        records = self.records
+        if indexes is not None:
+            records = records[indexes]
+        if records.ndim == 0:
+            return [self._trip(records)]
+        return [self._trip(record) for record in records]
+
+    def between(self, start=None, end=None):
+        """Return the indexes of the trips started within a time range.
+
+        When trips were appended in start time order, the result is a slice
+        so that ``records[indexes]`` is a view of the mapped records.
+        Otherwise, it is an array of indexes.
+
+        :param start: Minimum start datetime, inclusive
+        :param end: Maximum start datetime, exclusive
+        """
+        started_at = self.records['started_at']
+        bounds = [None if value is None else
+                  np.datetime64(utc_naive(value), 'us')
+                  for value in (start, end)]
+        if self._sorted is None:
+            values = started_at.view('i8')
+            self._sorted = not np.isnat(started_at).any() and bool(
+                np.all(values[1:] >= values[:-1]))
+        if self._sorted:
+            first = 0 if bounds[0] is None else int(
+                np.searchsorted(started_at, bounds[0], side='left'))
+            last = len(started_at) if bounds[1] is None else int(
+                np.searchsorted(started_at, bounds[1], side='left'))
+            return slice(first, max(first, last))
+
+        mask = ~np.isnat(started_at)
+        if bounds[0] is not None:
+            mask &= started_at >= bounds[0]
+        if bounds[1] is not None:
+            mask &= started_at < bounds[1]
+        return np.flatnonzero(mask)
@@ -1,37 +1,71 @@
 """Base interface for aioautomatic."""
 
 import asyncio
+import collections
 import logging
+import math
 
 import aiohttp
 
+from aioautomatic import codec
 from aioautomatic import exceptions
+from aioautomatic import ratelimit
+from aioautomatic import streaming
 from aioautomatic import validation
 
 _LOGGER = logging.getLogger(__name__)
 
 
+def gen_query_string(params):
+    """Generate a query string from the parameter dict."""
+    return '&'.join('{}={}'.format(k, v) for k, v in params.items())
+
+
 class BaseApiObject():
     """API object to perform network requests."""
 
-    def __init__(self, parent, request_kwargs=None, client_session=None):
+    def __init__(self, parent, request_kwargs=None, client_session=None,
+                 response_cache=None, request_coalescer=None,
+                 rate_limiter=None, retry_policy=None, hedge_policy=None,
+                 json_codec=None, lazy_validation=False):
         """Create a base API object to send network requets."""
         self._parent = parent
         if parent is None:
             self._client_session = client_session or aiohttp.ClientSession()
             self._request_kwargs = request_kwargs or {}
+            self._response_cache = response_cache
+            self._request_coalescer = request_coalescer
+            self._rate_limiter = rate_limiter
+            self._retry_policy = retry_policy
+            self._hedge_policy = hedge_policy
+            self._json_codec = json_codec or codec.STDLIB_CODEC
+            self._lazy_validation = lazy_validation
         else:
             self._client_session = parent.client_session
             self._request_kwargs = parent.request_kwargs.copy()
             self._request_kwargs.update(request_kwargs or {})
+            self._response_cache = parent.response_cache
+            self._request_coalescer = parent.request_coalescer
+            self._rate_limiter = rate_limiter or parent.rate_limiter
+            self._retry_policy = parent.retry_policy
+            self._hedge_policy = parent.hedge_policy
+            self._json_codec = parent.json_codec
+            self._lazy_validation = parent.lazy_validation
 
     @asyncio.coroutine
-    def _raw_request(self, method, url, data=None):
+    def _raw_request(self, method, url, data=None, headers=None):
         """Send the aiohttp request and return the response object."""
+        request_kwargs = self._request_kwargs
+        if headers:
+            request_kwargs = dict(request_kwargs, headers=dict(
+                request_kwargs.get('headers') or {}, **headers))
+        rate_limiter = self._rate_limiter
+        if rate_limiter is not None:
+            yield from rate_limiter.acquire()
         try:
             _LOGGER.debug('Sending %s, to %s: %s', method, url, data)
             resp = yield from self._client_session.request(
-                method, url, data=data, **self._request_kwargs)
+                method, url, data=data, **request_kwargs)
         except (aiohttp.client_exceptions.ClientError,
                 asyncio.TimeoutError) as exc:
             raise exceptions.TransportError from exc
@@ -40,33 +74,155 @@ class BaseApiObject():
         if status_exception is not None:
             resp_json = {}
             try:
-                resp_json = yield from resp.json()
+                resp_json = yield from resp.json(loads=self._json_codec.loads)
             except (aiohttp.client_exceptions.ClientResponseError,
                     ValueError):
                 # Error message is nice, but not required
                 pass
-            raise status_exception(resp_json.get('error'),
-                                   resp_json.get('error_description'))
+            error = status_exception(resp_json.get('error'),
+                                     resp_json.get('error_description'))
+            if isinstance(error, exceptions.RateLimitedError):
+                error.retry_after = ratelimit.parse_retry_after(
+                    resp.headers.get('Retry-After'))
+                _LOGGER.warning('Rate limited by Automatic, retry after %s',
+                                error.retry_after)
+                if rate_limiter is not None:
+                    rate_limiter.throttled(error.retry_after)
+            raise error
+
+        if rate_limiter is not None:
+            rate_limiter.succeeded()
         return resp
 
+    @asyncio.coroutine
+    def _send(self, method, url, data=None, headers=None):
+        """Send a request, applying the hedge and retry policies."""
+        def attempt():
+            """Return a coroutine for a single attempt of the request."""
+            if (self._hedge_policy is not None and data is None and
+                    method == aiohttp.hdrs.METH_GET):
+                return self._hedge_policy.call(
+                    url, lambda: self._raw_request(method, url, data, headers),
+                    self.loop)
+            return self._raw_request(method, url, data, headers)
+
+        if self._retry_policy is None:
+            return (yield from attempt())
+
+        return (yield from self._retry_policy.call(method, url, attempt))
+
     @asyncio.coroutine
     def _request(self, method, url, data=None):
         """Wrapper for aiohttp request that returns a parsed dict."""
-        resp = yield from self._raw_request(method, url, data)
+        cache = self._response_cache
+        cache_key = None
+        entry = None
+        if (cache is not None and method == aiohttp.hdrs.METH_GET and
+                data is None and cache.is_cacheable(url)):
+            headers = self._request_kwargs.get('headers') or {}
+            cache_key = (url, headers.get('Authorization'))
+            entry = cache.get(cache_key)
+            if entry is not None and entry.fresh:
+                _LOGGER.debug('Cached response for %s', url)
+                return entry.data
+
+        resp = yield from self._send(
+            method, url, data, entry.validators if entry else None)
+        if entry is not None and resp.status == 304:
+            _LOGGER.debug('Revalidated cached response for %s', url)
+            cache.revalidate(cache_key, url, resp.headers)
+            return entry.data
+
         try:
-            data = yield from resp.json()
+            data = yield from resp.json(loads=self._json_codec.loads)
             _LOGGER.debug('Received %r', data)
-            return data
         except (aiohttp.client_exceptions.ClientResponseError,
                 ValueError) as exc:
             raise exceptions.InvalidResponseError from exc
 
+        if cache_key is not None:
+            cache.set(cache_key, url, data, resp.headers)
+        return data
+
+    @asyncio.coroutine
+    def _get_all_pages(self, url, params, concurrency):
+        """Fetch every page of a list endpoint concurrently.
+
+        The count reported by the first page determines the remaining page
+        numbers, which are then fetched with at most ``concurrency``
+        requests in flight. Results are merged in page order, dropping
+        items already returned by an earlier page.
+        """
+        if concurrency < 1:
+            raise ValueError('concurrency must be at least 1')
+
+        first_page = params.get('page', 1)
+        limit = None
+
+        def page_url(page):
+            """Return the url to fetch the given page number."""
+            page_params = dict(params, page=page)
+            if limit is not None:
+                page_params['limit'] = limit
+            return '?'.join((url, gen_query_string(page_params)))
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        @asyncio.coroutine
+        def get_page(page):
+            """Fetch and validate a single page."""
+            yield from semaphore.acquire()
+            try:
+                resp = yield from self._get(page_url(page))
+            finally:
+                semaphore.release()
+            return validation.validate(validation.LIST_RESPONSE, resp)
+
+        first = yield from get_page(first_page)
+        limit = params.get('limit') or len(first['results'])
+
+        pages = [first]
+        if limit:
+            last_page = math.ceil(first['_metadata']['count'] / limit)
+            pages.extend((yield from asyncio.gather(*(
+                get_page(page)
+                for page in range(first_page + 1, last_page + 1)))))
+
+        results = []
+        seen = set()
+        for page in pages:
+            for item in page['results']:
+                item_id = item.get('id') if isinstance(item, dict) else None
+                if item_id is not None:
+                    if item_id in seen:
+                        continue
+                    seen.add(item_id)
+                results.append(item)
+
+        return {
+            '_metadata': {
+                'count': first['_metadata']['count'],
+                'next': None,
+                'previous': first['_metadata']['previous'],
+            },
+            'results': results,
+        }
+
     def _get(self, url, data=None):
         """Wrapper for aiohttp get.
 
+        Identical concurrent requests share a single request when a request
+        coalescer is configured.
+
         This method is a coroutine.
         """
-        return self._request(aiohttp.hdrs.METH_GET, url, data)
+        if self._request_coalescer is None or data is not None:
+            return self._request(aiohttp.hdrs.METH_GET, url, data)
+
+        headers = self._request_kwargs.get('headers') or {}
+        return self._request_coalescer.request(
+            (url, headers.get('Authorization')),
+            lambda: self._request(aiohttp.hdrs.METH_GET, url), self.loop)
 
     def _post(self, url, data=None):
         """Wrapper for aiohttp post.
@@ -90,6 +246,41 @@ class BaseApiObject():
         """kwargs that will be sent with each aiohttp request."""
         return self._request_kwargs
 
+    @property
+    def response_cache(self):
+        """Cache for GET responses, or None if caching is disabled."""
+        return self._response_cache
+
+    @property
+    def request_coalescer(self):
+        """Coalescer for identical GET requests, or None if disabled."""
+        return self._request_coalescer
+
+    @property
+    def rate_limiter(self):
+        """Rate limiter for requests, or None if requests are unlimited."""
+        return self._rate_limiter
+
+    @property
+    def retry_policy(self):
+        """Retry policy for failed requests, or None to never retry."""
+        return self._retry_policy
+
+    @property
+    def hedge_policy(self):
+        """Hedge policy for slow GET requests, or None to never hedge."""
+        return self._hedge_policy
+
+    @property
+    def json_codec(self):
+        """Codec decoding json responses."""
+        return self._json_codec
+
+    @property
+    def lazy_validation(self):
+        """True if received objects validate fields on first access."""
+        return self._lazy_validation
+
 
 class ResultList(BaseApiObject, list):
     """List subclass to access list pages via the API."""
@@ -99,7 +290,8 @@ class ResultList(BaseApiObject, list):
         BaseApiObject.__init__(self, parent)
         self._item_class = item_class
         resp = validation.validate(validation.LIST_RESPONSE, resp)
-        list.__init__(self, (item_class(item) for item in resp['results']))
+        list.__init__(self, (item_class(item, self._lazy_validation)
+                             for item in resp['results']))
         self._next = resp['_metadata']['next']
         self._previous = resp['_metadata']['previous']
 
@@ -132,39 +324,389 @@ class ResultList(BaseApiObject, list):
         return self._previous
 
 
-class BaseDataObject():
-    """Object that represents data received from the API."""
+class ResultIterator(BaseApiObject):
+    """Asynchronous iterator over every item of a paginated list.
+
+    Pages are fetched by a background task that follows the ``next`` links
+    while earlier pages are still being validated and consumed. At most
+    ``prefetch`` pages are fetched ahead of the consumer.
+
+    An iterator which is not exhausted must be closed to stop its
+    background task, either with close() or by using it as an asynchronous
+    context manager.
+    """
+
+    def __init__(self, parent, url, item_class, prefetch=2):
+        """Create a result iterator object."""
+        BaseApiObject.__init__(self, parent)
+        if prefetch < 1:
+            raise ValueError('prefetch must be at least 1')
+        self._url = url
+        self._item_class = item_class
+        self._prefetch = prefetch
+        self._pages = None
+        self._slots = None
+        self._fetch_task = None
+        self._results = iter(())
+        self._closed = False
+
+    def __aiter__(self):
+        """Return the iterator object."""
+        return self
+
+    @asyncio.coroutine
+    def __aenter__(self):
+        """Enter the iterator context."""
+        return self
+
+    @asyncio.coroutine
+    def __aexit__(self, exc_type, exc_value, traceback):
+        """Close the iterator when leaving the context."""
+        self.close()
+
+    @asyncio.coroutine
+    def __anext__(self):
+        """Return the next item, waiting for its page if required."""
+        item = yield from self.next()
+        if item is None:
+            raise StopAsyncIteration
+        return item
+
+    @asyncio.coroutine
+    def next(self):
+        """Return the next item, or None once every item was returned.
+
+        Coroutine for code using ``yield from`` instead of ``async for``.
+        """
+        item = next(self._results, None)
+        while item is None:
+            if self._closed:
+                return None
+            if self._pages is None:
+                self._start()
+            page = yield from self._pages.get()
+            if page is None:
+                self._closed = True
+                return None
+            if isinstance(page, Exception):
+                self._closed = True
+                raise page
+            self._slots.release()
+            self._results = iter(page)
+            item = next(self._results, None)
+        return self._item_class(item, self._lazy_validation)
+
+    def _start(self):
+        """Start the background task fetching pages."""
+        self._pages = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self._prefetch)
+        self._fetch_task = self.loop.create_task(self._fetch_pages())
+
+    @asyncio.coroutine
+    def _fetch_pages(self):
+        """Fetch pages and queue their results for the consumer."""
+        url = self._url
+        try:
+            while url is not None:
+                yield from self._slots.acquire()
+                resp = yield from self._get(url)
+                resp = validation.validate(validation.LIST_RESPONSE, resp)
+                url = resp['_metadata']['next']
+                self._pages.put_nowait(resp['results'])
+        except asyncio.CancelledError:  # pylint: disable=try-except-raise
+            # CancelledError is an Exception before Python 3.8
+            raise
+        except Exception as exc:  # pylint: disable=broad-except
+            # Hand the error to the consumer instead of losing it in the task
+            self._pages.put_nowait(exc)
+        else:
+            self._pages.put_nowait(None)
+
+    def close(self):
+        """Stop fetching further pages."""
+        self._closed = True
+        if self._fetch_task is not None:
+            self._fetch_task.cancel()
+        self._results = iter(())
+
+
+class ResultStream(BaseApiObject):
+    """Asynchronous iterator over every item of a paginated list.
+
+    Each page is parsed incrementally while its body is received, and
+    items are validated one at a time. Memory use does not grow with the
+    page size, as only the item being received is buffered.
+
+    A stream which is not exhausted must be closed to release its HTTP
+    response, either with close() or by using it as an asynchronous
+    context manager.
+    """
+
+    def __init__(self, parent, url, item_class, chunk_size=65536):
+        """Create a result stream object."""
+        BaseApiObject.__init__(self, parent)
+        self._url = url
+        self._item_class = item_class
+        self._chunk_size = chunk_size
+        self._resp = None
+        self._parser = None
+        self._items = collections.deque()
+        self._closed = False
+
+    def __aiter__(self):
+        """Return the iterator object."""
+        return self
+
+    @asyncio.coroutine
+    def __aenter__(self):
+        """Enter the stream context."""
+        return self
+
+    @asyncio.coroutine
+    def __aexit__(self, exc_type, exc_value, traceback):
+        """Close the stream when leaving the context."""
+        self.close()
+
+    @asyncio.coroutine
+    def __anext__(self):
+        """Return the next item, reading its page if required."""
+        item = yield from self.next()
+        if item is None:
+            raise StopAsyncIteration
+        return item
+
+    @asyncio.coroutine
+    def next(self):
+        """Return the next item, or None once every item was returned.
+
+        Coroutine for code using ``yield from`` instead of ``async for``.
+        """
+        while not self._items:
+            if self._closed or (self._resp is None and self._url is None):
+                return None
+            if self._resp is None:
+                self._resp = yield from self._send(
+                    aiohttp.hdrs.METH_GET, self._url)
+                self._parser = streaming.ListStreamParser(
+                    self._json_codec.loads)
+            try:
+                yield from self._read_chunk()
+            except (aiohttp.client_exceptions.ClientError,
+                    asyncio.TimeoutError) as exc:
+                self.close()
+                raise exceptions.TransportError from exc
+            except ValueError as exc:
+                self.close()
+                raise exceptions.InvalidResponseError from exc
+            except exceptions.InvalidMessageError:
+                self.close()
+                raise
+        return self._item_class(
+            self._items.popleft(), self._lazy_validation)
+
+    @asyncio.coroutine
+    def _read_chunk(self):
+        """Parse the next chunk of the current page."""
+        chunk = yield from self._resp.content.read(self._chunk_size)
+        if chunk:
+            self._items.extend(self._parser.feed(chunk))
+            return
+
+        values = self._parser.close()
+        if self._parser.has_results:
+            # Results were already validated one at a time
+            values = dict(values, results=[])
+        self._resp.release()
+        self._resp = None
+        self._parser = None
+        resp = validation.validate(validation.LIST_RESPONSE, values)
+        self._url = resp['_metadata']['next']
+
+    def close(self):
+        """Stop reading further items."""
+        self._closed = True
+        self._items.clear()
+        if self._resp is not None:
+            self._resp.close()
+            self._resp = None
+
+
+class DataObjectMeta(type):
+    """Metaclass generating the slots of data objects from their validator.
+
+    Every field of the validator schema that is not already a slot of a
+    base class becomes a slot, so field values are stored directly on the
+    object without a dict.
+    """
+
+    def __new__(mcs, name, bases, namespace):
+        """Create a data object class."""
+        validator = namespace.get('validator')
+        if validator is None:
+            validator = next(base.validator for base in bases
+                             if hasattr(base, 'validator'))
+        inherited = set()
+        for base in bases:
+            inherited.update(getattr(base, '_fields', ()))
+
+        fields = tuple(validation.schema_fields(validator))
+        slots = []
+        for field in fields:
+            if field in inherited:
+                continue
+            if field in namespace or any(hasattr(base, field)
+                                         for base in bases):
+                raise TypeError('Field {} of {} conflicts with an '
+                                'attribute'.format(field, name))
+            slots.append(field)
+        namespace['__slots__'] = tuple(namespace.get('__slots__', ())) + \
+            tuple(slots)
+        namespace['_fields'] = fields
+        return super().__new__(mcs, name, bases, namespace)
+
+
+def _unconvert(value):
+    """Return the data of a field value holding nested objects."""
+    if isinstance(value, BaseDataObject):
+        return value.data
+    if isinstance(value, list):
+        return [_unconvert(item) for item in value]
+    return value
+
+
+class BaseDataObject(metaclass=DataObjectMeta):
+    """Object that represents data received from the API.
+
+    Fields are stored in slots generated from the validator schema, so
+    attributes other than the fields cannot be set on data objects.
+    ``children`` maps field names to the data object class used to expose
+    them, a list holding the class for lists of objects, or a callable
+    applied to the validated value. Nested objects use the validation mode
+    of their parent. ``data`` returns the validated value of fields which
+    a callable or a missing list converted, and of the nested objects named
+    in ``kept_fields``, whose own schema drops keys validated here.
+    """
+    __slots__ = ('_raw', '_kept')
     validator = lambda self, value: {}  # noqa: E731
+    children = {}
+    kept_fields = ()
 
-    def __init__(self, data):
-        """Create the data object."""
-        self._data = validation.validate(self.validator, data)
+    def __init__(self, data, lazy=False):
+        """Create the data object.
+
+        :param data: Data received from the API
+        :param lazy: Validate each field on first access instead of now
+        """
+        if lazy:
+            if not isinstance(data, dict):
+                raise exceptions.InvalidMessageError(
+                    "Message does not match schema: {}".format(data))
+            self._raw = data
+            self._kept = None
+            return
+
+        self._raw = None
+        self._kept = None
+        children = self.children
+        for name, value in validation.validate(self.validator, data).items():
+            child = children.get(name)
+            if child is not None:
+                value = self._convert_field(name, child, value)
+            setattr(self, name, value)
 
     def __getattr__(self, name):
-        """Lookup the attribute in the data dict."""
+        """Validate a field of a lazy object on first access."""
+        if name in ('_raw', '_kept') or self._raw is None:
+            raise AttributeError(name)
+
+        value = self._validate_field(name)
+        setattr(self, name, value)
+        return value
+
+    def _validate_field(self, name):
+        """Validate and convert a single field of the raw data."""
         try:
-            return self._data[name]
+            validator, required, default = validation.schema_fields(
+                self.validator)[name]
         except KeyError as exc:
             raise AttributeError() from exc
 
+        if name in self._raw:
+            value = self._raw[name]
+        elif default is not None:
+            value = default()
+        elif required:
+            raise exceptions.InvalidMessageError(
+                "Message does not match schema: {}".format(self._raw))
+        else:
+            raise AttributeError()
+
+        child = self.children.get(name)
+        if child is None:
+            return validation.validate(validator, value)
+        if value is None or not isinstance(child, (list, type)) or \
+                name in self.kept_fields:
+            # Only nested objects are left to validate themselves
+            value = validation.validate(validator, value)
+        return self._convert_field(name, child, value)
+
+    def _convert_field(self, name, child, value):
+        """Convert a field value, keeping the values data must return."""
+        if name in self.kept_fields or not isinstance(child, type) and (
+                value is None or not isinstance(child, list)):
+            if self._kept is None:
+                self._kept = {}
+            self._kept[name] = value
+        return self._convert(child, value)
+
+    def _convert(self, child, value):
+        """Convert a field value using its children entry."""
+        lazy = self._raw is not None
+        if isinstance(child, list):
+            return [self._convert(child[0], item) for item in value or []]
+        if not isinstance(child, type):
+            return child(value)
+        if value is None:
+            return None
+        if issubclass(child, BaseApiObject):
+            return child(self._parent, value, lazy)
+        return child(value, lazy)
+
     def __repr__(self):
         """Return a string representation of this object for debugging."""
-        if not hasattr(self, 'id'):
+        try:
+            object_id = self.id
+        except (AttributeError, exceptions.InvalidMessageError):
+            # No id, or the id of a lazy object is missing or invalid
             return super().__repr__()
 
         return '<{}.{} id="{}">'.format(
-            self.__module__, self.__class__.__name__, self.id)
+            self.__module__, self.__class__.__name__, object_id)
 
     @property
     def data(self):
-        """Return the data for this object as a dictionary."""
-        return self._data
+        """Return the data for this object as a dictionary.
+
+        The dictionary is rebuilt from the fields of this object, which are
+        all validated first in lazy mode.
+        """
+        data = {}
+        for name in self._fields:
+            try:
+                value = getattr(self, name)
+            except AttributeError:
+                continue
+            if self._kept is not None and name in self._kept:
+                data[name] = self._kept[name]
+            else:
+                data[name] = _unconvert(value)
+        return data
 
 
 class BaseApiDataObject(BaseApiObject, BaseDataObject):
     """Data object with methods to fetch further data."""
 
-    def __init__(self, parent, data):
+    def __init__(self, parent, data, lazy=False):
         """Create the data object."""
         BaseApiObject.__init__(self, parent)
-        BaseDataObject.__init__(self, data)
+        BaseDataObject.__init__(self, data, lazy)
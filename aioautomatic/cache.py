@@ -0,0 +1,189 @@
+"""Response caching and request coalescing for aioautomatic."""
+import asyncio
+import collections
+import math
+import re
+import time
+
+from aioautomatic import const
+
+
+def finished_trip_ttl(data):
+    """Cache finished trips forever, since they are never modified."""
+    return math.inf if data.get('ended_at') is not None else 0
+
+
+# Default time to live in seconds for each cached endpoint. Values may also
+# be callables returning the time to live for a parsed response.
+DEFAULT_TTLS = {
+    const.TRIP_URL: finished_trip_ttl,
+    const.VEHICLE_URL: 60,
+    const.DEVICE_URL: 300,
+    const.USER_PROFILE_URL: 300,
+    const.USER_METADATA_URL: 300,
+}
+
+
+def url_pattern(template):
+    """Compile a regex matching urls generated from a url template."""
+    return re.compile('^{}$'.format('[^/?]+'.join(
+        re.escape(part) for part in template.split('{}'))))
+
+
+class CacheEntry():
+    """Cached response for a single url."""
+
+    __slots__ = ('data', 'expires', 'etag', 'last_modified')
+
+    def __init__(self, data, expires, etag, last_modified):
+        """Create a cache entry."""
+        self.data = data
+        self.expires = expires
+        self.etag = etag
+        self.last_modified = last_modified
+
+    @property
+    def fresh(self):
+        """The entry can be returned without contacting the server."""
+        return time.monotonic() < self.expires
+
+    @property
+    def validators(self):
+        """Headers to revalidate the entry with a conditional GET."""
+        headers = {}
+        if self.etag is not None:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified is not None:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers or None
+
+
+class ResponseCache():
+    """LRU cache of parsed GET responses.
+
+    Only urls matching one of the endpoint templates in ``ttls`` are
+    cached. Stale entries are kept for revalidation when the server sent
+    an ETag or Last-Modified header. Cached data is shared between
+    callers and must not be modified.
+
+    Any object implementing ``is_cacheable``, ``get``, ``set`` and
+    ``revalidate`` may be used in place of this class.
+    """
+
+    def __init__(self, max_size=1024, ttls=None):
+        """Create a response cache.
+
+        :param max_size: Maximum number of cached responses
+        :param ttls: Dict of url template to time to live in seconds,
+                     or to a callable returning it for a parsed response
+        """
+        self._max_size = max_size
+        self._ttls = [(url_pattern(template), ttl) for template, ttl in
+                      (DEFAULT_TTLS if ttls is None else ttls).items()]
+        self._entries = collections.OrderedDict()
+
+    def _ttl(self, url, data=None):
+        """Return the time to live rule for a url, or None."""
+        for pattern, ttl in self._ttls:
+            if pattern.match(url):
+                return ttl(data) if callable(ttl) and data is not None \
+                    else ttl
+        return None
+
+    def is_cacheable(self, url):
+        """Return True if responses for the url may be cached."""
+        return self._ttl(url) is not None
+
+    def get(self, key):
+        """Return the entry stored for key, or None."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key, url, data, headers):
+        """Store a parsed response along with its validator headers."""
+        ttl = self._ttl(url, data)
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        if not ttl and etag is None and last_modified is None:
+            # Nothing would ever be served from this entry
+            self._entries.pop(key, None)
+            return
+        self._entries[key] = CacheEntry(
+            data, time.monotonic() + ttl, etag, last_modified)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+    def revalidate(self, key, url, headers):
+        """Mark an entry fresh after the server returned 304."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return
+        entry.expires = time.monotonic() + self._ttl(url, entry.data)
+        entry.etag = headers.get('ETag', entry.etag)
+        entry.last_modified = headers.get('Last-Modified',
+                                          entry.last_modified)
+
+    def clear(self):
+        """Remove all cached responses."""
+        self._entries.clear()
+
+    def __len__(self):
+        """Return the number of cached responses."""
+        return len(self._entries)
+
+
+class RequestCoalescer():
+    """Share in-flight requests between concurrent identical calls.
+
+    The first call for a key sends the request. Calls made for the same
+    key before it completes join that request and receive the same parsed
+    result, or the same exception. Cancelling one caller does not cancel
+    the shared request.
+    """
+
+    def __init__(self):
+        """Create a request coalescer."""
+        self._flights = {}
+        self.requests = 0
+        self.joins = 0
+
+    @asyncio.coroutine
+    def request(self, key, request_factory, loop):
+        """Return the result of the in-flight request for key.
+
+        :param key: Hashable identity of the request
+        :param request_factory: Callable returning the request coroutine
+        :param loop: Event loop to run the shared request in
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            self.requests += 1
+            flight = loop.create_task(request_factory())
+            self._flights[key] = flight
+            flight.add_done_callback(
+                lambda task: self._flight_done(key, task))
+        else:
+            self.joins += 1
+        return (yield from asyncio.shield(flight))
+
+    def _flight_done(self, key, flight):
+        """Forget a completed request."""
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if not flight.cancelled():
+            # Retrieve the exception in case every caller was cancelled
+            flight.exception()
+
+    @property
+    def in_flight(self):
+        """Number of requests currently in flight."""
+        return len(self._flights)
+
+    @property
+    def hit_rate(self):
+        """Fraction of calls that joined an in-flight request."""
+        calls = self.requests + self.joins
+        return self.joins / calls if calls else 0.0
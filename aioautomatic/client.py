@@ -2,7 +2,6 @@
 
 import asyncio
 import itertools
-import json
 import logging
 import random
 import string
@@ -14,6 +13,7 @@ from aiohttp import ClientError
 from aiohttp.http_exceptions import HttpProcessingError
 
 from aioautomatic import base
+from aioautomatic import codec
 from aioautomatic import const
 from aioautomatic import exceptions
 from aioautomatic import session
@@ -34,18 +34,50 @@ class Client(base.BaseApiObject):
     """API client object to access all underlying methods."""
 
     def __init__(self, client_id, client_secret, client_session=None,
-                 request_kwargs=None):
+                 request_kwargs=None, response_cache=None,
+                 request_coalescer=None, rate_limiter=None,
+                 retry_policy=None, hedge_policy=None, connector_kwargs=None,
+                 json_codec=None, lazy_validation=False):
         """Create a client object.
 
         :param client_id: Automatic Application Client ID
         :param client_secret: Automatic Application Secret
         :param client_session: aiohttp client session to be used for
-                               lifetime of the object
+                               lifetime of the object. If not passed, the
+                               client creates and owns a session, which is
+                               closed by Client.close.
         :param request_kwargs: kwargs to be sent with all aiohttp
                                requests
+        :param response_cache: aioautomatic.cache.ResponseCache used for
+                               GET requests of single objects
+        :param request_coalescer: aioautomatic.cache.RequestCoalescer
+                                  sharing identical concurrent GET requests
+        :param rate_limiter: aioautomatic.ratelimit.RateLimiter shared by
+                             this client and its sessions
+        :param retry_policy: aioautomatic.retry.RetryPolicy for requests
+                             failing with transient errors
+        :param hedge_policy: aioautomatic.hedge.HedgePolicy duplicating
+                             GET requests slower than usual
+        :param connector_kwargs: kwargs overriding the TCPConnector
+                                 defaults of an owned client session
+        :param json_codec: aioautomatic.codec.JsonCodec, or the name of a
+                           json module, decoding responses and realtime
+                           events
+        :param lazy_validation: Validate each field of received objects on
+                                first access instead of on creation
         :returns Client: Automatic API Client.
         """
-        super().__init__(None, request_kwargs, client_session)
+        if isinstance(json_codec, str):
+            json_codec = codec.get_codec(json_codec)
+        self._owns_session = client_session is None
+        if self._owns_session:
+            connector_kwargs = dict(const.DEFAULT_CONNECTOR_KWARGS,
+                                    **(connector_kwargs or {}))
+            client_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(**connector_kwargs))
+        super().__init__(None, request_kwargs, client_session, response_cache,
+                         request_coalescer, rate_limiter, retry_policy,
+                         hedge_policy, json_codec, lazy_validation)
         self._client_id = client_id
         self._client_secret = client_secret
         self._ws_connection = None
@@ -54,6 +86,49 @@ class Client(base.BaseApiObject):
 
         self.generate_state()
 
+    @asyncio.coroutine
+    def __aenter__(self):
+        """Enter the client context."""
+        return self
+
+    @asyncio.coroutine
+    def __aexit__(self, exc_type, exc_value, traceback):
+        """Close the client when leaving the context."""
+        yield from self.close()
+
+    @asyncio.coroutine
+    def close(self):
+        """Close the websocket connection and any owned client session."""
+        yield from self.ws_close()
+        if self._owns_session and not self._client_session.closed:
+            yield from self._client_session.close()
+
+    @asyncio.coroutine
+    def prewarm(self, urls=const.PREWARM_URLS, connections=1):
+        """Open pooled connections to the Automatic servers ahead of time.
+
+        HEAD requests complete the DNS lookup and TLS handshake, and the
+        connections are kept alive for later requests. Failures are only
+        logged, since the connections will be opened again on demand.
+
+        :param urls: Urls of the hosts to connect to
+        :param connections: Number of connections to open per host
+        """
+        @asyncio.coroutine
+        def open_connection(url):
+            """Send a HEAD request to open a connection."""
+            try:
+                resp = yield from self._client_session.request(
+                    aiohttp.hdrs.METH_HEAD, url, **self._request_kwargs)
+                resp.release()
+            except (ClientError, asyncio.TimeoutError) as exc:
+                _LOGGER.debug('Unable to prewarm connection to %s: %s',
+                              url, exc)
+
+        _LOGGER.info("Prewarming connections.")
+        yield from asyncio.gather(*(
+            open_connection(url) for url in urls for _ in range(connections)))
+
     def generate_state(self):
         """Generate a new state string for OAuth2 url requests.
 
@@ -84,11 +159,13 @@ class Client(base.BaseApiObject):
         return const.OAUTH_URL.format(urlencode(params))
 
     @asyncio.coroutine
-    def create_session_from_oauth_code(self, code, state):
+    def create_session_from_oauth_code(self, code, state, rate_limiter=None):
         """Create a session object authenticated by an oauth code.
 
         :param code: Auth code received from Automatic redirect URL GET
         :param state: State received from Automatic redirect URL GET
+        :param rate_limiter: Rate limiter for this session, instead of the
+                             client rate limiter
         :returns Session: Authenticated session object
         """
         if state != self.state:
@@ -108,14 +185,17 @@ class Client(base.BaseApiObject):
             }
         resp = yield from self._post(const.AUTH_URL, auth_payload)
         data = validation.validate(validation.AUTH_TOKEN, resp)
-        return session.Session(self, **data)
+        return session.Session(self, rate_limiter=rate_limiter, **data)
 
     # pylint: disable=invalid-name
     @asyncio.coroutine
-    def create_session_from_refresh_token(self, refresh_token):
+    def create_session_from_refresh_token(self, refresh_token,
+                                          rate_limiter=None):
         """Create a session object authenticated by a stored refresh token.
 
         :param refresh_token: Refresh token from previous session
+        :param rate_limiter: Rate limiter for this session, instead of the
+                             client rate limiter
         :returns Session: Authenticated session object
         """
         _LOGGER.info("Creating session from refresh token.")
@@ -127,7 +207,7 @@ class Client(base.BaseApiObject):
             }
         resp = yield from self._post(const.AUTH_URL, auth_payload)
         data = validation.validate(validation.AUTH_TOKEN, resp)
-        return session.Session(self, **data)
+        return session.Session(self, rate_limiter=rate_limiter, **data)
 
     @asyncio.coroutine
     def _get_engineio_session(self):
@@ -154,7 +234,7 @@ class Client(base.BaseApiObject):
         if packet_type != 0:
             raise exceptions.TransportError(
                 'engineIO packet is not open type: {}'.format(packet_str))
-        session_data = json.loads(packet_str)
+        session_data = self._json_codec.loads(packet_str)
 
         # Convert from ms to seconds
         session_data[ATTR_PING_TIMEOUT] /= 1000.0
@@ -190,7 +270,7 @@ class Client(base.BaseApiObject):
             if resp.startswith('44'):
                 try:
                     # If a valid message was sent, raise the appropriate error
-                    msg = json.loads(resp[2:])
+                    msg = self._json_codec.loads(resp[2:])
                     raise exceptions.get_socketio_error(msg)
                 except ValueError:
                     pass
@@ -253,7 +333,7 @@ class Client(base.BaseApiObject):
 
         # socketIO event
         if data.startswith('42'):
-            msg = json.loads(data[2:])
+            msg = self._json_codec.loads(data[2:])
             name = msg[0]
             event = msg[1]
 
@@ -264,7 +344,7 @@ class Client(base.BaseApiObject):
                 return
 
             try:
-                event_data = event_class(self, event)
+                event_data = event_class(self, event, self._lazy_validation)
             except exceptions.InvalidMessageError as exc:
                 _LOGGER.error('Message %s received does not match schema',
                               name)
@@ -276,7 +356,7 @@ class Client(base.BaseApiObject):
 
         # socketIO error
         if data.startswith('44'):
-            msg = json.loads(data[2:])
+            msg = self._json_codec.loads(data[2:])
             self._handle_event(EVENT_WS_ERROR, msg)
             return
 
@@ -0,0 +1,60 @@
+"""JSON codecs for aioautomatic."""
+import importlib
+import json
+import logging
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class JsonCodec():
+    """JSON decoder used for REST responses and websocket packets.
+
+    ``loads`` must accept a str and raise ValueError for invalid input.
+    """
+
+    def __init__(self, name, loads):
+        """Create a json codec.
+
+        :param name: Name identifying the codec
+        :param loads: Callable decoding a json document
+        """
+        self.name = name
+        self.loads = loads
+
+    def __repr__(self):
+        """Return a string representation of this codec for debugging."""
+        return '<{}.{} name="{}">'.format(
+            self.__module__, self.__class__.__name__, self.name)
+
+
+STDLIB_CODEC = JsonCodec('json', json.loads)
+
+# Optional third party decoders, from fastest to slowest
+OPTIONAL_CODECS = ('orjson', 'ujson')
+
+
+def get_codec(name=None):
+    """Return a json codec by module name.
+
+    Without a name, the fastest installed optional decoder is used. The
+    standard library decoder is returned when the requested decoder is not
+    installed.
+
+    :param name: 'orjson', 'ujson', 'json', or None for the fastest
+    """
+    if name == STDLIB_CODEC.name:
+        return STDLIB_CODEC
+
+    for module_name in OPTIONAL_CODECS if name is None else (name,):
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError:
+            continue
+        if not callable(getattr(module, 'loads', None)):
+            raise ValueError('{} is not a json decoder'.format(module_name))
+        return JsonCodec(module_name, module.loads)
+
+    if name is not None:
+        _LOGGER.warning('JSON decoder %s is not installed, falling back to '
+                        'the standard library', name)
+    return STDLIB_CODEC
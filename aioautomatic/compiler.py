@@ -0,0 +1,292 @@
+"""Compiled validators for aioautomatic response schemas."""
+from decimal import InvalidOperation
+import inspect
+
+import voluptuous as vol
+
+_PRIMITIVE_TYPES = (bool, bytes, int, float, str, type(None))
+
+
+class _Reject(Exception):
+    """Raised by compiled validators when a value may be invalid."""
+
+
+class _Unsupported(Exception):
+    """Raised when a schema uses constructs the compiler does not handle."""
+
+
+class CompiledSchema():
+    """Validator equivalent to a voluptuous schema, but faster.
+
+    Valid values are handled by plain functions generated from the schema
+    definition. Whenever the compiled validator rejects a value, it is
+    validated again by the voluptuous schema itself, so invalid values
+    raise the same errors as before.
+    """
+
+    def __init__(self, schema):
+        """Compile a voluptuous schema.
+
+        :param schema: vol.Schema to compile
+        """
+        self.schema = schema
+        self._validate = _compile(schema.schema, schema)
+
+    def __call__(self, value):
+        """Validate the value and return the validated data."""
+        try:
+            return self._validate(value)
+        except _Reject:
+            return self.schema(value)
+
+    def __repr__(self):
+        """Return a string representation of this object for debugging."""
+        return '<{}.{} {!r}>'.format(
+            self.__module__, self.__class__.__name__, self.schema)
+
+
+# Compiled validators, by schema id
+_COMPILED = {}
+
+
+def compile_schema(schema):
+    """Return the compiled validator of a schema.
+
+    Validators that are not voluptuous schemas, or schemas using
+    constructs the compiler does not handle, are returned unchanged.
+    """
+    cached = _COMPILED.get(id(schema))
+    if cached is not None and cached[0] is schema:
+        return cached[1]
+
+    compiled = schema
+    if isinstance(schema, vol.Schema):
+        try:
+            compiled = CompiledSchema(schema)
+        except _Unsupported:
+            pass
+    _COMPILED[id(schema)] = (schema, compiled)
+    return compiled
+
+
+def _fast(schema):
+    """Return the compiled function validating a nested schema."""
+    compiled = compile_schema(schema)
+    if isinstance(compiled, CompiledSchema):
+        return compiled._validate  # pylint: disable=protected-access
+    return _compile_callable(compiled)
+
+
+def _compile(node, parent):
+    """Compile a schema node using the settings of its parent schema."""
+    if isinstance(node, vol.Schema):
+        return _fast(node)
+    if isinstance(node, dict):
+        return _compile_mapping(node, parent)
+    if isinstance(node, list):
+        return _compile_sequence(node, parent)
+    # Exact classes only, since subclasses such as vol.Union and vol.SomeOf
+    # combine their validators differently
+    # pylint: disable=unidiomatic-typecheck
+    if type(node) is vol.Any and not node.msg:
+        return _compile_any([_compile(item, parent)
+                             for item in node.validators], node.validators)
+    if type(node) is vol.All and not node.msg:
+        return _compile_all([_compile(item, parent)
+                             for item in node.validators])
+    if type(node) is vol.Coerce and not node.msg:
+        return _compile_coerce(node.type)
+    if inspect.isclass(node):
+        return _compile_instance(node)
+    if isinstance(node, _PRIMITIVE_TYPES):
+        return _compile_literal(node)
+    if callable(node) and not hasattr(node, '__voluptuous_compile__') and \
+            not isinstance(node, vol.Marker):
+        return _compile_callable(node)
+    raise _Unsupported(node)
+
+
+def _compile_mapping(schema, parent):
+    """Compile a dict schema."""
+    fields = {}
+    defaults = []
+    required_keys = []
+    for key, value in schema.items():
+        if isinstance(key, vol.Marker):
+            if type(key) not in (vol.Optional, vol.Required) or \
+                    not isinstance(key.schema, str):
+                raise _Unsupported(key)
+            name = key.schema
+            default = key.default
+            required = isinstance(key, vol.Required) or (
+                parent.required and not isinstance(key, vol.Optional))
+        elif isinstance(key, str):
+            name = key
+            default = vol.UNDEFINED
+            required = parent.required
+        else:
+            raise _Unsupported(key)
+        if name in fields:
+            raise _Unsupported(key)
+
+        validator = _compile(value, parent)
+        fields[name] = validator
+        if default is not vol.UNDEFINED:
+            defaults.append((name, default, validator))
+        elif required:
+            required_keys.append(name)
+
+    allow_extra = parent.extra == vol.ALLOW_EXTRA
+    remove_extra = parent.extra == vol.REMOVE_EXTRA
+    get_field = fields.get
+    get_classes = {name: validator.classes
+                   for name, validator in fields.items()
+                   if hasattr(validator, 'classes')}.get
+
+    def validate_mapping(data):
+        """Validate a dict."""
+        if not isinstance(data, dict):
+            raise _Reject
+        out = data.__class__()
+        for key, value in data.items():
+            classes = get_classes(key)
+            if classes is not None:
+                if not isinstance(value, classes):
+                    raise _Reject
+                out[key] = value
+                continue
+            validator = get_field(key)
+            if validator is not None:
+                out[key] = validator(value)
+            elif allow_extra:
+                out[key] = value
+            elif not remove_extra:
+                raise _Reject
+        for key, default, validator in defaults:
+            if key not in data:
+                out[key] = validator(default())
+        for key in required_keys:
+            if key not in data:
+                raise _Reject
+        return out
+
+    return validate_mapping
+
+
+def _compile_sequence(schema, parent):
+    """Compile a list schema."""
+    if not schema:
+        def validate_empty(data):
+            """Validate an empty list."""
+            if not isinstance(data, list) or data:
+                raise _Reject
+            return data
+        return validate_empty
+
+    validator = _compile_any([_compile(item, parent) for item in schema],
+                             schema)
+
+    def validate_sequence(data):
+        """Validate a list."""
+        if not isinstance(data, list):
+            raise _Reject
+        out = [validator(value) for value in data]
+        # Like voluptuous, return list subclasses with their own type
+        if type(data) is list:  # pylint: disable=unidiomatic-typecheck
+            return out
+        return type(data)(out)
+
+    return validate_sequence
+
+
+def _compile_any(validators, nodes):
+    """Compile alternatives, returning the first valid result."""
+    if len(validators) == 1:
+        return validators[0]
+
+    # Alternatives only checking types return the value unchanged
+    if all(inspect.isclass(node) or node is None for node in nodes):
+        return _compile_instance(tuple(
+            type(None) if node is None else node for node in nodes))
+
+    # Exact class only, as in _compile
+    # pylint: disable=unidiomatic-typecheck
+    if len(nodes) == 2 and nodes[1] is None and \
+            type(nodes[0]) is vol.Coerce and not nodes[0].msg:
+        coerce = nodes[0].type
+
+        def validate_optional_coerce(value):
+            """Coerce a value that may be None."""
+            try:
+                return coerce(value)
+            except (ValueError, TypeError, InvalidOperation):
+                if value is None:
+                    return None
+                raise _Reject
+
+        return validate_optional_coerce
+
+    def validate_any(value):
+        """Validate the value with the first matching alternative."""
+        for validator in validators:
+            try:
+                return validator(value)
+            except _Reject:
+                pass
+        raise _Reject
+
+    return validate_any
+
+
+def _compile_all(validators):
+    """Compile validators applied in turn."""
+    def validate_all(value):
+        """Validate the value with every validator."""
+        for validator in validators:
+            value = validator(value)
+        return value
+    return validate_all
+
+
+def _compile_coerce(coerce):
+    """Compile a type coercion."""
+    def validate_coerce(value):
+        """Coerce the value."""
+        try:
+            return coerce(value)
+        except (ValueError, TypeError, InvalidOperation):
+            raise _Reject
+    return validate_coerce
+
+
+def _compile_instance(classes):
+    """Compile a type check."""
+    def validate_instance(value):
+        """Check the type of the value."""
+        if isinstance(value, classes):
+            return value
+        raise _Reject
+    # Let mappings check the type without calling the validator
+    validate_instance.classes = classes
+    return validate_instance
+
+
+def _compile_literal(literal):
+    """Compile a comparison with a literal value."""
+    def validate_literal(value):
+        """Compare the value with the literal."""
+        if value != literal:
+            raise _Reject
+        return value
+    return validate_literal
+
+
+def _compile_callable(func):
+    """Compile a validator function."""
+    def validate_callable(value):
+        """Run the validator function."""
+        try:
+            return func(value)
+        except (ValueError, vol.Invalid):
+            raise _Reject
+    return validate_callable
@@ -3,11 +3,12 @@
 EVENT_WS_ERROR = 'error'
 EVENT_WS_CLOSED = 'closed'
 
-AUTH_URL = 'https://accounts.automatic.com/oauth/access_token'
+ACCOUNTS_URL = 'https://accounts.automatic.com'
+AUTH_URL = '{}/oauth/access_token'.format(ACCOUNTS_URL)
 BASE_API_URL = 'https://api.automatic.com'
 DEVICES_URL = '{}/device'.format(BASE_API_URL)
 DEVICE_URL = '{}/device/{{}}'.format(BASE_API_URL)
-OAUTH_URL = 'https://accounts.automatic.com/oauth/authorize?{}'
+OAUTH_URL = '{}/oauth/authorize?{{}}'.format(ACCOUNTS_URL)
 TRIP_URL = '{}/trip/{{}}'.format(BASE_API_URL)
 TRIPS_URL = '{}/trip'.format(BASE_API_URL)
 USER_URL = '{}/user/{{}}'.format(BASE_API_URL)
@@ -17,3 +18,15 @@ VEHICLES_URL = '{}/vehicle'.format(BASE_API_URL)
 VEHICLE_URL = '{}/vehicle/{{}}'.format(BASE_API_URL)
 WEBSOCKET_SESSION_URL = 'https://stream.automatic.com/socket.io/?{}'
 WEBSOCKET_URL = 'wss://stream.automatic.com/socket.io/?{}'
+
+# Hosts with connections opened ahead of time by Client.prewarm
+PREWARM_URLS = (BASE_API_URL, ACCOUNTS_URL)
+
+# Defaults for the connection pool of sessions created by Client
+DEFAULT_CONNECTOR_KWARGS = {
+    'limit': 100,
+    'limit_per_host': 20,
+    'keepalive_timeout': 30,
+    'use_dns_cache': True,
+    'ttl_dns_cache': 300,
+}
@@ -4,6 +4,7 @@ import logging
 
 from aioautomatic import base
 from aioautomatic import const
+from aioautomatic import polyline
 from aioautomatic import validation
 
 _LOGGER = logging.getLogger(__name__)
@@ -29,37 +30,70 @@ class VehicleDTCS(base.BaseDataObject):
     validator = validation.VEHICLE_DTCS
 
 
+class RealtimeDevice(base.BaseDataObject):
+    """Object to save the device id."""
+    validator = validation.REALTIME_DEVICE
+
+
+class RealtimeLocation(base.BaseDataObject):
+    """Location object representing GPS coordinates."""
+    validator = validation.REALTIME_LOCATION
+
+
 class Vehicle(base.BaseDataObject):
     """Vehicle object to manage access to a vehicle information."""
     validator = validation.VEHICLE
-
-    def __init__(self, data):
-        """Create the data object."""
-        super().__init__(data)
-        self.active_dtcs = [
-            VehicleDTCS(v) for v in self._data.get('active_dtcs') or []]
-        if self._data.get('latest_location') is not None:
-            self.latest_location = RealtimeLocation(
-                self._data.get('latest_location'))
+    children = {
+        'active_dtcs': [VehicleDTCS],
+        'latest_location': RealtimeLocation,
+    }
 
 
 class Trip(base.BaseDataObject):
     """Trip object to manage access to a trip information."""
+    __slots__ = ('_path_coordinates',)
 
     validator = validation.TRIP
-
-    def __init__(self, data):
-        """Create the data object."""
-        super().__init__(data)
-        self.start_location = Location(self._data.get('start_location'))
-        self.end_location = Location(self._data.get('end_location'))
-        if self._data.get('start_address') is not None:
-            self.start_address = Address(self._data.get('start_address'))
-        if self._data.get('end_address') is not None:
-            self.end_address = Address(self._data.get('end_address'))
-        self.vehicle_events = [
-            VehicleEvent(ev) for ev in self._data.get('vehicle_events')]
-        self.tags = self._data.get('tags') or []
+    children = {
+        'start_location': Location,
+        'end_location': Location,
+        'start_address': Address,
+        'end_address': Address,
+        'vehicle_events': [VehicleEvent],
+        'tags': lambda tags: tags or [],
+    }
+
+    @property
+    def path_coordinates(self):
+        """Return the decoded path as an array of (lat, lon) rows.
+
+        The path is decoded on first access and cached. None is returned
+        for trips without a path.
+        """
+        try:
+            return self._path_coordinates
+        except AttributeError:
+            Trip.decode_paths([self])
+            return self._path_coordinates
+
+    @staticmethod
+    def decode_paths(trips):
+        """Decode and cache the paths of several trips in a single pass.
+
+        :param trips: Iterable of Trip objects
+        :returns: List of decoded paths, as returned by path_coordinates
+        """
+        trips = list(trips)
+        pending = [trip for trip in trips
+                   if not hasattr(trip, '_path_coordinates')]
+        with_path = [trip for trip in pending if trip.path]
+        decoded = polyline.decode_many([trip.path for trip in with_path])
+        for trip in pending:
+            trip._path_coordinates = None  # pylint: disable=W0212
+        for trip, coords in zip(with_path, decoded):
+            coords.flags.writeable = False
+            trip._path_coordinates = coords  # pylint: disable=W0212
+        return [trip.path_coordinates for trip in trips]
 
 
 class Device(base.BaseDataObject):
@@ -76,14 +110,14 @@ class User(base.BaseApiDataObject):
         """Fetch profile information for this user."""
         _LOGGER.info("Fetching user profile.")
         resp = yield from self._get(const.USER_PROFILE_URL.format(self.id))
-        return UserProfile(resp)
+        return UserProfile(resp, self._lazy_validation)
 
     @asyncio.coroutine
     def get_metadata(self):
         """Fetch metadata information for this user."""
         _LOGGER.info("Fetching user metadata.")
         resp = yield from self._get(const.USER_METADATA_URL.format(self.id))
-        return UserMetadata(resp)
+        return UserMetadata(resp, self._lazy_validation)
 
 
 class UserProfile(base.BaseDataObject):
@@ -96,49 +130,38 @@ class UserMetadata(base.BaseDataObject):
     validator = validation.USER_METADATA
 
 
-class RealtimeDevice(base.BaseDataObject):
-    """Object to save the device id."""
-    validator = validation.REALTIME_DEVICE
-
-
-class RealtimeLocation(base.BaseDataObject):
-    """Location object representing GPS coordinates."""
-    validator = validation.REALTIME_LOCATION
-
-
 class BaseRealtimeEvent(base.BaseApiDataObject):
     """Realtime event object"""
     validator = validation.REALTIME_BASE
-
-    def __init__(self, client, data):
-        """Create the data object."""
-        super().__init__(client, data)
-        self.user = User(client, self._data.get('user'))
-        self.vehicle = Vehicle(self._data.get('vehicle'))
-        self.device = RealtimeDevice(self._data.get('device'))
-        if self._data.get('location') is not None:
-            self.location = RealtimeLocation(self._data.get('location'))
+    children = {
+        'user': User,
+        'vehicle': Vehicle,
+        'device': RealtimeDevice,
+        'location': RealtimeLocation,
+    }
+    # RealtimeDevice only keeps the id of the validated DEVICE
+    kept_fields = ('device',)
 
     @asyncio.coroutine
     def get_user(self):
         """Fetch user object for this trip."""
         _LOGGER.info("Fetching user.")
         resp = yield from self._get(const.USER_URL.format(self.user.id))
-        return User(self._parent, resp)
+        return User(self._parent, resp, self._lazy_validation)
 
     @asyncio.coroutine
     def get_vehicle(self):
         """Fetch vehicle object for this trip."""
         _LOGGER.info("Fetching vehicle.")
         resp = yield from self._get(const.VEHICLE_URL.format(self.vehicle.id))
-        return Vehicle(resp)
+        return Vehicle(resp, self._lazy_validation)
 
     @asyncio.coroutine
     def get_device(self):
         """Fetch device object for this trip."""
         _LOGGER.info("Fetching device.")
         resp = yield from self._get(const.DEVICE_URL.format(self.device.id))
-        return Device(resp)
+        return Device(resp, self._lazy_validation)
 
 
 class RealtimeTripFinished(BaseRealtimeEvent):
@@ -167,12 +190,7 @@ class RealtimeHardBrake(BaseRealtimeEvent):
 class RealtimeMILOn(BaseRealtimeEvent):
     """Realtime MIL on event object"""
     validator = validation.REALTIME_MIL_ON
-
-    def __init__(self, client, data):
-        """Create the data object."""
-        super().__init__(client, data)
-        self.dtcs = [
-            VehicleDTCS(v) for v in self._data.get('dtcs') or []]
+    children = dict(BaseRealtimeEvent.children, dtcs=[VehicleDTCS])
 
 
 class RealtimeMILOff(BaseRealtimeEvent):
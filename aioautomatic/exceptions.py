@@ -66,6 +66,13 @@ class UnprocessableDataError(HttpStatusError):
     """There is an issue processing the request body."""
 
 
+class RateLimitedError(HttpStatusError):
+    """Too many requests were sent to the Automatic server."""
+
+    # Seconds requested by the Retry-After header, if sent
+    retry_after = None
+
+
 class InternalError(HttpStatusError):
     """An internal error occurred at the Automatic server."""
 
@@ -78,6 +85,7 @@ HTTP_EXCEPTIONS = {
     404: PageNotFoundError,
     409: ConflictError,
     422: UnprocessableDataError,
+    429: RateLimitedError,
     500: InternalError,
 }
 
@@ -0,0 +1,219 @@
+"""Columnar trip containers for aioautomatic."""
+from aioautomatic import validation
+from aioautomatic._arrays import lat_lon, np, require_numpy, utc_naive
+
+# Numeric trip fields stored as float64 columns, NaN when missing
+NUMERIC_FIELDS = (
+    'distance_m',
+    'duration_s',
+    'fuel_cost_usd',
+    'fuel_volume_l',
+    'average_kmpl',
+    'average_from_epa_kmpl',
+    'score_events',
+    'score_speeding',
+    'hard_brakes',
+    'hard_accels',
+    'duration_over_70_s',
+    'duration_over_75_s',
+    'duration_over_80_s',
+    'city_fraction',
+    'highway_fraction',
+    'night_driving_fraction',
+    'idling_time_s',
+)
+
+# Trip times stored as datetime64 columns in UTC, NaT when missing
+DATETIME_FIELDS = (
+    'started_at',
+    'ended_at',
+)
+
+# Trip locations stored as float64 (lat, lon) columns, NaN when missing
+LOCATION_FIELDS = (
+    'start_location',
+    'end_location',
+)
+
+AGGREGATES = ('count', 'sum', 'mean', 'min', 'max')
+
+
+def _trip_value(trip, name):
+    """Return a validated field of a Trip object or raw trip dict."""
+    if not isinstance(trip, dict):
+        return getattr(trip, name, None)
+    if name not in trip:
+        return None
+    validator = validation.schema_fields(validation.TRIP)[name][0]
+    return validation.validate(validator, trip[name])
+
+
+class TripFrame():
+    """Trips stored as one array per field instead of one object per trip.
+
+    Numeric fields are float64 columns holding NaN for missing values,
+    start and end times are datetime64 columns in UTC and start and end
+    locations are float64 arrays of (lat, lon) rows. Trips are grouped
+    by vehicle through ``vehicle_codes``, the index of each trip's vehicle
+    in ``vehicles``.
+    """
+
+    def __init__(self, ids, vehicles, vehicle_codes, columns):
+        """Create a trip frame from its arrays.
+
+        :param ids: Object array of trip ids
+        :param vehicles: List of vehicle ids, in order of first appearance
+        :param vehicle_codes: Int array of vehicle indexes for each trip
+        :param columns: Dict of arrays by field name
+        """
+        require_numpy('TripFrame')
+        self.ids = ids
+        self.vehicles = vehicles
+        self.vehicle_codes = vehicle_codes
+        self.columns = columns
+
+    @classmethod
+    def from_trips(cls, trips):
+        """Create a trip frame from data.Trip objects or raw trip dicts.
+
+        Raw trip dicts only have the stored fields validated, so no Trip
+        object is built for them.
+
+        :param trips: Iterable of trips, such as a ResultList
+        """
+        require_numpy('TripFrame')
+        ids = []
+        vehicle_index = {}
+        vehicle_codes = []
+        values = {name: [] for name in
+                  NUMERIC_FIELDS + DATETIME_FIELDS + LOCATION_FIELDS}
+        for trip in trips:
+            ids.append(_trip_value(trip, 'id'))
+            vehicle = _trip_value(trip, 'vehicle')
+            vehicle_codes.append(
+                vehicle_index.setdefault(vehicle, len(vehicle_index)))
+            for name, column in values.items():
+                column.append(_trip_value(trip, name))
+
+        columns = {}
+        for name in NUMERIC_FIELDS:
+            columns[name] = np.array(
+                [np.nan if value is None else value
+                 for value in values[name]], dtype=np.float64)
+        for name in DATETIME_FIELDS:
+            columns[name] = np.array(
+                [utc_naive(value) for value in values[name]],
+                dtype='datetime64[us]')
+        for name in LOCATION_FIELDS:
+            columns[name] = np.array(
+                [lat_lon(value) for value in values[name]],
+                dtype=np.float64).reshape(-1, 2)
+        return cls(np.array(ids, dtype=object), list(vehicle_index),
+                   np.array(vehicle_codes, dtype=np.intp), columns)
+
+    @classmethod
+    def from_pages(cls, pages):
+        """Create a trip frame from list response pages.
+
+        :param pages: Iterable of raw list responses or ResultList pages
+        """
+        return cls.from_trips(
+            trip for page in pages
+            for trip in (page['results'] if isinstance(page, dict)
+                         else page))
+
+    def __len__(self):
+        """Return the number of trips."""
+        return len(self.ids)
+
+    def __getitem__(self, name):
+        """Return the column of a field."""
+        return self.columns[name]
+
+    @property
+    def nbytes(self):
+        """Memory used by the arrays of this frame, in bytes."""
+        return (self.ids.nbytes + self.vehicle_codes.nbytes +
+                sum(column.nbytes for column in self.columns.values()))
+
+    def filter(self, mask):
+        """Return a frame holding the trips selected by a boolean mask."""
+        mask = np.asarray(mask, dtype=bool)
+        return TripFrame(
+            self.ids[mask], self.vehicles, self.vehicle_codes[mask],
+            {name: column[mask] for name, column in self.columns.items()})
+
+    def between(self, start=None, end=None):
+        """Return the trips started within a time range.
+
+        :param start: Minimum start datetime, inclusive
+        :param end: Maximum start datetime, exclusive
+        """
+        started_at = self.columns['started_at']
+        mask = ~np.isnat(started_at)
+        if start is not None:
+            mask &= started_at >= np.datetime64(utc_naive(start), 'us')
+        if end is not None:
+            mask &= started_at < np.datetime64(utc_naive(end), 'us')
+        return self.filter(mask)
+
+    def aggregate(self, name, how='sum'):
+        """Aggregate a numeric column per vehicle.
+
+        Missing values are ignored. Vehicles without any value get 0 for
+        count and sum, and NaN otherwise.
+
+        :param name: Numeric field name
+        :param how: One of 'count', 'sum', 'mean', 'min' or 'max'
+        :returns: Array of results, aligned with ``vehicles``
+        """
+        if how not in AGGREGATES:
+            raise ValueError('Unknown aggregate {}'.format(how))
+        column = self.columns[name]
+        groups = len(self.vehicles)
+        present = ~np.isnan(column)
+        codes = self.vehicle_codes[present]
+        values = column[present]
+
+        counts = np.bincount(codes, minlength=groups).astype(np.float64)
+        if how == 'count':
+            return counts
+        if how in ('sum', 'mean'):
+            sums = np.bincount(codes, weights=values, minlength=groups)
+            if how == 'sum':
+                return sums
+            with np.errstate(invalid='ignore', divide='ignore'):
+                return sums / counts
+
+        result = np.full(groups, np.nan)
+        if len(values):
+            # Reduce each run of equal codes after sorting by vehicle
+            order = np.argsort(codes, kind='mergesort')
+            codes = codes[order]
+            starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+            reduce = np.minimum if how == 'min' else np.maximum
+            result[codes[starts]] = reduce.reduceat(values[order], starts)
+        return result
+
+    def summary(self, names=('distance_m', 'duration_s'), how='sum'):
+        """Return aggregates of several columns by vehicle id.
+
+        :param names: Numeric field names
+        :param how: Aggregate applied to every column
+        :returns: Dict of {vehicle id: {field name: value}}
+        """
+        results = {name: self.aggregate(name, how) for name in names}
+        return {vehicle: {name: float(results[name][index])
+                          for name in names}
+                for index, vehicle in enumerate(self.vehicles)}
+
+    def rank(self, name, how='mean', descending=True):
+        """Return vehicle ids ordered by an aggregate of a column.
+
+        Vehicles without any value are left out.
+        """
+        results = self.aggregate(name, how)
+        order = np.argsort(np.negative(results) if descending else results,
+                           kind='mergesort')
+        return [self.vehicles[index] for index in order
+                if not np.isnan(results[index])]
@@ -0,0 +1,145 @@
+"""Distance and bearing helpers for aioautomatic locations."""
+from aioautomatic import data
+from aioautomatic._arrays import lat_lon, np, require_numpy
+
+# Mean earth radius, in metres
+EARTH_RADIUS_M = 6371008.8
+
+
+def coordinates(points):
+    """Return the coordinates of locations or vehicle events as an array.
+
+    Missing points or coordinates are NaN.
+
+    :param points: Iterable of data.Location, data.RealtimeLocation or
+                   data.VehicleEvent objects, dicts with lat and lon keys or
+                   (lat, lon) pairs
+    :returns: float64 array of (lat, lon) rows
+    """
+    require_numpy('aioautomatic.geometry')
+    if isinstance(points, np.ndarray):
+        return points.astype(np.float64, copy=False).reshape(-1, 2)
+    return np.array([lat_lon(point) for point in points],
+                    dtype=np.float64).reshape(-1, 2)
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """Return the great circle distance between points, in metres.
+
+    Arguments are in degrees and broadcast against each other.
+    """
+    require_numpy('aioautomatic.geometry')
+    lat1, lon1, lat2, lon2 = (np.radians(value)
+                              for value in (lat1, lon1, lat2, lon2))
+    sin_lat = np.sin((lat2 - lat1) / 2)
+    sin_lon = np.sin((lon2 - lon1) / 2)
+    value = sin_lat * sin_lat + np.cos(lat1) * np.cos(lat2) * sin_lon * sin_lon
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(value, 1)))
+
+
+def bearing(lat1, lon1, lat2, lon2):
+    """Return the initial bearing from the first points to the second.
+
+    Arguments are in degrees and broadcast against each other.
+
+    :returns: Bearings in degrees clockwise from north, from 0 to 360
+    """
+    require_numpy('aioautomatic.geometry')
+    lat1, lon1, lat2, lon2 = (np.radians(value)
+                              for value in (lat1, lon1, lat2, lon2))
+    delta = lon2 - lon1
+    x = np.sin(delta) * np.cos(lat2)
+    y = np.cos(lat1) * np.sin(lat2) - \
+        np.sin(lat1) * np.cos(lat2) * np.cos(delta)
+    return np.degrees(np.arctan2(x, y)) % 360
+
+
+def pairwise_distances(points, others=None):
+    """Return the distance between every pair of points, in metres.
+
+    :param points: Points accepted by coordinates()
+    :param others: Points accepted by coordinates(), defaults to points
+    :returns: Array of shape (len(points), len(others))
+    """
+    points = coordinates(points)
+    others = points if others is None else coordinates(others)
+    return haversine(points[:, 0, None], points[:, 1, None],
+                     others[None, :, 0], others[None, :, 1])
+
+
+def sequential_distances(points):
+    """Return the distance between consecutive points, in metres.
+
+    :param points: Points accepted by coordinates(), such as a decoded path
+    :returns: Array of len(points) - 1 distances
+    """
+    points = coordinates(points)
+    return haversine(points[:-1, 0], points[:-1, 1],
+                     points[1:, 0], points[1:, 1])
+
+
+def sequential_bearings(points):
+    """Return the bearing between consecutive points, in degrees.
+
+    :param points: Points accepted by coordinates(), such as a decoded path
+    :returns: Array of len(points) - 1 bearings
+    """
+    points = coordinates(points)
+    return bearing(points[:-1, 0], points[:-1, 1],
+                   points[1:, 0], points[1:, 1])
+
+
+def trip_endpoints(trips):
+    """Return the start and end locations of trips.
+
+    :param trips: List of data.Trip objects or a frame.TripFrame
+    :returns: Tuple of float64 arrays of (lat, lon) rows, for the start and
+              end locations
+    """
+    require_numpy('aioautomatic.geometry')
+    if hasattr(trips, 'columns'):
+        return trips['start_location'], trips['end_location']
+    trips = list(trips)
+    return (coordinates(trip.start_location for trip in trips),
+            coordinates(trip.end_location for trip in trips))
+
+
+def distances_to(trips, lat, lon):
+    """Return the distance from the trip start and end locations to a point.
+
+    :param trips: List of data.Trip objects or a frame.TripFrame
+    :param lat: Latitude of the point, in degrees
+    :param lon: Longitude of the point, in degrees
+    :returns: Tuple of arrays of distances in metres, from the start and
+              end locations
+    """
+    starts, ends = trip_endpoints(trips)
+    return (haversine(starts[:, 0], starts[:, 1], lat, lon),
+            haversine(ends[:, 0], ends[:, 1], lat, lon))
+
+
+def path_lengths(trips):
+    """Return the length of the decoded path of trips, in metres.
+
+    The distances of all the paths are computed in a single pass, which
+    allows checking the reported distance_m of trips against their GPS
+    path.
+
+    :param trips: Iterable of data.Trip objects
+    :returns: Array of path lengths, NaN for trips without a path
+    """
+    require_numpy('aioautomatic.geometry')
+    paths = data.Trip.decode_paths(trips)
+    lengths = np.full(len(paths), np.nan)
+    decoded = [index for index, path in enumerate(paths) if path is not None]
+    if not decoded:
+        return lengths
+    points = np.concatenate([paths[index] for index in decoded])
+    steps = np.r_[0, sequential_distances(points)]
+    # Drop the steps between the end of a path and the start of the next,
+    # decoded paths always have at least one point
+    firsts = np.r_[0, np.cumsum([len(paths[index])
+                                 for index in decoded])[:-1]]
+    steps[firsts] = 0
+    lengths[decoded] = np.add.reduceat(steps, firsts)
+    return lengths
@@ -0,0 +1,126 @@
+"""Hedged GET requests for aioautomatic."""
+import asyncio
+import collections
+import logging
+import math
+import time
+
+from aioautomatic import const
+from aioautomatic.cache import url_pattern
+
+_LOGGER = logging.getLogger(__name__)
+
+# Url templates used to group latency samples of single object endpoints
+ENDPOINT_TEMPLATES = (
+    const.TRIP_URL,
+    const.VEHICLE_URL,
+    const.DEVICE_URL,
+    const.USER_URL,
+    const.USER_PROFILE_URL,
+    const.USER_METADATA_URL,
+)
+
+
+def _release(task):
+    """Release the response of a finished request that lost the race."""
+    if task.done() and not task.cancelled() and task.exception() is None:
+        task.result().release()
+
+
+class HedgePolicy():
+    """Send a second identical GET when the first one is slow to answer.
+
+    Latency is tracked per endpoint over the last ``window`` requests. Once
+    ``min_samples`` requests were measured, a request that has not answered
+    after the ``percentile`` latency of its endpoint is hedged with a second
+    request. The first successful response wins and the other request is
+    cancelled.
+    """
+
+    def __init__(self, percentile=95, window=100, min_samples=20,
+                 min_delay=0.01):
+        """Create a hedge policy.
+
+        :param percentile: Latency percentile after which to hedge
+        :param window: Number of recent latencies kept per endpoint
+        :param min_samples: Latencies required before hedging an endpoint
+        :param min_delay: Minimum seconds to wait before hedging
+        """
+        if not 0 < percentile <= 100:
+            raise ValueError('percentile must be in (0, 100]')
+        self._percentile = percentile
+        self._window = window
+        self._min_samples = min_samples
+        self._min_delay = min_delay
+        self._patterns = [(url_pattern(template), template)
+                          for template in ENDPOINT_TEMPLATES]
+        self._latencies = collections.defaultdict(
+            lambda: collections.deque(maxlen=self._window))
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def endpoint(self, url):
+        """Return the endpoint key used to group latencies of a url."""
+        url = url.split('?', 1)[0]
+        for pattern, template in self._patterns:
+            if pattern.match(url):
+                return template
+        return url
+
+    def record(self, endpoint, latency):
+        """Record the latency of a completed request."""
+        self._latencies[endpoint].append(latency)
+
+    def delay(self, endpoint):
+        """Return seconds to wait before hedging, or None to not hedge."""
+        samples = self._latencies.get(endpoint)
+        if samples is None or len(samples) < self._min_samples:
+            return None
+        ordered = sorted(samples)
+        index = math.ceil(self._percentile / 100 * len(ordered)) - 1
+        return max(ordered[index], self._min_delay)
+
+    @asyncio.coroutine
+    def call(self, url, request_factory, loop):
+        """Run a request, hedging it if it is slower than usual.
+
+        :param url: Url of the request
+        :param request_factory: Callable returning the request coroutine
+        :param loop: Event loop to run the requests in
+        """
+        endpoint = self.endpoint(url)
+        delay = self.delay(endpoint)
+        self.requests += 1
+        start = time.monotonic()
+        tasks = [loop.create_task(request_factory())]
+        winner = None
+        try:
+            done, _ = yield from asyncio.wait(tasks, timeout=delay)
+            if not done:
+                _LOGGER.debug('Hedging request to %s after %.3fs', url, delay)
+                self.hedges += 1
+                tasks.append(loop.create_task(request_factory()))
+
+            pending = set(tasks)
+            while True:
+                done, pending = yield from asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED)
+                winner = next((task for task in tasks if task in done and
+                               task.exception() is None), None)
+                if winner is not None:
+                    break
+                if not pending:
+                    # Every request failed, raise the last error
+                    return tasks[-1].result()
+
+            self.record(endpoint, time.monotonic() - start)
+            if winner is not tasks[0]:
+                self.hedge_wins += 1
+            return winner.result()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                elif task is not winner:
+                    _release(task)
@@ -0,0 +1,67 @@
+"""Decoding of encoded polyline trip paths for aioautomatic."""
+from aioautomatic._arrays import np, require_numpy
+
+# Trip paths use the Google encoded polyline format with 5 decimals
+PRECISION = 5
+
+
+def decode(path, precision=PRECISION):
+    """Decode an encoded polyline.
+
+    :param path: Encoded polyline string
+    :param precision: Number of decimals of the encoded coordinates
+    :returns: float64 array of (lat, lon) rows
+    """
+    return decode_many([path], precision)[0]
+
+
+def decode_many(paths, precision=PRECISION):
+    """Decode several encoded polylines at once.
+
+    Every path is decoded in a single pass over the concatenated encodings,
+    without a Python loop over points.
+
+    :param paths: Sequence of encoded polyline strings
+    :param precision: Number of decimals of the encoded coordinates
+    :returns: List of float64 arrays of (lat, lon) rows
+    """
+    require_numpy('aioautomatic.polyline')
+    paths = list(paths)
+    if not paths:
+        return []
+    try:
+        encoded = ''.join(paths).encode('ascii')
+    except UnicodeEncodeError as exc:
+        raise ValueError('Invalid polyline characters') from exc
+    chars = np.frombuffer(encoded, dtype=np.uint8).astype(np.int64) - 63
+    if np.any((chars < 0) | (chars > 63)):
+        raise ValueError('Invalid polyline characters')
+
+    # A value is made of 5 bit chunks, the last one has no continuation bit
+    is_last = (chars & 0x20) == 0
+    lengths = np.array([len(path) for path in paths], dtype=np.intp)
+    path_ends = np.cumsum(lengths)
+    if not np.all(is_last[path_ends[lengths > 0] - 1]):
+        raise ValueError('Truncated polyline')
+
+    ends = np.flatnonzero(is_last)
+    starts = np.r_[0, ends[:-1] + 1]
+    value_index = np.r_[0, np.cumsum(is_last)[:-1]]
+    shifts = 5 * (np.arange(len(chars)) - starts[value_index])
+    values = np.add.reduceat((chars & 0x1f) << shifts, starts) \
+        if len(chars) else np.zeros(0, dtype=np.int64)
+    deltas = np.where(values & 1, ~(values >> 1), values >> 1)
+
+    counts = np.diff(np.r_[0, np.searchsorted(ends, path_ends)])
+    if np.any(counts % 2):
+        raise ValueError('Polyline has an odd number of values')
+    points = counts // 2
+
+    # Restart the running sums of deltas at the first point of every path
+    coords = np.cumsum(deltas.reshape(-1, 2), axis=0)
+    firsts = np.r_[0, np.cumsum(points)[:-1]].astype(np.intp)
+    bases = np.zeros((len(paths), 2), dtype=np.int64)
+    later = firsts > 0
+    bases[later] = coords[firsts[later] - 1]
+    coords -= np.repeat(bases, points, axis=0)
+    return np.split(coords / 10 ** precision, np.cumsum(points)[:-1])
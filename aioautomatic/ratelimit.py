@@ -0,0 +1,101 @@
+"""Client side rate limiting for aioautomatic."""
+import asyncio
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import time
+
+
+def parse_retry_after(value):
+    """Return the delay in seconds requested by a Retry-After header.
+
+    The header may contain a number of seconds or an HTTP date. None is
+    returned if the header is missing or cannot be parsed.
+    """
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class RateLimiter():
+    """Token bucket limiting the rate of requests sent to Automatic.
+
+    Tokens are added at ``rate`` per second up to ``burst`` tokens, and
+    each request consumes one. When the server answers 429, the rate is
+    multiplied by ``backoff`` (but not below ``min_rate``) and requests
+    are paused for the Retry-After delay. Every successful request then
+    adds ``recovery`` requests per second back, up to the configured rate.
+    """
+
+    def __init__(self, rate, burst=None, min_rate=None, backoff=0.5,
+                 recovery=None):
+        """Create a rate limiter.
+
+        :param rate: Maximum requests per second
+        :param burst: Maximum number of requests sent at once
+        :param min_rate: Lowest rate reached after repeated 429 responses
+        :param backoff: Factor applied to the rate on a 429 response
+        :param recovery: Rate increase per successful request
+        """
+        if rate <= 0:
+            raise ValueError('rate must be positive')
+        self._max_rate = rate
+        self._rate = rate
+        self._burst = max(burst or rate, 1)
+        self._min_rate = min_rate or rate / 10
+        self._backoff = backoff
+        self._recovery = recovery or rate / 100
+        self._tokens = self._burst
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+
+    def _refill(self, now):
+        """Add the tokens accumulated since the last update."""
+        self._tokens = min(
+            self._tokens + (now - self._updated) * self._rate, self._burst)
+        self._updated = now
+
+    @asyncio.coroutine
+    def acquire(self):
+        """Wait until a request may be sent.
+
+        The token is reserved immediately, so concurrent callers are
+        released in the order they called.
+        """
+        now = time.monotonic()
+        self._refill(now)
+        self._tokens -= 1
+        delay = max(-self._tokens / self._rate, self._blocked_until - now)
+        while delay > 0:
+            yield from asyncio.sleep(delay)
+            # Honour any Retry-After delay received while waiting
+            delay = self._blocked_until - time.monotonic()
+
+    def throttled(self, retry_after=None):
+        """Slow down after the server rejected a request with 429."""
+        now = time.monotonic()
+        self._refill(now)
+        self._rate = max(self._rate * self._backoff, self._min_rate)
+        self._tokens = min(self._tokens, 0)
+        if retry_after is not None:
+            self._blocked_until = max(self._blocked_until, now + retry_after)
+
+    def succeeded(self):
+        """Speed back up after a request was accepted."""
+        if self._rate < self._max_rate:
+            self._refill(time.monotonic())
+            self._rate = min(self._rate + self._recovery, self._max_rate)
+
+    @property
+    def rate(self):
+        """Current requests per second."""
+        return self._rate
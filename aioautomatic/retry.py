@@ -0,0 +1,120 @@
+"""Request retry policy for aioautomatic."""
+import asyncio
+import logging
+import random
+import time
+
+import aiohttp
+
+from aioautomatic import const
+from aioautomatic import exceptions
+
+_LOGGER = logging.getLogger(__name__)
+
+IDEMPOTENT_METHODS = (aiohttp.hdrs.METH_GET, aiohttp.hdrs.METH_HEAD)
+
+
+def _not_processed(exc):
+    """Return True if the error proves the server did not act on a request.
+
+    A rejected rate limited request or a connection that could not be
+    opened never reached the token endpoint, so it is safe to send again
+    even though the request is not idempotent.
+    """
+    if isinstance(exc, exceptions.RateLimitedError):
+        return True
+    return isinstance(exc, exceptions.TransportError) and isinstance(
+        exc.__cause__, aiohttp.client_exceptions.ClientConnectorError)
+
+
+class RetryPolicy():
+    """Retry transient request failures with jittered exponential backoff.
+
+    Only idempotent requests are retried, plus token requests when the
+    error shows the request was never processed. The delay before retry
+    ``n`` is drawn uniformly between zero and ``base_delay * 2 ** n``,
+    capped at ``max_delay``, and at least the Retry-After delay of a rate
+    limited request. No retry is started that would end after ``deadline``
+    seconds from the first attempt.
+    """
+
+    def __init__(self, max_attempts=4, base_delay=0.5, max_delay=30.0,
+                 deadline=None, retry_token_requests=True,
+                 retry_on=(exceptions.TransportError,
+                           exceptions.RateLimitedError,
+                           exceptions.InternalError)):
+        """Create a retry policy.
+
+        :param max_attempts: Maximum attempts for a single call
+        :param base_delay: Backoff delay in seconds before the first retry
+        :param max_delay: Maximum backoff delay in seconds
+        :param deadline: Maximum seconds a call may spend retrying
+        :param retry_token_requests: Retry unprocessed token POSTs
+        :param retry_on: Exception classes considered transient
+        """
+        if max_attempts < 1:
+            raise ValueError('max_attempts must be at least 1')
+        self._max_attempts = max_attempts
+        self._base_delay = base_delay
+        self._max_delay = max_delay
+        self._deadline = deadline
+        self._retry_token_requests = retry_token_requests
+        self._retry_on = retry_on
+        self.attempts = 0
+        self.retries = 0
+        self.failures = 0
+
+    def is_retryable(self, method, url, exc):
+        """Return True if the failed request may be sent again."""
+        if not isinstance(exc, self._retry_on):
+            return False
+        if method in IDEMPOTENT_METHODS:
+            return True
+        return (self._retry_token_requests and
+                method == aiohttp.hdrs.METH_POST and
+                url == const.AUTH_URL and _not_processed(exc))
+
+    def backoff(self, attempt):
+        """Return the jittered delay before retrying the given attempt."""
+        return random.uniform(0, min(
+            self._max_delay, self._base_delay * 2 ** (attempt - 1)))
+
+    @asyncio.coroutine
+    def call(self, method, url, request_factory):
+        """Run a request, retrying it according to this policy.
+
+        :param method: HTTP method of the request
+        :param url: Url of the request
+        :param request_factory: Callable returning the request coroutine
+        """
+        start = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+            self.attempts += 1
+            try:
+                return (yield from request_factory())
+            except exceptions.AutomaticError as exc:
+                delay = self._retry_delay(method, url, exc, attempt, start)
+                if delay is None:
+                    self.failures += 1
+                    raise
+                self.retries += 1
+                _LOGGER.warning('%s %s failed on attempt %s (%s), '
+                                'retrying in %.2fs', method, url, attempt,
+                                exc.__class__.__name__, delay)
+            yield from asyncio.sleep(delay)
+
+    def _retry_delay(self, method, url, exc, attempt, start):
+        """Return the delay before the next attempt, or None to give up."""
+        if attempt >= self._max_attempts or \
+                not self.is_retryable(method, url, exc):
+            return None
+        delay = self.backoff(attempt)
+        retry_after = getattr(exc, 'retry_after', None)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        if self._deadline is not None and \
+                time.monotonic() + delay - start > self._deadline:
+            return None
+        return delay
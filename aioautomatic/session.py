@@ -1,27 +1,25 @@
 """Session interface for aioautomatic."""
 
 import asyncio
+import collections
 import logging
 
 from aioautomatic import base
 from aioautomatic import const
 from aioautomatic import data
+from aioautomatic import sync
 from aioautomatic import validation
+from aioautomatic.base import gen_query_string
 
 _LOGGER = logging.getLogger(__name__)
 
 
-def gen_query_string(params):
-    """Generate a query string from the parameter dict."""
-    return '&'.join('{}={}'.format(k, v) for k, v in params.items())
-
-
 class Session(base.BaseApiObject):
     """Session object to manage access to a users information."""
 
-    def __init__(self, client, **kwargs):
+    def __init__(self, client, rate_limiter=None, **kwargs):
         """Create a session object."""
-        super().__init__(client)
+        super().__init__(client, rate_limiter=rate_limiter)
         self._client = client
         self._renew_handle = None
         self._load_token_data(**kwargs)
@@ -67,10 +65,10 @@ class Session(base.BaseApiObject):
         """
         _LOGGER.info("Fetching vehicle.")
         resp = yield from self._get(const.VEHICLE_URL.format(vehicle_id))
-        return data.Vehicle(resp)
+        return data.Vehicle(resp, self._lazy_validation)
 
     @asyncio.coroutine
-    def get_vehicles(self, **kwargs):
+    def get_vehicles(self, concurrency=None, **kwargs):
         """Get all vehicles associated with this user account.
 
         :param created_at__lte: Maximum start time filter
@@ -80,13 +78,40 @@ class Session(base.BaseApiObject):
         :param vin: Vin filter
         :param page: Page number of paginated result to return
         :param limit: Number of results per page
+        :param concurrency: Fetch every page from the requested page onward,
+                            with at most this many requests in flight
         """
-        query = gen_query_string(validation.VEHICLES_REQUEST(kwargs))
+        params = validation.VEHICLES_REQUEST(kwargs)
 
         _LOGGER.info("Fetching vehicles.")
-        resp = yield from self._get('?'.join((const.VEHICLES_URL, query)))
+        if concurrency is None:
+            resp = yield from self._get(
+                '?'.join((const.VEHICLES_URL, gen_query_string(params))))
+        else:
+            resp = yield from self._get_all_pages(
+                const.VEHICLES_URL, params, concurrency)
         return base.ResultList(self, resp, data.Vehicle)
 
+    def iter_vehicles(self, prefetch=2, stream=False, **kwargs):
+        """Iterate over all vehicles associated with this user account.
+
+        Returns an asynchronous iterator that yields vehicles from every
+        page, fetching upcoming pages in the background. In stream mode,
+        pages are instead parsed while they are received, so memory use does
+        not grow with the page size.
+
+        :param prefetch: Maximum number of pages fetched ahead
+        :param stream: Parse each page incrementally
+        :param kwargs: Filters accepted by get_vehicles
+        """
+        query = gen_query_string(validation.VEHICLES_REQUEST(kwargs))
+
+        _LOGGER.info("Iterating vehicles.")
+        url = '?'.join((const.VEHICLES_URL, query))
+        if stream:
+            return base.ResultStream(self, url, data.Vehicle)
+        return base.ResultIterator(self, url, data.Vehicle, prefetch)
+
     @asyncio.coroutine
     def get_trip(self, trip_id):
         """Get a single trip associated with this user account.
@@ -95,10 +120,10 @@ class Session(base.BaseApiObject):
         """
         _LOGGER.info("Fetching trip.")
         resp = yield from self._get(const.TRIP_URL.format(trip_id))
-        return data.Trip(resp)
+        return data.Trip(resp, self._lazy_validation)
 
     @asyncio.coroutine
-    def get_trips(self, **kwargs):
+    def get_trips(self, concurrency=None, **kwargs):
         """Get all vehicles associated with this user account.
 
         :param started_at__lte: Maximum start time filter
@@ -109,13 +134,86 @@ class Session(base.BaseApiObject):
         :param tags__in: Tags Filter
         :param page: Page number of paginated result to return
         :param limit: Number of results per page
+        :param concurrency: Fetch every page from the requested page onward,
+                            with at most this many requests in flight
         """
-        query = gen_query_string(validation.TRIPS_REQUEST(kwargs))
+        params = validation.TRIPS_REQUEST(kwargs)
 
         _LOGGER.info("Fetching trips.")
-        resp = yield from self._get('?'.join((const.TRIPS_URL, query)))
+        if concurrency is None:
+            resp = yield from self._get(
+                '?'.join((const.TRIPS_URL, gen_query_string(params))))
+        else:
+            resp = yield from self._get_all_pages(
+                const.TRIPS_URL, params, concurrency)
         return base.ResultList(self, resp, data.Trip)
 
+    def iter_trips(self, prefetch=2, stream=False, **kwargs):
+        """Iterate over all trips associated with this user account.
+
+        Returns an asynchronous iterator that yields trips from every
+        page, fetching upcoming pages in the background. In stream mode,
+        pages are instead parsed while they are received, so memory use does
+        not grow with the page size.
+
+        :param prefetch: Maximum number of pages fetched ahead
+        :param stream: Parse each page incrementally
+        :param kwargs: Filters accepted by get_trips
+        """
+        query = gen_query_string(validation.TRIPS_REQUEST(kwargs))
+
+        _LOGGER.info("Iterating trips.")
+        url = '?'.join((const.TRIPS_URL, query))
+        if stream:
+            return base.ResultStream(self, url, data.Trip)
+        return base.ResultIterator(self, url, data.Trip, prefetch)
+
+    def export_trips(self, started_at__gte, started_at__lte, concurrency=4,
+                     window=None, trips_per_window=1000, **kwargs):
+        """Iterate over all trips started within a time range.
+
+        Returns an asynchronous iterator that yields trips in chronological
+        order. The range is split into time windows which are fetched
+        concurrently. Unless a window length is given, it is sized from the
+        trip density of the whole range.
+
+        :param started_at__gte: Minimum start time of the range
+        :param started_at__lte: Maximum start time of the range
+        :param concurrency: Maximum number of windows fetched at once
+        :param window: timedelta length of each window
+        :param trips_per_window: Trips targeted per window when sizing
+                                 windows from the trip density
+        :param kwargs: Other filters accepted by get_trips
+        """
+        kwargs.pop('page', None)
+        params = validation.TRIPS_REQUEST(dict(
+            kwargs, started_at__gte=started_at__gte,
+            started_at__lte=started_at__lte))
+        window_s = window.total_seconds() if window is not None else None
+
+        _LOGGER.info("Exporting trips.")
+        return TripExport(
+            self, params, concurrency, window_s, trips_per_window)
+
+    @asyncio.coroutine
+    def sync_trips(self, store, user=None, vehicle=None,
+                   overlap=sync.DEFAULT_OVERLAP, **kwargs):
+        """Get the trips started since the last synchronization.
+
+        A checkpoint of the synchronized trips is kept in the store for
+        every user and vehicle, see sync.TripSync.
+
+        :param store: Checkpoint store, such as a sync.FileCheckpointStore
+        :param user: Id of the user owning this session, fetched if None
+        :param vehicle: Vehicle id to synchronize, or None for every trip
+        :param overlap: timedelta fetched again before the checkpoint
+        :param kwargs: limit, prefetch or stream options of iter_trips
+        """
+        if user is None:
+            user = (yield from self.get_user()).id
+        trip_sync = sync.TripSync(self, store, user, overlap)
+        return (yield from trip_sync.run(vehicle, **kwargs))
+
     @asyncio.coroutine
     def get_device(self, device_id):
         """Get a single device associated with this user account.
@@ -124,22 +222,49 @@ class Session(base.BaseApiObject):
         """
         _LOGGER.info("Fetching device.")
         resp = yield from self._get(const.DEVICE_URL.format(device_id))
-        return data.Device(resp)
+        return data.Device(resp, self._lazy_validation)
 
     @asyncio.coroutine
-    def get_devices(self, **kwargs):
+    def get_devices(self, concurrency=None, **kwargs):
         """Get all devices associated with this user account.
 
         :param device__serial_number: Device serial number
         :param page: Page number of paginated result to return
         :param limit: Number of results per page
+        :param concurrency: Fetch every page from the requested page onward,
+                            with at most this many requests in flight
         """
-        query = gen_query_string(validation.DEVICES_REQUEST(kwargs))
+        params = validation.DEVICES_REQUEST(kwargs)
 
         _LOGGER.info("Fetching devices.")
-        resp = yield from self._get('?'.join((const.DEVICES_URL, query)))
+        if concurrency is None:
+            resp = yield from self._get(
+                '?'.join((const.DEVICES_URL, gen_query_string(params))))
+        else:
+            resp = yield from self._get_all_pages(
+                const.DEVICES_URL, params, concurrency)
         return base.ResultList(self, resp, data.Device)
 
+    def iter_devices(self, prefetch=2, stream=False, **kwargs):
+        """Iterate over all devices associated with this user account.
+
+        Returns an asynchronous iterator that yields devices from every
+        page, fetching upcoming pages in the background. In stream mode,
+        pages are instead parsed while they are received, so memory use does
+        not grow with the page size.
+
+        :param prefetch: Maximum number of pages fetched ahead
+        :param stream: Parse each page incrementally
+        :param kwargs: Filters accepted by get_devices
+        """
+        query = gen_query_string(validation.DEVICES_REQUEST(kwargs))
+
+        _LOGGER.info("Iterating devices.")
+        url = '?'.join((const.DEVICES_URL, query))
+        if stream:
+            return base.ResultStream(self, url, data.Device)
+        return base.ResultIterator(self, url, data.Device, prefetch)
+
     @asyncio.coroutine
     def get_user(self, **kwargs):
         """Fetch information for the specified user.
@@ -153,9 +278,166 @@ class Session(base.BaseApiObject):
 
         _LOGGER.info("Fetching devices.")
         resp = yield from self._get(const.USER_URL.format(user_id))
-        return data.User(self, resp)
+        return data.User(self, resp, self._lazy_validation)
 
     @property
     def refresh_token(self):
         """The refresh token used to authorize a new session."""
         return self._refresh_token
+
+
+def _trip_start(item):
+    """Sort key ordering raw trip dicts by start time."""
+    try:
+        return validation.coerce_datetime(item['started_at']).timestamp()
+    except (KeyError, validation.vol.Invalid):
+        return float('-inf')
+
+
+class TripExport(base.BaseApiObject):
+    """Asynchronous iterator over trips in a time range, in start order.
+
+    Windows are fetched concurrently with at most ``concurrency`` windows
+    in flight ahead of the consumer. The trips of each window are sorted
+    by start time. The ids of the trips returned by the previous window or
+    started since its start are kept, so trips returned again by the
+    following windows, such as trips on a window boundary, are only
+    yielded once.
+
+    An export which is not exhausted must be closed to cancel its windows
+    in flight, either with close() or by using it as an asynchronous
+    context manager.
+    """
+
+    # Smallest window length in seconds when sizing from the density
+    MIN_WINDOW = 3600
+
+    def __init__(self, parent, params, concurrency, window, trips_per_window):
+        """Create a trip export object."""
+        super().__init__(parent)
+        if concurrency < 1:
+            raise ValueError('concurrency must be at least 1')
+        self._params = params
+        self._concurrency = concurrency
+        self._window = window
+        self._trips_per_window = trips_per_window
+        self._windows = None
+        self._tasks = collections.deque()
+        self._results = iter(())
+        self._seen = {}
+
+    def __aiter__(self):
+        """Return the iterator object."""
+        return self
+
+    @asyncio.coroutine
+    def __aenter__(self):
+        """Enter the export context."""
+        return self
+
+    @asyncio.coroutine
+    def __aexit__(self, exc_type, exc_value, traceback):
+        """Cancel the windows in flight when leaving the context."""
+        yield from self._cancel()
+
+    @asyncio.coroutine
+    def __anext__(self):
+        """Return the next trip, waiting for its window if required."""
+        trip = yield from self.next()
+        if trip is None:
+            raise StopAsyncIteration
+        return trip
+
+    @asyncio.coroutine
+    def next(self):
+        """Return the next trip, or None once every trip was returned.
+
+        Coroutine for code using ``yield from`` instead of ``async for``.
+        """
+        item = next(self._results, None)
+        while item is None:
+            if self._windows is None:
+                self._windows = yield from self._plan_windows()
+            self._schedule()
+            if not self._tasks:
+                return None
+            window_start, task = self._tasks.popleft()
+            try:
+                resp = yield from task
+            except BaseException:
+                yield from self._cancel()
+                raise
+
+            results = []
+            returned = {}
+            for trip in resp['results']:
+                returned[trip.get('id')] = _trip_start(trip)
+                if trip.get('id') not in self._seen:
+                    results.append(trip)
+            self._seen = {trip_id: started for trip_id, started
+                          in self._seen.items() if started >= window_start}
+            self._seen.update(returned)
+            self._results = iter(sorted(results, key=_trip_start))
+            item = next(self._results, None)
+        return data.Trip(item, self._lazy_validation)
+
+    @asyncio.coroutine
+    def _plan_windows(self):
+        """Split the requested range into windows."""
+        start = self._params['started_at__gte']
+        end = self._params['started_at__lte']
+        window = self._window
+        if window is None:
+            probe = dict(self._params, limit=1)
+            resp = yield from self._get(
+                '?'.join((const.TRIPS_URL, gen_query_string(probe))))
+            resp = validation.validate(validation.LIST_RESPONSE, resp)
+            count = resp['_metadata']['count']
+            if count == 0:
+                return iter(())
+            window = max((end - start) * self._trips_per_window / count,
+                         self.MIN_WINDOW)
+        if window <= 0:
+            raise ValueError('window must be positive')
+
+        def windows():
+            """Generate the (start, end) bounds of each window."""
+            window_start = start
+            while True:
+                window_end = min(window_start + window, end)
+                yield window_start, window_end
+                if window_end >= end:
+                    return
+                window_start = window_end
+
+        return windows() if start <= end else iter(())
+
+    def _schedule(self):
+        """Start fetching windows up to the concurrency limit."""
+        while len(self._tasks) < self._concurrency:
+            bounds = next(self._windows, None)
+            if bounds is None:
+                return
+            params = dict(self._params, limit=self._params.get('limit', 250),
+                          started_at__gte=bounds[0], started_at__lte=bounds[1])
+            self._tasks.append((bounds[0], self.loop.create_task(
+                self._get_all_pages(const.TRIPS_URL, params, 1))))
+
+    @asyncio.coroutine
+    def _cancel(self):
+        """Cancel the windows in flight and wait for them to finish."""
+        tasks = [task for _, task in self._tasks]
+        self.close()
+        if tasks:
+            yield from asyncio.gather(*tasks, return_exceptions=True)
+
+    def close(self):
+        """Stop fetching further windows."""
+        for _, task in self._tasks:
+            if task.done() and not task.cancelled():
+                # Retrieve the error of a window that will not be consumed
+                task.exception()
+            task.cancel()
+        self._tasks.clear()
+        self._windows = iter(())
+        self._results = iter(())
@@ -0,0 +1,160 @@
+"""Simplification and resampling of trip paths for aioautomatic."""
+from concurrent.futures import ProcessPoolExecutor
+import functools
+
+from aioautomatic import data
+from aioautomatic import geometry
+from aioautomatic import polyline
+from aioautomatic._arrays import np, require_numpy
+
+
+def _project(coords):
+    """Project (lat, lon) rows to local x, y coordinates in metres.
+
+    An equirectangular projection centered on the path is used, which is
+    accurate enough over the extent of a trip.
+    """
+    radians = np.radians(coords)
+    scale = np.cos(radians[:, 0].mean())
+    return np.column_stack((radians[:, 1] * scale * geometry.EARTH_RADIUS_M,
+                            radians[:, 0] * geometry.EARTH_RADIUS_M))
+
+
+def _douglas_peucker(xy, tolerance):
+    """Return the indexes of the points kept by Douglas-Peucker.
+
+    Every segment of the current simplification is split at once, so the
+    number of passes is the depth of the recursion rather than the number
+    of segments. Points of segments within tolerance are not checked again.
+    """
+    x, y = xy[:, 0], xy[:, 1]
+    keep = np.zeros(len(xy), dtype=bool)
+    keep[[0, -1]] = True
+    points = np.arange(1, len(xy) - 1)
+    tolerance2 = tolerance ** 2
+    while len(points):
+        kept = np.flatnonzero(keep)
+        segment = np.searchsorted(kept, points)
+        ends = kept[segment]
+        starts = kept[segment - 1]
+
+        # Distance of every point to the segment it belongs to
+        line_x = x[ends] - x[starts]
+        line_y = y[ends] - y[starts]
+        offset_x = x[points] - x[starts]
+        offset_y = y[points] - y[starts]
+        length2 = line_x * line_x + line_y * line_y
+        with np.errstate(invalid='ignore', divide='ignore'):
+            ratio = (offset_x * line_x + offset_y * line_y) / length2
+        ratio = np.clip(np.nan_to_num(ratio), 0, 1)
+        offset_x -= ratio * line_x
+        offset_y -= ratio * line_y
+        distance2 = offset_x * offset_x + offset_y * offset_y
+
+        # Points are sorted, so every segment is a run of points
+        first = np.r_[True, segment[1:] != segment[:-1]]
+        group = np.cumsum(first) - 1
+        farthest = np.maximum.reduceat(distance2, np.flatnonzero(first))
+        split = (farthest > tolerance2)[group]
+        if not split.any():
+            break
+        # Keep the first farthest point of every segment to split
+        candidates = np.flatnonzero(split & (distance2 == farthest[group]))
+        groups = group[candidates]
+        keep[points[candidates[np.r_[True, groups[1:] != groups[:-1]]]]] \
+            = True
+        points = points[split]
+        points = points[~keep[points]]
+    return np.flatnonzero(keep)
+
+
+def simplify(coords, tolerance_m):
+    """Simplify a path with the Douglas-Peucker algorithm.
+
+    :param coords: Array of (lat, lon) rows, such as Trip.path_coordinates
+    :param tolerance_m: Maximum distance between the path and its
+                        simplification, in metres
+    :returns: Array of the (lat, lon) rows kept
+    """
+    require_numpy('aioautomatic.simplify')
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    if len(coords) < 3:
+        return coords.copy()
+    return coords[_douglas_peucker(_project(coords), tolerance_m)]
+
+
+def resample(coords, interval_m):
+    """Resample a path at a fixed distance along it.
+
+    The first point is kept and a point is placed every ``interval_m``
+    metres along the path, followed by the last point.
+
+    :param coords: Array of (lat, lon) rows, such as Trip.path_coordinates
+    :param interval_m: Distance between resampled points, in metres
+    :returns: Array of resampled (lat, lon) rows
+    """
+    require_numpy('aioautomatic.simplify')
+    if interval_m <= 0:
+        raise ValueError('Resampling interval must be positive')
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    if len(coords) < 2:
+        return coords.copy()
+    steps = np.hypot(*np.diff(_project(coords), axis=0).T)
+    along = np.r_[0, np.cumsum(steps)]
+    total = along[-1]
+    if total == 0:
+        return coords[:1].copy()
+    marks = np.arange(0, total, interval_m)
+    marks = np.r_[marks, total]
+    return np.column_stack((np.interp(marks, along, coords[:, 0]),
+                            np.interp(marks, along, coords[:, 1])))
+
+
+def _apply_encoded(func, argument, path):
+    """Decode an encoded path and apply func, in a worker process."""
+    if not path:
+        return None
+    return func(polyline.decode(path), argument)
+
+
+def _map_trips(func, argument, trips, processes):
+    """Apply func to the decoded path of every trip."""
+    trips = list(trips)
+    if not processes:
+        return [None if coords is None else func(coords, argument)
+                for coords in data.Trip.decode_paths(trips)]
+
+    # Encoded paths are much cheaper to send to the workers than arrays
+    worker = functools.partial(_apply_encoded, func, argument)
+    chunksize = max(len(trips) // (processes * 4), 1)
+    with ProcessPoolExecutor(processes) as executor:
+        return list(executor.map(
+            worker, [trip.path for trip in trips], chunksize=chunksize))
+
+
+def simplify_trips(trips, tolerance_m, processes=None):
+    """Simplify the paths of several trips.
+
+    :param trips: Iterable of data.Trip objects
+    :param tolerance_m: Simplification tolerance, in metres
+    :param processes: Number of worker processes, or None to simplify the
+                      paths in the current process
+    :returns: List of simplified paths, None for trips without a path
+    """
+    require_numpy('aioautomatic.simplify')
+    return _map_trips(simplify, tolerance_m, trips, processes)
+
+
+def resample_trips(trips, interval_m, processes=None):
+    """Resample the paths of several trips.
+
+    :param trips: Iterable of data.Trip objects
+    :param interval_m: Distance between resampled points, in metres
+    :param processes: Number of worker processes, or None to resample the
+                      paths in the current process
+    :returns: List of resampled paths, None for trips without a path
+    """
+    require_numpy('aioautomatic.simplify')
+    if interval_m <= 0:
+        raise ValueError('Resampling interval must be positive')
+    return _map_trips(resample, interval_m, trips, processes)
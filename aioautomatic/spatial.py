@@ -0,0 +1,272 @@
+"""Spatial index of trip events for aioautomatic."""
+from datetime import timezone
+import itertools
+import math
+
+from aioautomatic import geometry
+from aioautomatic._arrays import np, require_numpy
+
+# Event types of the trip start and end locations
+TRIP_START = 'trip_start'
+TRIP_END = 'trip_end'
+
+_INITIAL_CAPACITY = 1024
+
+
+def _timestamp(value):
+    """Return a datetime as a POSIX timestamp, NaN when missing."""
+    if value is None:
+        return math.nan
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class SpatialIndex():
+    """Grid index of vehicle events and trip endpoints.
+
+    Every vehicle event of a trip is indexed with its type, and the trip
+    start and end locations are indexed as TRIP_START and TRIP_END events
+    at the trip start and end times. Events are bucketed in square grid
+    cells, so queries only check the events of the cells they overlap.
+    Trips can be added as they are fetched, adding a trip again replaces
+    its events. The rows of replaced and removed events are reclaimed once
+    they make up half of the index.
+    """
+
+    def __init__(self, cell_size_m=200):
+        """Create an empty spatial index.
+
+        :param cell_size_m: Size of the grid cells, in metres. Queries are
+                            fastest when it is close to the query radius.
+        """
+        require_numpy('SpatialIndex')
+        self._step = cell_size_m * 180 / (math.pi * geometry.EARTH_RADIUS_M)
+        self._columns = int(math.ceil(360 / self._step))
+        self._cells = {}
+        self._size = 0
+        self._lat = np.empty(_INITIAL_CAPACITY)
+        self._lon = np.empty(_INITIAL_CAPACITY)
+        self._time = np.empty(_INITIAL_CAPACITY)
+        self._type = np.empty(_INITIAL_CAPACITY, dtype=np.intp)
+        self._trip = np.empty(_INITIAL_CAPACITY, dtype=np.intp)
+        self._alive = np.empty(_INITIAL_CAPACITY, dtype=bool)
+        self._dead = 0
+        self._types = {}
+        self._trip_ids = []
+        self._trip_codes = {}
+        self._trip_entries = {}
+
+    def __len__(self):
+        """Return the number of indexed events."""
+        return int(self._alive[:self._size].sum())
+
+    @property
+    def trip_ids(self):
+        """Ids of the indexed trips."""
+        return [self._trip_ids[code] for code in self._trip_entries]
+
+    def _cell(self, lat, lon):
+        """Return the grid cell of a location."""
+        return (int(math.floor(lat / self._step)),
+                int(math.floor((lon + 180) / self._step)) % self._columns)
+
+    def _grow(self, count):
+        """Make room for count more events."""
+        needed = self._size + count
+        capacity = len(self._lat)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name in ('_lat', '_lon', '_time', '_type', '_trip', '_alive'):
+            column = getattr(self, name)
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            setattr(self, name, grown)
+
+    def add_trips(self, trips):
+        """Index the events of trips.
+
+        :param trips: Iterable of data.Trip objects
+        """
+        for trip in trips:
+            self.add_trip(trip)
+
+    def add_trip(self, trip):
+        """Index the events of a trip, replacing any previous version.
+
+        :param trip: data.Trip object
+        """
+        self.remove_trip(trip.id)
+        events = [(TRIP_START, trip.start_location, trip.started_at),
+                  (TRIP_END, trip.end_location, trip.ended_at)]
+        events.extend((event.type, event, event.created_at)
+                      for event in trip.vehicle_events or ())
+
+        code = self._trip_codes.setdefault(trip.id, len(self._trip_ids))
+        if code == len(self._trip_ids):
+            self._trip_ids.append(trip.id)
+        self._grow(len(events))
+        first = index = self._size
+        for event_type, point, created_at in events:
+            lat, lon = point.lat, point.lon
+            if lat is None or lon is None:
+                continue
+            self._lat[index] = lat
+            self._lon[index] = lon
+            self._time[index] = _timestamp(created_at)
+            self._type[index] = self._types.setdefault(
+                event_type, len(self._types))
+            self._trip[index] = code
+            self._alive[index] = True
+            self._cells.setdefault(self._cell(lat, lon), []).append(index)
+            index += 1
+        self._size = index
+        self._trip_entries[code] = (first, index)
+
+    def remove_trip(self, trip_id):
+        """Remove the events of a trip from the index.
+
+        :param trip_id: Id of the trip, ignored if it is not indexed
+        """
+        code = self._trip_codes.get(trip_id)
+        if code is None or code not in self._trip_entries:
+            return
+        first, last = self._trip_entries.pop(code)
+        self._alive[first:last] = False
+        self._dead += last - first
+        if self._dead * 2 > self._size:
+            self._compact()
+
+    def _compact(self):
+        """Drop the rows of removed events, keeping the order of the rest."""
+        alive = np.flatnonzero(self._alive[:self._size])
+        positions = np.full(self._size, -1, dtype=np.intp)
+        positions[alive] = np.arange(len(alive))
+        for name in ('_lat', '_lon', '_time', '_type', '_trip'):
+            column = getattr(self, name)
+            column[:len(alive)] = column[alive]
+        self._alive[:len(alive)] = True
+
+        cells = {}
+        for cell, indexes in self._cells.items():
+            indexes = positions[indexes]
+            indexes = indexes[indexes >= 0]
+            if len(indexes):
+                cells[cell] = indexes.tolist()
+        self._cells = cells
+        # The events of a trip are contiguous rows which are all alive
+        entries = {}
+        for code, (first, last) in self._trip_entries.items():
+            first_alive = int(np.searchsorted(alive, first))
+            entries[code] = (first_alive, first_alive + last - first)
+        self._trip_entries = entries
+        self._size = len(alive)
+        self._dead = 0
+
+    def _candidates(self, rows, columns):
+        """Return the indexes of the events in a range of grid cells."""
+        if len(rows) * len(columns) > len(self._cells):
+            # Scanning the cells is cheaper than looking each one up
+            indexes = [cell_indexes for (row, column), cell_indexes
+                       in self._cells.items()
+                       if row in rows and column in columns]
+        else:
+            get = self._cells.get
+            indexes = [get((row, column), ()) for row in rows
+                       for column in columns]
+        indexes = np.fromiter(itertools.chain.from_iterable(indexes),
+                              dtype=np.intp)
+        return indexes[self._alive[indexes]]
+
+    def _column_range(self, west, east):
+        """Return the grid columns between two longitudes."""
+        first = int(math.floor((west + 180) / self._step))
+        last = int(math.floor((east + 180) / self._step))
+        if last < first:
+            # Box crossing the antimeridian
+            last += self._columns
+        if last - first + 1 >= self._columns:
+            return range(self._columns)
+        return {column % self._columns for column in range(first, last + 1)}
+
+    def _filter(self, indexes, types, start, end):
+        """Filter events by type and time range."""
+        if types is not None:
+            if isinstance(types, str):
+                types = [types]
+            codes = [self._types[event_type] for event_type in types
+                     if event_type in self._types]
+            indexes = indexes[np.isin(self._type[indexes], codes)]
+        if start is not None:
+            indexes = indexes[self._time[indexes] >= _timestamp(start)]
+        if end is not None:
+            indexes = indexes[self._time[indexes] < _timestamp(end)]
+        return indexes
+
+    def _trip_results(self, indexes):
+        """Return the ids of the trips owning events.
+
+        Trips are in the order they were first indexed.
+        """
+        return [self._trip_ids[code]
+                for code in np.unique(self._trip[indexes])]
+
+    def within_radius(self, lat, lon, radius_m, types=None, start=None,
+                      end=None):
+        """Return the trips with events within a distance of a point.
+
+        :param lat: Latitude of the point, in degrees
+        :param lon: Longitude of the point, in degrees
+        :param radius_m: Maximum distance to the point, in metres
+        :param types: Event type or list of event types to match, such as
+                      'hard_brake' or TRIP_START. Defaults to every type.
+        :param start: Minimum event datetime, inclusive
+        :param end: Maximum event datetime, exclusive
+        :returns: List of trip ids
+        """
+        delta = math.degrees(radius_m / geometry.EARTH_RADIUS_M)
+        south, north = max(lat - delta, -90), min(lat + delta, 90)
+        cos_lat = math.cos(math.radians(max(abs(south), abs(north))))
+        if cos_lat * 180 <= delta:
+            columns = range(self._columns)
+        else:
+            columns = self._column_range(lon - delta / cos_lat,
+                                         lon + delta / cos_lat)
+        rows = range(int(math.floor(south / self._step)),
+                     int(math.floor(north / self._step)) + 1)
+
+        indexes = self._filter(self._candidates(rows, columns),
+                               types, start, end)
+        distances = geometry.haversine(
+            self._lat[indexes], self._lon[indexes], lat, lon)
+        return self._trip_results(indexes[distances <= radius_m])
+
+    def within_bbox(self, south, west, north, east, types=None, start=None,
+                    end=None):
+        """Return the trips with events within a bounding box.
+
+        A box with west greater than east crosses the antimeridian.
+
+        :param south: Minimum latitude, in degrees
+        :param west: Minimum longitude, in degrees
+        :param north: Maximum latitude, in degrees
+        :param east: Maximum longitude, in degrees
+        :param types: Event type or list of event types to match
+        :param start: Minimum event datetime, inclusive
+        :param end: Maximum event datetime, exclusive
+        :returns: List of trip ids
+        """
+        rows = range(int(math.floor(south / self._step)),
+                     int(math.floor(north / self._step)) + 1)
+        indexes = self._filter(
+            self._candidates(rows, self._column_range(west, east)),
+            types, start, end)
+        lat, lon = self._lat[indexes], self._lon[indexes]
+        inside = (lat >= south) & (lat <= north)
+        if west <= east:
+            inside &= (lon >= west) & (lon <= east)
+        else:
+            inside &= (lon >= west) | (lon <= east)
+        return self._trip_results(indexes[inside])
@@ -0,0 +1,220 @@
+"""Local SQLite storage of aioautomatic data objects."""
+import json
+import sqlite3
+
+from aioautomatic import data
+from aioautomatic import validation
+
+_SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS trips ('
+    'id TEXT PRIMARY KEY, vehicle TEXT, started_at REAL, ended_at REAL, '
+    'data TEXT NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS trips_vehicle ON trips (vehicle, started_at)',
+    'CREATE INDEX IF NOT EXISTS trips_started_at ON trips (started_at)',
+    'CREATE TABLE IF NOT EXISTS trip_tags ('
+    'trip_id TEXT NOT NULL, tag TEXT NOT NULL, PRIMARY KEY (trip_id, tag))',
+    'CREATE INDEX IF NOT EXISTS trip_tags_tag ON trip_tags (tag, trip_id)',
+    'CREATE TABLE IF NOT EXISTS vehicles ('
+    'id TEXT PRIMARY KEY, data TEXT NOT NULL)',
+    'CREATE TABLE IF NOT EXISTS devices ('
+    'id TEXT PRIMARY KEY, data TEXT NOT NULL)',
+    'CREATE TABLE IF NOT EXISTS users ('
+    'id TEXT PRIMARY KEY, data TEXT NOT NULL)',
+)
+
+
+def _dumps(obj):
+    """Serialize the data of an object."""
+    return json.dumps(obj.data, default=validation.json_default,
+                      separators=(',', ':'))
+
+
+def _timestamp(value):
+    """Return an optional datetime as a POSIX timestamp."""
+    return None if value is None else value.timestamp()
+
+
+def _vehicle_id(vehicle):
+    """Return a vehicle id from a vehicle id or url."""
+    if vehicle is None:
+        return None
+    return vehicle.rstrip('/').rsplit('/', 1)[-1]
+
+
+class SQLiteStore():
+    """Trips, vehicles, devices and users saved in a SQLite database.
+
+    Objects are saved as the json of their data, along with indexed
+    columns for the trip vehicle, start time and tags. Saved objects are
+    returned as the same data classes, created in lazy validation mode by
+    default since their data was validated before being saved.
+    """
+
+    def __init__(self, path, lazy_validation=True):
+        """Create a SQLite store.
+
+        :param path: Path of the database file, or ':memory:'
+        :param lazy_validation: Create returned objects in lazy mode
+        """
+        self._lazy = lazy_validation
+        self._connection = sqlite3.connect(path)
+        with self._connection:
+            for statement in _SCHEMA:
+                self._connection.execute(statement)
+
+    def close(self):
+        """Close the database connection."""
+        self._connection.close()
+
+    def upsert_trips(self, trips):
+        """Insert or replace trips in a single transaction.
+
+        :param trips: Iterable of data.Trip objects, such as a ResultList
+        """
+        rows = []
+        tags = []
+        for trip in trips:
+            rows.append((trip.id, _vehicle_id(trip.vehicle),
+                         _timestamp(trip.started_at),
+                         _timestamp(trip.ended_at), _dumps(trip)))
+            tags.extend((trip.id, tag) for tag in trip.tags or ())
+        with self._connection:
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO trips '
+                '(id, vehicle, started_at, ended_at, data) '
+                'VALUES (?, ?, ?, ?, ?)', rows)
+            self._connection.executemany(
+                'DELETE FROM trip_tags WHERE trip_id = ?',
+                ((row[0],) for row in rows))
+            self._connection.executemany(
+                'INSERT OR IGNORE INTO trip_tags (trip_id, tag) '
+                'VALUES (?, ?)', tags)
+
+    def _upsert(self, table, objects):
+        """Insert or replace objects stored by id."""
+        with self._connection:
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO {} (id, data) VALUES (?, ?)'.format(
+                    table), ((obj.id, _dumps(obj)) for obj in objects))
+
+    def upsert_vehicles(self, vehicles):
+        """Insert or replace vehicles in a single transaction.
+
+        :param vehicles: Iterable of data.Vehicle objects
+        """
+        self._upsert('vehicles', vehicles)
+
+    def upsert_devices(self, devices):
+        """Insert or replace devices in a single transaction.
+
+        :param devices: Iterable of data.Device objects
+        """
+        self._upsert('devices', devices)
+
+    def upsert_users(self, users):
+        """Insert or replace users in a single transaction.
+
+        :param users: Iterable of data.User objects
+        """
+        self._upsert('users', users)
+
+    def _load(self, rows, factory):
+        """Create data objects from the json data of rows."""
+        return [factory(json.loads(row[0]), self._lazy) for row in rows]
+
+    def _get(self, table, object_id, factory):
+        """Return the object with the given id, or None."""
+        rows = self._connection.execute(
+            'SELECT data FROM {} WHERE id = ?'.format(table), (object_id,))
+        result = self._load(rows, factory)
+        return result[0] if result else None
+
+    def _all(self, table, factory):
+        """Return every object of a table."""
+        return self._load(self._connection.execute(
+            'SELECT data FROM {} ORDER BY id'.format(table)), factory)
+
+    def get_trip(self, trip_id):
+        """Return a saved trip, or None.
+
+        :param trip_id: Trip ID to load
+        """
+        return self._get('trips', trip_id, data.Trip)
+
+    def get_trips(self, vehicle=None, started_at__gte=None,
+                  started_at__lte=None, tags__in=None, limit=None):
+        """Return saved trips in start time order.
+
+        :param vehicle: Vehicle id or url filter
+        :param started_at__gte: Minimum start time filter
+        :param started_at__lte: Maximum start time filter
+        :param tags__in: Tag, comma separated tags or list of tags filter
+        :param limit: Maximum number of trips to return
+        """
+        conditions = []
+        params = []
+        if vehicle is not None:
+            conditions.append('vehicle = ?')
+            params.append(_vehicle_id(vehicle))
+        if started_at__gte is not None:
+            conditions.append('started_at >= ?')
+            params.append(_timestamp(started_at__gte))
+        if started_at__lte is not None:
+            conditions.append('started_at <= ?')
+            params.append(_timestamp(started_at__lte))
+        if tags__in is not None:
+            if isinstance(tags__in, str):
+                tags__in = tags__in.split(',')
+            tags__in = list(tags__in)
+            conditions.append(
+                'id IN (SELECT trip_id FROM trip_tags WHERE tag IN ({}))'
+                .format(', '.join('?' * len(tags__in))))
+            params.extend(tags__in)
+
+        query = 'SELECT data FROM trips'
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        query += ' ORDER BY started_at, id'
+        if limit is not None:
+            query += ' LIMIT ?'
+            params.append(limit)
+        return self._load(self._connection.execute(query, params), data.Trip)
+
+    def get_vehicle(self, vehicle_id):
+        """Return a saved vehicle, or None.
+
+        :param vehicle_id: Vehicle ID to load
+        """
+        return self._get('vehicles', vehicle_id, data.Vehicle)
+
+    def get_vehicles(self):
+        """Return every saved vehicle."""
+        return self._all('vehicles', data.Vehicle)
+
+    def get_device(self, device_id):
+        """Return a saved device, or None.
+
+        :param device_id: Device ID to load
+        """
+        return self._get('devices', device_id, data.Device)
+
+    def get_devices(self):
+        """Return every saved device."""
+        return self._all('devices', data.Device)
+
+    def get_user(self, parent, user_id):
+        """Return a saved user, or None.
+
+        :param parent: Session used by the user to fetch further data
+        :param user_id: User ID to load
+        """
+        return self._get('users', user_id,
+                         lambda item, lazy: data.User(parent, item, lazy))
+
+    def get_users(self, parent):
+        """Return every saved user.
+
+        :param parent: Session used by the users to fetch further data
+        """
+        return self._all('users',
+                         lambda item, lazy: data.User(parent, item, lazy))
@@ -0,0 +1,178 @@
+"""Incremental parsing of list responses for aioautomatic."""
+import re
+
+# Bytes that change the parser state outside of strings
+_STRUCTURAL = re.compile(rb'[][{}",:]')
+# Separators only matter at the top level and in the results array
+_NESTED = re.compile(rb'[][{}"]')
+_BACKSLASH = 0x5c
+
+
+class ListStreamParser():
+    """Incrementally split a list response into its results.
+
+    Chunks of the response body are fed as they arrive. Every element of
+    the top level ``results`` array is decoded as soon as its closing byte
+    is received, so only the element being received is buffered. Other top
+    level values, such as ``_metadata``, are decoded into ``values``, and
+    ``has_results`` tells whether a ``results`` array was found.
+    """
+
+    def __init__(self, loads):
+        """Create a list stream parser.
+
+        :param loads: Callable decoding a single json document
+        """
+        self._loads = loads
+        self._buffer = bytearray()
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._expect_key = False
+        self._key_start = None
+        self._key = None
+        self._value_start = None
+        self._in_results = False
+        self._item_start = None
+        self._done = False
+        self.values = {}
+        self.has_results = False
+
+    def feed(self, chunk):
+        """Parse a chunk of the body and return the completed results."""
+        if self._done and chunk.strip():
+            raise ValueError('Data received after the end of the document')
+        buf = self._buffer
+        buf.extend(chunk)
+        items = []
+        pos = self._pos
+        while True:
+            if self._in_string:
+                end = buf.find(b'"', pos)
+                if end < 0:
+                    pos = len(buf)
+                    break
+                pos = end + 1
+                escapes = 0
+                while buf[end - escapes - 1] == _BACKSLASH:
+                    escapes += 1
+                if escapes % 2:
+                    continue
+                self._in_string = False
+                if self._key_start is not None:
+                    self._key = bytes(buf[self._key_start:pos])
+                    self._key_start = None
+                continue
+
+            if self._depth > 2 or (self._depth == 2 and
+                                   not self._in_results):
+                match = _NESTED.search(buf, pos)
+            else:
+                match = _STRUCTURAL.search(buf, pos)
+            if match is None:
+                pos = len(buf)
+                break
+            start = match.start()
+            pos = match.end()
+            self._handle(buf[start], buf, start, pos, items)
+
+        self._pos = pos
+        self._trim()
+        return items
+
+    def _handle(self, char, buf, start, pos, items):
+        """Update the parser state for a structural byte."""
+        depth = self._depth
+        if char == 0x22:  # "
+            self._in_string = True
+            if depth == 1 and self._expect_key:
+                self._key_start = start
+        elif char == 0x3a:  # :
+            if depth == 1:
+                self._expect_key = False
+                self._value_start = pos
+        elif char in (0x7b, 0x5b):  # { [
+            if depth == 0:
+                if char != 0x7b or self._done:
+                    raise ValueError('List response is not a json object')
+                self._expect_key = True
+            elif (depth == 1 and char == 0x5b and
+                  self._key == b'"results"'):
+                self._in_results = True
+                self.has_results = True
+                self._value_start = None
+                self._item_start = pos
+            self._depth = depth + 1
+        elif char in (0x7d, 0x5d):  # } ]
+            if depth == 0:
+                raise ValueError('Unbalanced json document')
+            if self._in_results and depth == 2:
+                # End of the results array
+                self._end_scalar_item(buf, start, items)
+                self._in_results = False
+            elif self._in_results and depth == 3:
+                items.append(self._decode(buf, self._item_start, pos))
+                self._item_start = None
+            elif depth == 1:
+                self._end_scalar_value(buf, start)
+                self._done = True
+            elif depth == 2 and self._value_start is not None:
+                self.values[self._decode_key()] = self._decode(
+                    buf, self._value_start, pos)
+                self._value_start = None
+            self._depth = depth - 1
+        elif char == 0x2c:  # ,
+            if depth == 1:
+                self._end_scalar_value(buf, start)
+                self._expect_key = True
+            elif depth == 2 and self._in_results:
+                self._end_scalar_item(buf, start, items)
+                self._item_start = pos
+
+    def _end_scalar_item(self, buf, end, items):
+        """Decode a pending results element that is not an object."""
+        if self._item_start is not None and \
+                buf[self._item_start:end].strip():
+            items.append(self._decode(buf, self._item_start, end))
+        self._item_start = None
+
+    def _end_scalar_value(self, buf, end):
+        """Decode a pending top level value that is not an object."""
+        if self._value_start is not None:
+            self.values[self._decode_key()] = self._decode(
+                buf, self._value_start, end)
+            self._value_start = None
+
+    def _decode_key(self):
+        """Decode the current top level key."""
+        return self._loads(self._key.decode('utf-8'))
+
+    def _decode(self, buf, start, end):
+        """Decode a json value from the buffer."""
+        return self._loads(bytes(buf[start:end]).decode('utf-8'))
+
+    def _trim(self):
+        """Drop buffered bytes that are no longer required."""
+        starts = [start for start in
+                  (self._key_start, self._value_start, self._item_start)
+                  if start is not None]
+        keep = min(starts) if starts else self._pos
+        if self._in_string:
+            # Keep one byte before the scan position to detect escapes
+            keep = min(keep, max(self._pos - 1, 0))
+        if keep:
+            del self._buffer[:keep]
+            self._pos -= keep
+            if self._key_start is not None:
+                self._key_start -= keep
+            if self._value_start is not None:
+                self._value_start -= keep
+            if self._item_start is not None:
+                self._item_start -= keep
+
+    def close(self):
+        """Check that a complete document was parsed and return its values.
+        """
+        if not self._done or self._in_string:
+            raise ValueError('Incomplete json document')
+        return self.values
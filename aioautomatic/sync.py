@@ -0,0 +1,244 @@
+"""Incremental trip synchronization for aioautomatic."""
+import asyncio
+from datetime import timedelta
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+
+from aioautomatic import validation
+
+_LOGGER = logging.getLogger(__name__)
+
+# Default window re-fetched before the checkpoint, for trips uploaded late
+DEFAULT_OVERLAP = timedelta(hours=6)
+
+# Options of Session.iter_trips which do not filter the synchronized trips
+ITER_OPTIONS = ('limit', 'prefetch', 'stream')
+
+
+class Checkpoint():
+    """High water mark of the trips already synchronized.
+
+    ``started_at`` and ``ended_at`` are the latest start and end times of
+    the synchronized trips. ``trip_ids`` maps the ids of the trips started
+    within the overlap window before ``started_at`` to their start time,
+    so trips fetched again in that window are skipped.
+    """
+
+    def __init__(self, started_at=None, ended_at=None, trip_ids=None):
+        """Create a checkpoint.
+
+        :param started_at: Latest trip start datetime
+        :param ended_at: Latest trip end datetime
+        :param trip_ids: Dict of recent trip ids to their start datetime
+        """
+        self.started_at = started_at
+        self.ended_at = ended_at
+        self.trip_ids = trip_ids or {}
+
+    def __contains__(self, trip_id):
+        """Return True if the trip was already synchronized."""
+        return trip_id in self.trip_ids
+
+    def add(self, trip):
+        """Record a synchronized trip.
+
+        :param trip: data.Trip object
+        """
+        started_at = trip.started_at
+        self.trip_ids[trip.id] = started_at
+        if started_at is not None and (
+                self.started_at is None or started_at > self.started_at):
+            self.started_at = started_at
+        ended_at = trip.ended_at
+        if ended_at is not None and (
+                self.ended_at is None or ended_at > self.ended_at):
+            self.ended_at = ended_at
+
+    def prune(self, overlap):
+        """Forget the trips started before the overlap window."""
+        if self.started_at is None:
+            return
+        since = self.started_at - overlap
+        self.trip_ids = {
+            trip_id: started_at
+            for trip_id, started_at in self.trip_ids.items()
+            if started_at is not None and started_at >= since}
+
+    def to_dict(self):
+        """Return the checkpoint as a json serializable dict."""
+        def dump(value):
+            """Format an optional datetime."""
+            return None if value is None else validation.format_datetime(
+                value)
+        return {
+            'started_at': dump(self.started_at),
+            'ended_at': dump(self.ended_at),
+            'trip_ids': {trip_id: dump(started_at)
+                         for trip_id, started_at in self.trip_ids.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Create a checkpoint from a dict returned by to_dict."""
+        def load(value):
+            """Parse an optional datetime."""
+            return None if value is None else validation.coerce_datetime(
+                value)
+        return cls(load(data.get('started_at')), load(data.get('ended_at')),
+                   {trip_id: load(started_at) for trip_id, started_at
+                    in data.get('trip_ids', {}).items()})
+
+
+class FileCheckpointStore():
+    """Checkpoints of every user and vehicle saved in a json file.
+
+    The file is replaced atomically on every save, so an interrupted save
+    leaves the previous checkpoints intact.
+
+    Any object implementing ``load`` and ``save`` may be used in place of
+    this class.
+    """
+
+    def __init__(self, path):
+        """Create a file checkpoint store.
+
+        :param path: Path of the json file, created on the first save
+        """
+        self._path = path
+
+    def _read(self):
+        """Read every checkpoint from the file."""
+        try:
+            with open(self._path, encoding='utf-8') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+
+    def load(self, user, vehicle=None):
+        """Return the checkpoint of a user and vehicle, or None."""
+        data = self._read().get(user, {}).get(vehicle or '')
+        return None if data is None else Checkpoint.from_dict(data)
+
+    def save(self, user, vehicle, checkpoint):
+        """Save the checkpoint of a user and vehicle."""
+        checkpoints = self._read()
+        checkpoints.setdefault(user, {})[vehicle or ''] = \
+            checkpoint.to_dict()
+        directory = os.path.dirname(os.path.abspath(self._path))
+        file = tempfile.NamedTemporaryFile(
+            'w', encoding='utf-8', dir=directory, delete=False,
+            prefix='.checkpoints-', suffix='.tmp')
+        try:
+            with file:
+                json.dump(checkpoints, file)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(file.name, self._path)
+        except BaseException:
+            os.unlink(file.name)
+            raise
+
+
+class SQLiteCheckpointStore():
+    """Checkpoints of every user and vehicle saved in a SQLite database."""
+
+    def __init__(self, path):
+        """Create a SQLite checkpoint store.
+
+        :param path: Path of the database file, or ':memory:'
+        """
+        self._connection = sqlite3.connect(path)
+        with self._connection:
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS trip_checkpoints ('
+                'user TEXT NOT NULL, vehicle TEXT NOT NULL, '
+                'checkpoint TEXT NOT NULL, PRIMARY KEY (user, vehicle))')
+
+    def load(self, user, vehicle=None):
+        """Return the checkpoint of a user and vehicle, or None."""
+        row = self._connection.execute(
+            'SELECT checkpoint FROM trip_checkpoints '
+            'WHERE user = ? AND vehicle = ?', (user, vehicle or '')).fetchone()
+        return None if row is None else Checkpoint.from_dict(
+            json.loads(row[0]))
+
+    def save(self, user, vehicle, checkpoint):
+        """Save the checkpoint of a user and vehicle."""
+        with self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO trip_checkpoints '
+                '(user, vehicle, checkpoint) VALUES (?, ?, ?)',
+                (user, vehicle or '', json.dumps(checkpoint.to_dict())))
+
+    def close(self):
+        """Close the database connection."""
+        self._connection.close()
+
+
+class TripSync():
+    """Fetch the trips started since the last synchronization.
+
+    A checkpoint is kept for every user and vehicle filter. Each run only
+    requests trips started from the checkpoint, minus an overlap window
+    for trips uploaded late, and skips the trips of that window which were
+    already returned. The checkpoint is saved once every page was fetched.
+
+    Trips can only be filtered by vehicle, as the checkpoint of a filtered
+    run would skip the trips left out by the filter.
+    """
+
+    def __init__(self, session, store, user, overlap=DEFAULT_OVERLAP):
+        """Create a trip synchronization.
+
+        :param session: Session used to fetch trips
+        :param store: Checkpoint store, such as a FileCheckpointStore
+        :param user: Id of the user owning the session
+        :param overlap: timedelta fetched again before the checkpoint
+        """
+        self._session = session
+        self._store = store
+        self._user = user
+        self._overlap = overlap
+
+    @asyncio.coroutine
+    def run(self, vehicle=None, **kwargs):
+        """Fetch the new trips and update the checkpoint.
+
+        :param vehicle: Vehicle id to synchronize, or None for every trip
+        :param kwargs: limit, prefetch or stream options of
+                       Session.iter_trips
+        :returns: List of new trips
+        """
+        filters = sorted(set(kwargs) - set(ITER_OPTIONS))
+        if filters:
+            raise ValueError('Trips can only be synchronized by vehicle, '
+                             'unsupported filters: {}'.format(
+                                 ', '.join(filters)))
+        checkpoint = self._store.load(self._user, vehicle) or Checkpoint()
+        if vehicle is not None:
+            kwargs['vehicle'] = vehicle
+        if checkpoint.started_at is not None:
+            kwargs['started_at__gte'] = checkpoint.started_at - self._overlap
+
+        _LOGGER.info("Synchronizing trips.")
+        iterator = self._session.iter_trips(**kwargs)
+        trips = []
+        try:
+            while True:
+                trip = yield from iterator.next()
+                if trip is None:
+                    break
+                if trip.id in checkpoint:
+                    continue
+                trips.append(trip)
+                checkpoint.add(trip)
+        finally:
+            iterator.close()
+
+        checkpoint.prune(self._overlap)
+        self._store.save(self._user, vehicle, checkpoint)
+        _LOGGER.debug("Synchronized %d new trips.", len(trips))
+        return trips
@@ -1,23 +1,59 @@
 """API Response validation."""
-from datetime import datetime
+from datetime import datetime, timezone
+import functools
+import re
 
 import voluptuous as vol
 
+from aioautomatic import compiler
 from aioautomatic import exceptions
 
 
 def validate(schema, value):
     """Validate the value using the given schema.
 
-    If the value is not valid, an InvalidMessageError exception is raised.
+    Voluptuous schemas are run through their compiled validator. If the
+    value is not valid, an InvalidMessageError exception is raised.
     """
     try:
-        return schema(value)
+        return compiler.compile_schema(schema)(value)
     except vol.error.Invalid as exc:
         raise exceptions.InvalidMessageError(
             "Message does not match schema: {}".format(value)) from exc
 
 
+# Field validators of dict schemas, by schema id
+_SCHEMA_FIELDS = {}
+
+
+def schema_fields(schema):
+    """Return how to validate each key of a dict schema on its own.
+
+    The result maps each key name to a ``(validator, required, default)``
+    tuple, where ``default`` is the default factory of the key or None.
+    Validators that are not dict schemas have no fields.
+    """
+    cached = _SCHEMA_FIELDS.get(id(schema))
+    if cached is not None and cached[0] is schema:
+        return cached[1]
+
+    fields = {}
+    if isinstance(schema, vol.Schema) and isinstance(schema.schema, dict):
+        for key, value in schema.schema.items():
+            if isinstance(key, vol.Marker):
+                required = isinstance(key, vol.Required) or (
+                    schema.required and not isinstance(key, vol.Optional))
+                default = getattr(key, 'default', vol.UNDEFINED)
+            else:
+                required = schema.required
+                default = vol.UNDEFINED
+            if default is vol.UNDEFINED:
+                default = None
+            fields[str(key)] = (vol.Schema(value), required, default)
+    _SCHEMA_FIELDS[id(schema)] = (schema, fields)
+    return fields
+
+
 def timestamp(value):
     """Check that input is a datetime and return the timestamp."""
     if not isinstance(value, datetime):
@@ -33,13 +69,14 @@ def opt(key):
 
 DATETIME_FORMAT_MS = '%Y-%m-%dT%H:%M:%S.%fZ%z'
 DATETIME_FORMAT = '%Y-%m-%dT%H:%M:%SZ%z'
+# Timestamps as sent by the API, parsed without strptime
+_DATETIME_RE = re.compile(
+    r'(\d{4})-(\d\d)-(\d\d)T(\d\d):(\d\d):(\d\d)(?:\.(\d{1,6}))?Z\Z',
+    re.ASCII)
 
 
-def coerce_datetime(value):
-    """Coerce a value to datetime."""
-    if isinstance(value, datetime):
-        return value
-
+def _strptime_datetime(value):
+    """Parse a timestamp with strptime."""
     value = '{}+0000'.format(value)
     try:
         return datetime.strptime(value, DATETIME_FORMAT_MS)
@@ -52,6 +89,52 @@ def coerce_datetime(value):
                     value, DATETIME_FORMAT))
 
 
+@functools.lru_cache(maxsize=4096)
+def _parse_datetime(value):
+    """Parse a timestamp string.
+
+    Strings of the usual YYYY-MM-DDTHH:MM:SS[.ffffff]Z shape are parsed
+    directly, other strings are left to strptime.
+    """
+    match = _DATETIME_RE.match(value)
+    if match is not None:
+        year, month, day, hour, minute, second, fraction = match.groups()
+        try:
+            return datetime(
+                int(year), int(month), int(day), int(hour), int(minute),
+                int(second), int(fraction.ljust(6, '0')) if fraction else 0,
+                timezone.utc)
+        except ValueError:
+            pass
+    return _strptime_datetime(value)
+
+
+def coerce_datetime(value):
+    """Coerce a value to datetime."""
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, str):
+        return _parse_datetime(value)
+    return _strptime_datetime(value)
+
+
+def format_datetime(value):
+    """Format a datetime as a timestamp string sent by the API."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+
+def json_default(value):
+    """Serialize the datetimes of validated data as API timestamps.
+
+    Passed as the ``default`` of json.dumps.
+    """
+    if isinstance(value, datetime):
+        return format_datetime(value)
+    raise TypeError('{!r} is not json serializable'.format(value))
+
+
 def string_case_insensitive(target):
     """Validator for a case insensitive string."""
     def validator(value):
@@ -0,0 +1,6 @@
+"""Run the benchmark suite with ``python -m benchmarks``."""
+import sys
+
+from benchmarks.suite import main
+
+sys.exit(main())
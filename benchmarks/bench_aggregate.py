@@ -0,0 +1,47 @@
+"""Compare incremental aggregates with recomputing them from every trip.
+
+Run with ``python -m benchmarks.bench_aggregate``.
+"""
+from aioautomatic import aggregate
+from aioautomatic import data
+from benchmarks import fixtures
+from benchmarks.bench_codec import measure
+
+
+def main():
+    """Run the aggregate benchmark and print the results."""
+    history = [data.Trip(trip) for seed in range(16)
+               for trip in fixtures.trip_page(seed=seed)['results']]
+    page = [data.Trip(trip) for trip in fixtures.trip_page(seed=99)[
+        'results']]
+
+    def recompute():
+        """Aggregate the history and the new page from scratch."""
+        aggregator = aggregate.TripAggregator()
+        aggregator.add_trips(history)
+        aggregator.add_trips(page)
+        return aggregator.snapshot()
+
+    aggregator = aggregate.TripAggregator()
+    aggregator.add_trips(history)
+    # A page of new trips for every measured refresh
+    new_pages = iter([[data.Trip(trip) for trip in fixtures.trip_page(
+        seed=seed)['results']] for seed in range(100, 115)])
+
+    def incremental():
+        """Add a new page to the history totals."""
+        aggregator.add_trips(next(new_pages))
+        return aggregator.snapshot()
+
+    print('{} trips of history, {} new trips'.format(len(history),
+                                                     len(page)))
+    print('{:<20} {:>10}'.format('refresh', 'time (ms)'))
+    print('{:<20} {:>10.1f}'.format('recompute', measure(recompute, 3) * 1e3))
+    print('{:<20} {:>10.1f}'.format('incremental',
+                                    measure(incremental, 3) * 1e3))
+    print('{:<20} {:>10.3f}'.format('snapshot',
+                                    measure(aggregator.snapshot, 100) * 1e3))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""Compare scanning a trip archive with scanning json pages.
+
+Run with ``python -m benchmarks.bench_archive``.
+"""
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from aioautomatic.archive import TripArchive
+from benchmarks import fixtures
+from benchmarks.bench_codec import measure
+
+
+def main():
+    """Run the archive benchmark and print the results."""
+    directory = tempfile.mkdtemp()
+    try:
+        pages = [fixtures.trip_page(seed=seed) for seed in range(20)]
+        json_path = os.path.join(directory, 'pages.jsonl')
+        with open(json_path, 'w') as file:
+            for page in pages:
+                file.write(json.dumps(page) + '\n')
+
+        trip_archive = TripArchive(os.path.join(directory, 'archive'))
+        start = time.perf_counter()
+        for page in pages:
+            trip_archive.append_page(page)
+        append_s = time.perf_counter() - start
+        count = len(trip_archive)
+
+        def scan_json():
+            """Sum trip distances from the json pages."""
+            with open(json_path) as file:
+                return sum(trip['distance_m'] for line in file
+                           for trip in json.loads(line)['results'])
+
+        def scan_archive():
+            """Sum trip distances from a fresh archive mapping."""
+            trip_archive.close()
+            return float(trip_archive['distance_m'].sum())
+
+        sizes = {name: os.path.getsize(os.path.join(
+            directory, 'archive', name)) for name in ('trips.rec',
+                                                      'trips.blob')}
+        print('{} trips, json {:.0f} kB, records {:.0f} kB, blobs {:.0f} kB'
+              .format(count, os.path.getsize(json_path) / 1024,
+                      sizes['trips.rec'] / 1024, sizes['trips.blob'] / 1024))
+        print('{:<28} {:>10}'.format('operation', 'time (ms)'))
+        print('{:<28} {:>10.1f}'.format('append', append_s * 1e3))
+        print('{:<28} {:>10.1f}'.format('scan json pages',
+                                        measure(scan_json, 1) * 1e3))
+        print('{:<28} {:>10.3f}'.format('scan archive column',
+                                        measure(scan_archive, 5) * 1e3))
+        print('{:<28} {:>10.3f}'.format(
+            'read one trip', measure(lambda: trip_archive[count // 2],
+                                     100) * 1e3))
+        trip_archive.close()
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
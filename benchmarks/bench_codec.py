@@ -0,0 +1,45 @@
+"""Compare json codecs on trip pages and realtime events.
+
+Run with ``python -m benchmarks.bench_codec``.
+"""
+import json
+import timeit
+
+from aioautomatic import codec
+from benchmarks import fixtures
+
+
+def installed_codecs():
+    """Return the standard library codec and every installed decoder."""
+    codecs = [codec.STDLIB_CODEC]
+    for name in codec.OPTIONAL_CODECS:
+        selected = codec.get_codec(name)
+        if selected is not codec.STDLIB_CODEC:
+            codecs.append(selected)
+    return codecs
+
+
+def measure(func, number):
+    """Return the best time in seconds of a single call to func."""
+    return min(timeit.repeat(func, number=number, repeat=5)) / number
+
+
+def main():
+    """Run the codec benchmark and print the results."""
+    page = json.dumps(fixtures.trip_page())
+    packets = ['42' + json.dumps([event['type'], event])
+               for event in fixtures.realtime_events()]
+
+    print('{:<8} {:>16} {:>16}'.format(
+        'codec', 'trip page (ms)', 'event (us)'))
+    for selected in installed_codecs():
+        loads = selected.loads
+        page_s = measure(lambda: loads(page), 20)
+        event_s = measure(
+            lambda: [loads(packet[2:]) for packet in packets], 200)
+        print('{:<8} {:>16.3f} {:>16.2f}'.format(
+            selected.name, page_s * 1e3, event_s * 1e6 / len(packets)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+"""Measure the cost of parsing API timestamps.
+
+Run with ``python -m benchmarks.bench_datetime``.
+"""
+from aioautomatic import validation
+from benchmarks import fixtures
+from benchmarks.bench_codec import measure
+
+
+def timestamps():
+    """Return every timestamp of a trip page, in payload order."""
+    values = []
+    for trip in fixtures.trip_page()['results']:
+        values.extend((trip['started_at'], trip['ended_at']))
+        values.extend(event['created_at'] for event in trip['vehicle_events'])
+    return values
+
+
+def main():
+    """Run the timestamp benchmark and print the results."""
+    values = timestamps()
+    parse = validation._parse_datetime  # pylint: disable=protected-access
+
+    def cold_cache(value):
+        """Parse a value with an empty memo cache."""
+        parse.cache_clear()
+        return validation.coerce_datetime(value)
+
+    cases = (
+        ('strptime', validation._strptime_datetime),  # pylint: disable=W0212
+        ('fast parser', parse.__wrapped__),
+        ('memoized, cold', cold_cache),
+        ('memoized, warm', validation.coerce_datetime),
+    )
+
+    print('{:<20} {:>14}'.format('parser', 'per call (us)'))
+    for name, func in cases:
+        call_s = measure(lambda: [func(value) for value in values], 20)
+        print('{:<20} {:>14.2f}'.format(name, call_s * 1e6 / len(values)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""Compare trip objects with a TripFrame.
+
+Run with ``python -m benchmarks.bench_frame``.
+"""
+import tracemalloc
+
+from aioautomatic import data
+from aioautomatic.frame import TripFrame
+from benchmarks import fixtures
+from benchmarks.bench_codec import measure
+
+
+def traced(func):
+    """Return the result of func and the memory it still holds."""
+    tracemalloc.start()
+    try:
+        result = func()
+        return result, tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    """Run the trip frame benchmark and print the results."""
+    pages = [fixtures.trip_page(seed=seed)['results'] for seed in range(8)]
+    raw = [trip for page in pages for trip in page]
+    # Fill the validation caches before measuring memory
+    TripFrame.from_pages(pages)
+
+    trips, objects_bytes = traced(lambda: [data.Trip(trip) for trip in raw])
+    frame, frame_bytes = traced(lambda: TripFrame.from_pages(pages))
+
+    def sum_objects():
+        """Sum distances per vehicle from trip objects."""
+        totals = {}
+        for trip in trips:
+            totals[trip.vehicle] = totals.get(trip.vehicle, 0) + (
+                trip.distance_m or 0)
+        return totals
+
+    print('{} trips'.format(len(raw)))
+    print('{:<10} {:>14} {:>22}'.format(
+        'storage', 'memory (kB)', 'sum by vehicle (us)'))
+    print('{:<10} {:>14.0f} {:>22.1f}'.format(
+        'objects', objects_bytes / 1024, measure(sum_objects, 20) * 1e6))
+    print('{:<10} {:>14.0f} {:>22.1f}'.format(
+        'frame', frame_bytes / 1024,
+        measure(lambda: frame.aggregate('distance_m'), 20) * 1e6))
+
+
+if __name__ == '__main__':
+    main()
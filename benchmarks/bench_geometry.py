@@ -0,0 +1,58 @@
+"""Compare pure Python and numpy distance computations.
+
+Run with ``python -m benchmarks.bench_geometry``.
+"""
+import math
+
+from aioautomatic import data
+from aioautomatic import geometry
+from aioautomatic.frame import TripFrame
+from benchmarks import fixtures
+from benchmarks.bench_codec import measure
+
+
+def haversine_python(lat1, lon1, lat2, lon2):
+    """Return the great circle distance between two points, in metres."""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    value = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * \
+        math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * geometry.EARTH_RADIUS_M * math.asin(math.sqrt(value))
+
+
+def main():
+    """Run the geometry benchmark and print the results."""
+    trips = [data.Trip(trip) for trip in fixtures.trip_page(
+        500, path_points=500)['results']]
+    frame = TripFrame.from_trips(trips)
+    paths = [path.tolist() for path in data.Trip.decode_paths(trips)]
+
+    def lengths_python():
+        """Sum the path distances one step at a time."""
+        return [sum(haversine_python(*start, *end)
+                    for start, end in zip(path, path[1:]))
+                for path in paths]
+
+    def distances_python():
+        """Compute the distance from every trip start to a point."""
+        return [haversine_python(trip.start_location.lat,
+                                 trip.start_location.lon, 37.8, -122.4)
+                for trip in trips]
+
+    print('{} trips of 500 points'.format(len(trips)))
+    print('{:<20} {:>12} {:>12}'.format('operation', 'python (ms)',
+                                        'numpy (ms)'))
+    print('{:<20} {:>12.2f} {:>12.2f}'.format(
+        'path lengths', measure(lengths_python, 3) * 1e3,
+        measure(lambda: geometry.path_lengths(trips), 3) * 1e3))
+    print('{:<20} {:>12.2f} {:>12.2f}'.format(
+        'distance to point', measure(distances_python, 3) * 1e3,
+        measure(lambda: geometry.distances_to(trips, 37.8, -122.4),
+                3) * 1e3))
+    print('{:<20} {:>12} {:>12.2f}'.format(
+        'frame distances', '',
+        measure(lambda: geometry.distances_to(frame, 37.8, -122.4),
+                3) * 1e3))
+
+
+if __name__ == '__main__':
+    main()
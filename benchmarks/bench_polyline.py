@@ -0,0 +1,51 @@
+"""Compare pure Python and numpy decoding of trip paths.
+
+Run with ``python -m benchmarks.bench_polyline``.
+"""
+from aioautomatic import polyline
+from benchmarks import fixtures
+from benchmarks.bench_codec import measure
+
+
+def decode_python(path, precision=polyline.PRECISION):
+    """Decode a polyline one character at a time."""
+    coords = []
+    index = lat = lon = 0
+    factor = 10 ** precision
+    while index < len(path):
+        deltas = []
+        for _ in range(2):
+            shift = value = 0
+            while True:
+                chunk = ord(path[index]) - 63
+                index += 1
+                value |= (chunk & 0x1f) << shift
+                shift += 5
+                if chunk < 0x20:
+                    break
+            deltas.append(~(value >> 1) if value & 1 else value >> 1)
+        lat += deltas[0]
+        lon += deltas[1]
+        coords.append((lat / factor, lon / factor))
+    return coords
+
+
+def main():
+    """Run the polyline benchmark and print the results."""
+    print('{:>8} {:>6} {:>16} {:>16} {:>16}'.format(
+        'points', 'trips', 'python (ms)', 'decode (ms)', 'decode_many (ms)'))
+    for points, count in ((200, 250), (2000, 50), (5000, 20)):
+        paths = [trip['path'] for trip in fixtures.trip_page(
+            count, path_points=points)['results']]
+        number = 5
+        python_s = measure(
+            lambda: [decode_python(path) for path in paths], number)
+        single_s = measure(
+            lambda: [polyline.decode(path) for path in paths], number)
+        many_s = measure(lambda: polyline.decode_many(paths), number)
+        print('{:>8} {:>6} {:>16.1f} {:>16.1f} {:>16.1f}'.format(
+            points, count, python_s * 1e3, single_s * 1e3, many_s * 1e3))
+
+
+if __name__ == '__main__':
+    main()
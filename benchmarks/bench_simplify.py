@@ -0,0 +1,69 @@
+"""Measure trip path simplification and resampling.
+
+Run with ``python -m benchmarks.bench_simplify``.
+"""
+import os
+
+from aioautomatic import data
+from aioautomatic import simplify
+from benchmarks import fixtures
+from benchmarks.bench_codec import measure
+
+
+def simplify_python(xy, tolerance, first, last, keep):
+    """Recursive Douglas-Peucker over projected points, one at a time."""
+    (start_x, start_y), (end_x, end_y) = xy[first], xy[last]
+    line_x, line_y = end_x - start_x, end_y - start_y
+    length2 = line_x * line_x + line_y * line_y
+    farthest, index = 0, None
+    for point in range(first + 1, last):
+        offset_x, offset_y = xy[point][0] - start_x, xy[point][1] - start_y
+        ratio = 0 if length2 == 0 else min(max(
+            (offset_x * line_x + offset_y * line_y) / length2, 0), 1)
+        error_x, error_y = offset_x - ratio * line_x, offset_y - ratio * line_y
+        distance2 = error_x * error_x + error_y * error_y
+        if distance2 > farthest:
+            farthest, index = distance2, point
+    if index is not None and farthest > tolerance * tolerance:
+        keep.append(index)
+        simplify_python(xy, tolerance, first, index, keep)
+        simplify_python(xy, tolerance, index, last, keep)
+    return keep
+
+
+def main():
+    """Run the simplification benchmark and print the results."""
+    path = data.Trip(fixtures.trip_page(1, path_points=5000)['results'][0])
+    coords = path.path_coordinates
+    xy = simplify._project(coords).tolist()  # pylint: disable=W0212
+    print('single path of {} points'.format(len(coords)))
+    print('{:<24} {:>10} {:>10}'.format('method', 'time (ms)', 'points'))
+    for tolerance in (5, 25):
+        python_s = measure(lambda: simplify_python(
+            xy, tolerance, 0, len(xy) - 1, [0, len(xy) - 1]), 3)
+        numpy_s = measure(lambda: simplify.simplify(coords, tolerance), 3)
+        points = len(simplify.simplify(coords, tolerance))
+        print('{:<24} {:>10.1f} {:>10}'.format(
+            'python, {} m'.format(tolerance), python_s * 1e3, points))
+        print('{:<24} {:>10.1f} {:>10}'.format(
+            'numpy, {} m'.format(tolerance), numpy_s * 1e3, points))
+    print('{:<24} {:>10.1f} {:>10}'.format(
+        'resample, 50 m', measure(lambda: simplify.resample(coords, 50),
+                                  3) * 1e3,
+        len(simplify.resample(coords, 50))))
+
+    raw = fixtures.trip_page(400, path_points=2000)['results']
+    processes = os.cpu_count() or 1
+    print('\nbatch of {} trips of 2000 points'.format(len(raw)))
+    print('{:<24} {:>10}'.format('method', 'time (ms)'))
+    serial_s = measure(lambda: simplify.simplify_trips(
+        [data.Trip(trip) for trip in raw], 10), 1)
+    print('{:<24} {:>10.1f}'.format('serial', serial_s * 1e3))
+    pool_s = measure(lambda: simplify.simplify_trips(
+        [data.Trip(trip) for trip in raw], 10, processes), 1)
+    print('{:<24} {:>10.1f}'.format(
+        '{} processes'.format(processes), pool_s * 1e3))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""Compare a spatial index query with a scan of every trip event.
+
+Run with ``python -m benchmarks.bench_spatial``.
+"""
+from aioautomatic import data
+from aioautomatic.spatial import SpatialIndex
+from benchmarks import fixtures
+from benchmarks.bench_codec import measure
+from benchmarks.bench_geometry import haversine_python
+
+# Query point within the area of the fixture events
+LAT, LON = 37.8, -122.4
+
+
+def main():
+    """Run the spatial index benchmark and print the results."""
+    trips = [data.Trip(trip)
+             for seed in range(40)
+             for trip in fixtures.trip_page(seed=seed, path_points=2)[
+                 'results']]
+
+    def scan():
+        """Find the trips with hard brakes near the point, one by one."""
+        return [trip.id for trip in trips
+                if any(event.type == 'hard_brake' and
+                       haversine_python(event.lat, event.lon, LAT, LON) <= 200
+                       for event in trip.vehicle_events or ())]
+
+    index = SpatialIndex()
+    build_s = measure(lambda: SpatialIndex().add_trips(trips), 1)
+    index.add_trips(trips)
+    assert sorted(scan()) == sorted(
+        index.within_radius(LAT, LON, 200, 'hard_brake'))
+
+    print('{} trips, {} indexed events'.format(len(trips), len(index)))
+    print('{:<24} {:>12}'.format('operation', 'time (ms)'))
+    print('{:<24} {:>12.1f}'.format('build index', build_s * 1e3))
+    print('{:<24} {:>12.3f}'.format('scan, 200 m', measure(scan, 3) * 1e3))
+    for radius in (200, 2000):
+        print('{:<24} {:>12.3f}'.format(
+            'index, {} m'.format(radius), measure(
+                lambda: index.within_radius(LAT, LON, radius, 'hard_brake'),
+                20) * 1e3))
+    print('{:<24} {:>12.3f}'.format(
+        'index, bbox', measure(lambda: index.within_bbox(
+            LAT - 0.01, LON - 0.01, LAT + 0.01, LON + 0.01), 20) * 1e3))
+
+
+if __name__ == '__main__':
+    main()
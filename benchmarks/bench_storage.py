@@ -0,0 +1,61 @@
+"""Measure saving and loading trips with the SQLite store.
+
+Run with ``python -m benchmarks.bench_storage``.
+"""
+import json
+import os
+import sqlite3
+import tempfile
+
+from aioautomatic import data
+from aioautomatic.storage import SQLiteStore
+from benchmarks import fixtures
+from benchmarks.bench_codec import measure
+
+
+def insert_one_by_one(path, trips):
+    """Save trips with a statement and a commit per trip."""
+    connection = sqlite3.connect(path)
+    connection.execute('CREATE TABLE trips (id TEXT PRIMARY KEY, data TEXT)')
+    for trip in trips:
+        connection.execute('INSERT OR REPLACE INTO trips VALUES (?, ?)', (
+            trip.id, json.dumps(trip.data, default=str)))
+        connection.commit()
+    connection.close()
+    os.remove(path)
+
+
+def upsert(path, trips):
+    """Save trips with the SQLite store."""
+    store = SQLiteStore(path)
+    store.upsert_trips(trips)
+    store.close()
+    os.remove(path)
+
+
+def main():
+    """Run the storage benchmark and print the results."""
+    trips = [data.Trip(trip) for seed in range(8)
+             for trip in fixtures.trip_page(seed=seed)['results']]
+    store = SQLiteStore(':memory:')
+    store.upsert_trips(trips)
+    eager = SQLiteStore(':memory:', lazy_validation=False)
+    eager.upsert_trips(trips)
+
+    path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+
+    print('{} trips'.format(len(trips)))
+    print('{:<28} {:>10}'.format('operation', 'time (ms)'))
+    for name, func in (
+            ('insert one by one', lambda: insert_one_by_one(path, trips)),
+            ('upsert_trips', lambda: upsert(path, trips)),
+            ('get_trips, lazy', store.get_trips),
+            ('get_trips, eager', eager.get_trips),
+            ('get_trips, one vehicle', lambda: store.get_trips(
+                vehicle=trips[0].vehicle))):
+        print('{:<28} {:>10.1f}'.format(name, measure(func, 1) * 1e3))
+    os.rmdir(os.path.dirname(path))
+
+
+if __name__ == '__main__':
+    main()
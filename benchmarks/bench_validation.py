@@ -0,0 +1,41 @@
+"""Compare voluptuous schemas with their compiled validators.
+
+Run with ``python -m benchmarks.bench_validation``.
+"""
+from aioautomatic import compiler
+from aioautomatic import data
+from aioautomatic import validation
+from benchmarks import fixtures
+from benchmarks.bench_codec import measure
+
+
+def cases():
+    """Return the benchmark name, schema and payloads of every case."""
+    result = [
+        ('TRIP', validation.TRIP, fixtures.trip_page()['results']),
+        ('VEHICLE', validation.VEHICLE, fixtures.vehicle_page()['results']),
+    ]
+    for event in fixtures.realtime_events():
+        event_class = data.REALTIME_EVENT_CLASS[event['type']]
+        result.append((event['type'], event_class.validator, [event]))
+    return result
+
+
+def main():
+    """Run the validation benchmark and print the results."""
+    print('{:<26} {:>16} {:>16} {:>8}'.format(
+        'schema', 'voluptuous (us)', 'compiled (us)', 'speedup'))
+    for name, schema, payloads in cases():
+        compiled = compiler.compile_schema(schema)
+        number = max(2000 // len(payloads), 1)
+        reference_s = measure(
+            lambda: [schema(payload) for payload in payloads], number)
+        compiled_s = measure(
+            lambda: [compiled(payload) for payload in payloads], number)
+        print('{:<26} {:>16.2f} {:>16.2f} {:>7.1f}x'.format(
+            name, reference_s * 1e6 / len(payloads),
+            compiled_s * 1e6 / len(payloads), reference_s / compiled_s))
+
+
+if __name__ == '__main__':
+    main()
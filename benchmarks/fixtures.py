@@ -0,0 +1,199 @@
+"""Realistic payloads for aioautomatic benchmarks.
+
+Payloads are generated from a fixed seed, so every run measures the same
+data.
+"""
+from datetime import datetime, timedelta, timezone
+import random
+
+from tests.common import encode_polyline, path_coords
+
+REALTIME_TYPES = (
+    'trip:finished',
+    'ignition:on',
+    'ignition:off',
+    'notification:speeding',
+    'notification:hard_brake',
+    'notification:hard_accel',
+    'mil:on',
+    'mil:off',
+    'location:updated',
+    'vehicle:status_report',
+)
+
+_EPOCH = datetime(2017, 1, 1, tzinfo=timezone.utc)
+
+
+def _timestamp(rng, offset_s=0):
+    """Return an API formatted timestamp."""
+    moment = _EPOCH + timedelta(seconds=offset_s)
+    if rng.random() < 0.8:
+        return moment.strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+    return moment.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def location(rng):
+    """Return a location payload."""
+    return {
+        'lat': 37.7 + rng.random() * 0.2,
+        'lon': -122.5 + rng.random() * 0.2,
+        'accuracy_m': rng.uniform(3, 20),
+    }
+
+
+def address(rng):
+    """Return an address payload."""
+    street = rng.choice(('Market St', 'Mission St', 'Valencia St'))
+    number = str(rng.randint(1, 2000))
+    return {
+        'name': '{} {}, San Francisco, CA'.format(number, street),
+        'display_name': '{} {}'.format(number, street),
+        'street_number': number,
+        'streen_name': street,
+        'city': 'San Francisco',
+        'state': 'CA',
+        'country': 'US',
+    }
+
+
+def vehicle_event(rng, offset_s):
+    """Return a vehicle event payload."""
+    event_type = rng.choice(('hard_brake', 'hard_accel', 'speeding'))
+    event = {
+        'type': event_type,
+        'lat': 37.7 + rng.random() * 0.2,
+        'lon': -122.5 + rng.random() * 0.2,
+        'created_at': _timestamp(rng, offset_s),
+    }
+    if event_type != 'speeding':
+        event['g_force'] = rng.uniform(0.2, 0.6)
+    return event
+
+
+def trip(rng, index, path_points=200):
+    """Return a finished trip payload."""
+    start_s = index * 5400 + rng.randint(0, 1800)
+    duration_s = rng.uniform(300, 3600)
+    trip_id = 'T_{:016x}'.format(rng.getrandbits(64))
+    vehicle_id = 'C_{:016x}'.format(rng.getrandbits(64) % 8)
+    return {
+        'url': 'https://api.automatic.com/trip/{}/'.format(trip_id),
+        'id': trip_id,
+        'driver': 'https://api.automatic.com/user/U_123/',
+        'user': 'https://api.automatic.com/user/U_123/',
+        'started_at': _timestamp(rng, start_s),
+        'ended_at': _timestamp(rng, start_s + duration_s),
+        'distance_m': rng.uniform(500, 60000),
+        'duration_s': duration_s,
+        'vehicle': 'https://api.automatic.com/vehicle/{}/'.format(vehicle_id),
+        'start_location': location(rng),
+        'end_location': location(rng),
+        'start_address': address(rng),
+        'end_address': address(rng),
+        'path': encode_polyline(path_coords(rng, path_points)),
+        'fuel_cost_usd': rng.uniform(0.5, 12),
+        'fuel_volume_l': rng.uniform(0.2, 6),
+        'average_kmpl': rng.uniform(6, 18),
+        'average_from_epa_kmpl': rng.uniform(8, 16),
+        'score_events': rng.uniform(30, 50),
+        'score_speeding': rng.uniform(30, 50),
+        'hard_brakes': rng.randint(0, 3),
+        'hard_accels': rng.randint(0, 3),
+        'duration_over_70_s': rng.randint(0, 600),
+        'duration_over_75_s': rng.randint(0, 300),
+        'duration_over_80_s': rng.randint(0, 120),
+        'vehicle_events': [vehicle_event(rng, start_s + offset)
+                           for offset in range(0, rng.randint(0, 8) * 60, 60)],
+        'start_timezone': 'America/Los_Angeles',
+        'end_timezone': 'America/Los_Angeles',
+        'city_fraction': rng.random(),
+        'highway_fraction': rng.random(),
+        'night_driving_fraction': rng.random(),
+        'idling_time_s': rng.uniform(0, 300),
+        'tags': rng.choice(([], ['business'], ['personal', 'commute'])),
+    }
+
+
+def trip_page(count=250, seed=1, path_points=200):
+    """Return a list response page of trips."""
+    rng = random.Random(seed)
+    return {
+        '_metadata': {
+            'count': count * 40,
+            'next': 'https://api.automatic.com/trip/?page=2&limit=250',
+            'previous': None,
+        },
+        'results': [trip(rng, index, path_points) for index in range(count)],
+    }
+
+
+def vehicle(rng, index):
+    """Return a vehicle payload with DTCs and a latest location."""
+    vehicle_id = 'C_{:016x}'.format(index)
+    latest = location(rng)
+    latest['created_at'] = _timestamp(rng, index)
+    return {
+        'url': 'https://api.automatic.com/vehicle/{}/'.format(vehicle_id),
+        'id': vehicle_id,
+        'vin': '1HGCM82633A{:06d}'.format(index),
+        'created_at': _timestamp(rng, 0),
+        'updated_at': _timestamp(rng, index * 60),
+        'make': 'Honda',
+        'model': 'Accord',
+        'year': 2003,
+        'submodel': 'EX',
+        'display_name': 'Car {}'.format(index),
+        'fuel_grade': 'regular',
+        'fuel_level_percent': rng.uniform(5, 100),
+        'battery_voltage': rng.uniform(11.5, 14.5),
+        'active_dtcs': [{
+            'code': 'P0{:03d}'.format(rng.randint(100, 999)),
+            'description': 'Diagnostic trouble code',
+            'created_at': _timestamp(rng, index),
+        } for _ in range(rng.randint(1, 3))],
+        'latest_location': latest,
+    }
+
+
+def vehicle_page(count=250, seed=2):
+    """Return a list response page of vehicles."""
+    rng = random.Random(seed)
+    return {
+        '_metadata': {'count': count, 'next': None, 'previous': None},
+        'results': [vehicle(rng, index) for index in range(count)],
+    }
+
+
+def realtime_event(event_type, seed=3):
+    """Return a realtime event payload of the given type."""
+    rng = random.Random(seed)
+    event = {
+        'id': 'E_{:016x}'.format(rng.getrandbits(64)),
+        'user': {
+            'id': 'U_123',
+            'url': 'https://api.automatic.com/user/U_123/',
+        },
+        'type': event_type,
+        'created_at': _timestamp(rng, 100),
+        'time_zone': 'America/Los_Angeles',
+        'location': dict(location(rng), created_at=_timestamp(rng, 100)),
+        'vehicle': vehicle(rng, 1),
+        'device': {'id': 'D_456'},
+    }
+    if event_type == 'trip:finished':
+        event['trip'] = trip(rng, 0)
+    elif event_type == 'notification:speeding':
+        event['velocity_kph'] = rng.uniform(110, 140)
+    elif event_type in ('notification:hard_brake',
+                        'notification:hard_accel'):
+        event['g_force'] = rng.uniform(0.3, 0.6)
+    elif event_type in ('mil:on', 'mil:off'):
+        event['dtcs'] = vehicle(rng, 2)['active_dtcs']
+        if event_type == 'mil:off':
+            event['user_cleared'] = True
+    return event
+
+
+def realtime_events():
+    """Return one realtime event payload of every type."""
+    return [realtime_event(event_type) for event_type in REALTIME_TYPES]
@@ -0,0 +1,244 @@
+"""Benchmark suite with machine readable results.
+
+Run with ``python -m benchmarks``. Every case reports the best time per
+item in microseconds. Results can be written as json with ``--output``,
+and compared with a baseline saved by ``--save-baseline``: the run fails
+when a case is slower than its baseline by more than ``--max-regression``.
+Baselines are only comparable on the same machine and Python version, so
+save one before a change and compare with it afterwards::
+
+    tox -e bench -- --save-baseline baseline.json
+    tox -e bench -- --baseline baseline.json
+"""
+import argparse
+import asyncio
+import json
+import platform
+import sys
+
+from aioautomatic import base
+from aioautomatic import data
+from aioautomatic import socketio
+from aioautomatic import validation
+from aioautomatic.client import Client
+from benchmarks import fixtures
+from benchmarks.bench_codec import measure
+
+VERSION = 1
+
+# Default slowdown allowed over a baseline, as a fraction of its time
+DEFAULT_MAX_REGRESSION = 0.25
+
+
+class _OfflineSession():
+    """Client session of a client which never sends requests."""
+
+    closed = True
+
+    def __init__(self, loop):
+        """Create an offline session running callbacks on a loop."""
+        self.loop = loop
+
+
+def _engineio_content(packets):
+    """Return socketIO packets framed as engineIO binary content.
+
+    Every packet is preceded by a zero byte, its length as one byte per
+    decimal digit and a 255 byte.
+    """
+    frames = []
+    for packet in packets:
+        text = packet.encode('utf-8')
+        frames.append(b'\x00' + bytes(int(digit) for digit in str(len(text)))
+                      + b'\xff' + text)
+    return b''.join(frames)
+
+
+def _validate(schema, payloads):
+    """Return a case validating payloads."""
+    return lambda: [validation.validate(schema, item) for item in payloads]
+
+
+def _construct(factory, payloads, lazy):
+    """Return a case creating data objects from payloads."""
+    return lambda: [factory(item, lazy) for item in payloads]
+
+
+def _packets(client, packets):
+    """Return a case handling socketIO packets and their callbacks."""
+    loop = client.loop
+
+    def handle():
+        """Handle every packet, then run the scheduled callbacks."""
+        for packet in packets:
+            client._handle_packet(packet)  # pylint: disable=protected-access
+        loop.call_soon(loop.stop)
+        loop.run_forever()
+    return handle
+
+
+def cases(loop):
+    """Return the name, function and item count of every case."""
+    trips = fixtures.trip_page()
+    vehicles = fixtures.vehicle_page()
+    events = fixtures.realtime_events()
+    packets = ['42' + json.dumps([event['type'], event])
+               for event in events]
+    content = _engineio_content(packets * 10)
+
+    clients = {}
+    for lazy in (False, True):
+        client = Client('bench_id', 'bench_secret', _OfflineSession(loop),
+                        lazy_validation=lazy)
+        for event_type in data.REALTIME_EVENT_CLASS:
+            client.on(event_type, lambda name, event: None)
+        clients[lazy] = client
+
+    result = [
+        ('validate.trip', _validate(validation.TRIP, trips['results']),
+         len(trips['results'])),
+        ('validate.vehicle',
+         _validate(validation.VEHICLE, vehicles['results']),
+         len(vehicles['results'])),
+    ]
+    for event in events:
+        result.append((
+            'validate.{}'.format(event['type']),
+            _validate(data.REALTIME_EVENT_CLASS[event['type']].validator,
+                      [event]), 1))
+    for lazy, mode in ((False, 'eager'), (True, 'lazy')):
+        result.extend([
+            ('data.trip.{}'.format(mode),
+             _construct(data.Trip, trips['results'], lazy),
+             len(trips['results'])),
+            ('data.vehicle.{}'.format(mode),
+             _construct(data.Vehicle, vehicles['results'], lazy),
+             len(vehicles['results'])),
+            ('result_list.trip.{}'.format(mode),
+             lambda client=clients[lazy]: base.ResultList(
+                 client, trips, data.Trip), len(trips['results'])),
+            ('result_list.vehicle.{}'.format(mode),
+             lambda client=clients[lazy]: base.ResultList(
+                 client, vehicles, data.Vehicle), len(vehicles['results'])),
+            ('client.handle_packet.{}'.format(mode),
+             _packets(clients[lazy], packets), len(packets)),
+        ])
+    result.append((
+        'socketio.decode_engineio',
+        lambda: list(socketio.decode_engineIO_content(content)),
+        len(packets) * 10))
+    return result
+
+
+def run(pattern=None, budget_s=0.2):
+    """Run the benchmark cases and return the results as a dict.
+
+    :param pattern: Only run the cases with this substring in their name
+    :param budget_s: Approximate time of each timing repeat, in seconds
+    """
+    loop = asyncio.new_event_loop()
+    try:
+        results = {}
+        for name, func, items in cases(loop):
+            if pattern is not None and pattern not in name:
+                continue
+            # Warm up the validation caches and estimate the call time
+            once = measure(func, 1)
+            number = max(int(budget_s / max(once, 1e-9)), 1)
+            results[name] = {
+                'items': items,
+                'us_per_item': measure(func, number) * 1e6 / items,
+            }
+    finally:
+        loop.close()
+    return {
+        'version': VERSION,
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'results': results,
+    }
+
+
+def compare(results, baseline, max_regression=DEFAULT_MAX_REGRESSION):
+    """Compare results with a baseline.
+
+    Cases missing from either side are ignored.
+
+    :param results: Dict returned by run
+    :param baseline: Dict returned by run, such as a loaded baseline file
+    :param max_regression: Slowdown allowed, as a fraction of the baseline
+    :returns: List of (name, baseline us, current us) of the regressions
+    """
+    regressions = []
+    for name, current in sorted(results['results'].items()):
+        reference = baseline['results'].get(name)
+        if reference is None:
+            continue
+        if current['us_per_item'] > \
+                reference['us_per_item'] * (1 + max_regression):
+            regressions.append((name, reference['us_per_item'],
+                                current['us_per_item']))
+    return regressions
+
+
+def _write(path, results):
+    """Write results to a json file."""
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(results, file, indent=2, sort_keys=True)
+        file.write('\n')
+
+
+def main(argv=None):
+    """Run the benchmark suite and return the exit status."""
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks', description=__doc__.split('\n')[0])
+    parser.add_argument('-k', dest='pattern',
+                        help='only run the cases matching this substring')
+    parser.add_argument('--output', help='write the results to a json file')
+    parser.add_argument('--baseline',
+                        help='compare the results with a json baseline')
+    parser.add_argument('--save-baseline', metavar='PATH',
+                        help='write the results as a new baseline')
+    parser.add_argument('--max-regression', type=float,
+                        default=DEFAULT_MAX_REGRESSION,
+                        help='slowdown allowed over the baseline, as a '
+                             'fraction (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file:
+            baseline = json.load(file)
+
+    results = run(args.pattern)
+    print('{:<36} {:>12} {:>12} {:>8}'.format(
+        'case', 'us/item', 'baseline', 'change'))
+    for name, current in sorted(results['results'].items()):
+        reference = baseline and baseline['results'].get(name)
+        if reference:
+            print('{:<36} {:>12.2f} {:>12.2f} {:>+7.0%}'.format(
+                name, current['us_per_item'], reference['us_per_item'],
+                current['us_per_item'] / reference['us_per_item'] - 1))
+        else:
+            print('{:<36} {:>12.2f}'.format(name, current['us_per_item']))
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            _write(path, results)
+
+    if baseline is None:
+        return 0
+    if (baseline.get('python'), baseline.get('implementation')) != (
+            results['python'], results['implementation']):
+        print('Baseline recorded with {} {}, results may not be '
+              'comparable'.format(baseline.get('implementation'),
+                                  baseline.get('python')))
+    regressions = compare(results, baseline, args.max_regression)
+    for name, reference, current in regressions:
+        print('Regression in {}: {:.2f} us/item, baseline {:.2f} '
+              'us/item'.format(name, current, reference))
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
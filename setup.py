@@ -8,6 +8,11 @@ requirements = [
     "voluptuous>=0.9.3",
 ]
 
+extras = {
+    "numpy": ["numpy>=1.13.0"],
+    "timezones": ["python-dateutil>=2.6.0; python_version<'3.9'"],
+}
+
 setup(
     name='aioautomatic',
     version='0.6.5',
@@ -23,6 +28,7 @@ setup(
                  'aioautomatic'},
     include_package_data=True,
     install_requires=requirements,
+    extras_require=extras,
     license="Apache Software License 2.0",
     zip_safe=False,
     keywords='aioautomatic',
@@ -1,4 +1,4 @@
-"""Common classes for tests."""
+"""Common classes and payload helpers for tests."""
 import asyncio
 
 from unittest.mock import MagicMock
@@ -18,3 +18,49 @@ class SessionMock(AsyncMock):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.__bool__ = lambda _: True
+
+
+def minimal_trip(trip_id="mock_id", start=(1, 2), end=None, **fields):
+    """Return a trip payload with only the required and given fields.
+
+    :param start: (lat, lon) of the start location
+    :param end: (lat, lon) of the end location, defaults to start
+    :param fields: Other trip fields
+    """
+    end = start if end is None else end
+    return dict({
+        "url": "mock_url",
+        "id": trip_id,
+        "start_location": {"lat": start[0], "lon": start[1],
+                           "accuracy_m": 3},
+        "end_location": {"lat": end[0], "lon": end[1], "accuracy_m": 3},
+    }, **fields)
+
+
+def encode_polyline(coords):
+    """Encode (lat, lon) pairs with the Google polyline algorithm."""
+    chunks = []
+    prev_lat = prev_lon = 0
+    for lat, lon in coords:
+        lat_e5 = int(round(lat * 1e5))
+        lon_e5 = int(round(lon * 1e5))
+        for delta in (lat_e5 - prev_lat, lon_e5 - prev_lon):
+            value = ~(delta << 1) if delta < 0 else delta << 1
+            while value >= 0x20:
+                chunks.append(chr((0x20 | (value & 0x1f)) + 63))
+                value >>= 5
+            chunks.append(chr(value + 63))
+        prev_lat, prev_lon = lat_e5, lon_e5
+    return "".join(chunks)
+
+
+def path_coords(rng, points):
+    """Return a random walk of (lat, lon) points."""
+    lat = 37.7 + rng.random() * 0.2
+    lon = -122.5 + rng.random() * 0.2
+    coords = []
+    for _ in range(points):
+        lat += rng.uniform(-0.0005, 0.0005)
+        lon += rng.uniform(-0.0005, 0.0005)
+        coords.append((lat, lon))
+    return coords
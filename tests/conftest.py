@@ -1,5 +1,6 @@
 """Common fixtures for tests."""
 from aioautomatic.client import Client
+from aioautomatic.codec import STDLIB_CODEC
 from aioautomatic.session import Session
 
 import pytest
@@ -27,6 +28,13 @@ def session(aiohttp_session):
     client = AsyncMock()
     client.client_session = aiohttp_session
     client.request_kwargs = {}
+    client.response_cache = None
+    client.request_coalescer = None
+    client.rate_limiter = None
+    client.retry_policy = None
+    client.hedge_policy = None
+    client.json_codec = STDLIB_CODEC
+    client.lazy_validation = False
     data = {
         "access_token": "123",
         "refresh_token": "ABCD",
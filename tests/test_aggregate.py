@@ -0,0 +1,96 @@
+"""Tests for automatic trip aggregates."""
+from datetime import date, timezone
+
+from aioautomatic import aggregate
+from aioautomatic import data
+
+import pytest
+from benchmarks import fixtures
+from tests.common import minimal_trip
+
+HAS_TIMEZONES = aggregate.get_timezone("America/Los_Angeles") is not \
+    timezone.utc
+
+
+def test_add_trips():
+    """Test daily and weekly totals."""
+    aggregator = aggregate.TripAggregator()
+    trip = minimal_trip
+    added = aggregator.add_trips([
+        trip("T1", vehicle="V1", started_at="2017-01-02T08:00:00Z",
+             distance_m=1000, duration_s=600, hard_brakes=1,
+             duration_over_70_s=30),
+        data.Trip(trip("T2", vehicle="V1", started_at="2017-01-02T18:00:00Z",
+                       distance_m=500.5, fuel_cost_usd=1.5)),
+        trip("T3", vehicle="V1", started_at="2017-01-08T08:00:00Z",
+             distance_m=2000),
+        trip("T4", vehicle="V2", started_at="2017-01-02T08:00:00Z",
+             idling_time_s=60),
+        trip("T1", vehicle="V1", started_at="2017-01-02T08:00:00Z",
+             distance_m=1000),
+        trip("T5", vehicle="V1", distance_m=1000),
+    ])
+    assert added == 4
+
+    snapshot = aggregator.snapshot()
+    day = snapshot.daily[("V1", date(2017, 1, 2))]
+    assert day.trips == 2
+    assert day.distance_m == 1500.5
+    assert day.duration_s == 600
+    assert day.fuel_cost_usd == 1.5
+    assert day.hard_brakes == 1
+    assert day.duration_over_70_s == 30
+    assert day.idling_time_s == 0
+    assert snapshot.vehicle_daily("V2") == {
+        date(2017, 1, 2): aggregate.Totals(1, 0, 0, 0, 0, 0, 0, 0, 0, 60)}
+
+    # Weeks start on Monday
+    weekly = snapshot.vehicle_weekly("V1")
+    assert sorted(weekly) == [date(2017, 1, 2)]
+    assert weekly[date(2017, 1, 2)].trips == 3
+    assert weekly[date(2017, 1, 2)].distance_m == 3500.5
+
+    # Snapshots are not modified by later trips
+    aggregator.add_trip(
+        trip("T6", vehicle="V1", started_at="2017-01-02T09:00:00Z"))
+    assert snapshot.daily[("V1", date(2017, 1, 2))].trips == 2
+    assert aggregator.snapshot().daily[("V1", date(2017, 1, 2))].trips == 3
+
+
+@pytest.mark.skipif(not HAS_TIMEZONES, reason="No time zone database")
+def test_time_zones():
+    """Test bucketing trips by their local start date."""
+    def trip(trip_id, **kwargs):
+        return minimal_trip(
+            trip_id, vehicle="V1", started_at="2017-01-02T03:00:00Z", **kwargs)
+
+    aggregator = aggregate.TripAggregator()
+    aggregator.add_trip(trip("T1", start_timezone="America/Los_Angeles"))
+    aggregator.add_trip(trip("T2", start_timezone="Unknown/Zone"))
+    aggregator.add_trip(trip("T3"))
+    daily = aggregator.snapshot().vehicle_daily("V1")
+    assert daily[date(2017, 1, 1)].trips == 1
+    assert daily[date(2017, 1, 2)].trips == 2
+    # The local Sunday belongs to the previous week
+    assert sorted(aggregator.snapshot().vehicle_weekly("V1")) == [
+        date(2016, 12, 26), date(2017, 1, 2)]
+
+    aggregator = aggregate.TripAggregator("America/Los_Angeles")
+    aggregator.add_trip(trip("T3"))
+    assert list(aggregator.snapshot().vehicle_daily("V1")) == [
+        date(2017, 1, 1)]
+
+
+def test_on_event(client):
+    """Test adding the trips of realtime events."""
+    aggregator = aggregate.TripAggregator()
+    payload = fixtures.realtime_event("trip:finished")
+    event = data.RealtimeTripFinished(client, payload)
+    aggregator.on_event("trip:finished", event)
+    aggregator.on_event("trip:finished", event)
+    aggregator.on_event("ignition:on", data.RealtimeIgnitionOn(
+        client, fixtures.realtime_event("ignition:on")))
+    totals = list(aggregator.snapshot().daily.values())
+    assert len(totals) == 1
+    assert totals[0].trips == 1
+    assert totals[0].distance_m == payload["trip"]["distance_m"]
@@ -0,0 +1,106 @@
+"""Tests for automatic trip archives."""
+from datetime import datetime, timezone
+import os
+
+from aioautomatic import data
+
+import pytest
+from benchmarks import fixtures
+from tests.common import minimal_trip
+
+np = pytest.importorskip("numpy")
+from aioautomatic import archive  # noqa: E402
+
+
+def test_append_and_read(tmpdir):
+    """Test that archived trips keep all of their data."""
+    page = fixtures.trip_page(20)
+    trips = [data.Trip(trip) for trip in page["results"]]
+    trip_archive = archive.TripArchive(str(tmpdir))
+    assert len(trip_archive) == 0
+    trip_archive.append_page(page)
+    trip_archive.append(trips[:5])
+    assert len(trip_archive) == 25
+
+    for index, trip in enumerate(trips + trips[:5]):
+        assert trip_archive[index].data == trip.data
+    assert [trip.id for trip in trip_archive.trips(slice(18, 22))] == \
+        [trip.id for trip in trips[18:] + trips[:2]]
+    assert trip_archive.trips(3)[0].id == trips[3].id
+    assert len(trip_archive.trips()) == 25
+
+    np.testing.assert_array_equal(
+        trip_archive["distance_m"][:20],
+        [trip.distance_m for trip in trips])
+    assert isinstance(trip_archive.records, np.memmap)
+    trip_archive.close()
+
+    # Reopen the archive
+    trip_archive = archive.TripArchive(str(tmpdir), lazy_validation=False)
+    assert trip_archive[24].data == trips[4].data
+    trip_archive.close()
+
+
+def test_missing_values(tmpdir):
+    """Test archiving trips without optional fields."""
+    trip_archive = archive.TripArchive(str(tmpdir))
+    trip_archive.append([minimal_trip(
+        "T1", end=(5, 2), started_at=None, hard_brakes=2)])
+    trip = trip_archive[0]
+    assert trip.started_at is None
+    assert trip.distance_m is None
+    assert trip.hard_brakes == 2
+    assert isinstance(trip.hard_brakes, int)
+    assert trip.end_location.lat == 5
+    assert trip_archive["end_lat"][0] == 5
+    assert np.isnat(trip_archive["started_at"][0])
+    trip_archive.append([])
+    assert len(trip_archive) == 1
+
+
+def test_between(tmpdir):
+    """Test selecting trips by start time."""
+    trip_archive = archive.TripArchive(str(tmpdir))
+    trip_archive.append([minimal_trip(
+        "T{}".format(day), started_at="2017-01-0{}T00:00:00Z".format(day))
+        for day in range(1, 6)])
+    indexes = trip_archive.between(
+        datetime(2017, 1, 2, tzinfo=timezone.utc),
+        datetime(2017, 1, 4, tzinfo=timezone.utc))
+    assert indexes == slice(1, 3)
+    assert np.shares_memory(trip_archive.records[indexes],
+                            trip_archive.records)
+    assert [trip.id for trip in trip_archive.trips(indexes)] == ["T2", "T3"]
+    assert trip_archive.between() == slice(0, 5)
+    assert trip_archive.between(
+        start=datetime(2017, 2, 1, tzinfo=timezone.utc)) == slice(5, 5)
+
+    # Trips appended out of order are selected with an index array
+    trip_archive.append([
+        minimal_trip("T0", started_at="2016-12-31T00:00:00Z"),
+        minimal_trip("T9")])
+    indexes = trip_archive.between(
+        end=datetime(2017, 1, 3, tzinfo=timezone.utc))
+    assert [trip.id for trip in trip_archive.trips(indexes)] == \
+        ["T1", "T2", "T0"]
+
+
+def test_partial_append(tmpdir):
+    """Test that a partial record left by an interrupted append is dropped."""
+    trip_archive = archive.TripArchive(str(tmpdir))
+    trip_archive.append([minimal_trip("T1")])
+    trip_archive.close()
+    with open(str(tmpdir.join("trips.rec")), "ab") as file:
+        file.write(b"partial")
+    assert len(trip_archive) == 1
+    trip_archive.append([minimal_trip("T2")])
+    assert [trip.id for trip in trip_archive.trips()] == ["T1", "T2"]
+    assert os.path.getsize(str(tmpdir.join("trips.rec"))) == \
+        2 * archive.record_dtype().itemsize
+
+
+def test_format_mismatch(tmpdir):
+    """Test that archives of another format are rejected."""
+    tmpdir.join("archive.json").write('{"version": 0}')
+    with pytest.raises(ValueError):
+        archive.TripArchive(str(tmpdir))
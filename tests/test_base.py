@@ -1,12 +1,13 @@
 """Tests for automatic base objects."""
 import asyncio
+import json
 import aiohttp
 import voluptuous as vol
 from aioautomatic import base
 from aioautomatic import exceptions
 
 import pytest
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 from tests.common import AsyncMock
 
 
@@ -215,6 +216,112 @@ def test_base_data_object():
         obj.attr3
 
 
+class MockParentObject(base.BaseDataObject):
+    validator = vol.Schema({
+        "attr1": str,
+        vol.Optional("attr2", default=None): vol.Any(int, None),
+        vol.Optional("child"): vol.Any(MockDataObject.validator, None),
+        vol.Optional("items", default=[]): [MockDataObject.validator],
+    }, required=True, extra=vol.REMOVE_EXTRA)
+    children = {
+        "child": MockDataObject,
+        "items": [MockDataObject],
+    }
+
+
+def test_base_data_object_lazy():
+    """Test validating fields of a data object on first access."""
+    raw = {
+        "attr1": "value1",
+        "attr3": "value3",
+        "child": {"attr1": 1},
+        "items": [{"attr1": "item1"}],
+    }
+    obj = MockParentObject(raw, lazy=True)
+
+    assert obj.attr1 == "value1"
+    assert MockParentObject.attr1.__get__(obj) == "value1"
+    assert obj.attr2 is None
+    assert obj.items[0].attr1 == "item1"
+    with pytest.raises(AttributeError):
+        obj.attr3
+    with pytest.raises(exceptions.InvalidMessageError):
+        obj.child.attr1
+    with pytest.raises(exceptions.InvalidMessageError):
+        obj.data
+
+    raw["child"] = {"attr1": "child1"}
+    obj = MockParentObject(raw, lazy=True)
+    assert obj.child.attr1 == "child1"
+    assert obj.data == {
+        "attr1": "value1",
+        "attr2": None,
+        "child": {"attr1": "child1"},
+        "items": [{"attr1": "item1"}],
+    }
+
+
+def test_base_data_object_lazy_missing_field():
+    """Test lazy validation of missing fields."""
+    obj = MockParentObject({"attr2": "invalid"}, lazy=True)
+    with pytest.raises(exceptions.InvalidMessageError):
+        obj.attr1
+    with pytest.raises(exceptions.InvalidMessageError):
+        obj.attr2
+    with pytest.raises(AttributeError):
+        obj.child
+    assert obj.items == []
+
+    with pytest.raises(exceptions.InvalidMessageError):
+        MockParentObject(["attr1"], lazy=True)
+
+
+def test_base_data_object_lazy_repr():
+    """Test the representation of lazy objects with an invalid id."""
+    class MockIdObject(base.BaseDataObject):
+        validator = vol.Schema({"id": str}, required=True)
+
+    assert repr(MockIdObject({"id": "id1"}, lazy=True)).endswith(
+        'MockIdObject id="id1">')
+    for raw in ({}, {"id": 1}):
+        assert repr(MockIdObject(raw, lazy=True)).startswith(
+            "<tests.test_base")
+
+
+def test_base_data_object_children():
+    """Test converting nested data in eager mode."""
+    obj = MockParentObject({"attr1": "value1", "child": None})
+    assert obj.child is None
+    assert obj.items == []
+    assert obj.data["child"] is None
+
+
+def test_base_data_object_slots():
+    """Test that fields are stored in generated slots."""
+    obj = MockParentObject({
+        "attr1": "value1",
+        "child": {"attr1": "child1"},
+        "items": [{"attr1": "item1"}],
+    })
+    assert not hasattr(obj, "__dict__")
+    assert MockParentObject.__slots__ == ("attr1", "attr2", "child", "items")
+    assert obj.data == {
+        "attr1": "value1",
+        "attr2": None,
+        "child": {"attr1": "child1"},
+        "items": [{"attr1": "item1"}],
+    }
+    with pytest.raises(AttributeError):
+        obj.attr3 = "value3"
+
+
+def test_base_data_object_slot_conflict():
+    """Test that fields may not hide class attributes."""
+    with pytest.raises(TypeError):
+        class ConflictDataObject(base.BaseDataObject):
+            validator = vol.Schema({"data": str})
+
+
 def test_result_list(session):
     """Test the result object."""
     obj = base.ResultList(parent=session, item_class=MockDataObject, resp={
@@ -323,3 +430,267 @@ def test_result_previous_list(session):
     assert len(previous_list) == 2
     assert sorted([item.attr1 for item in previous_list]) == \
         sorted(["value1", "value3"])
+
+
+def _list_response(next_url, *values):
+    """Return a mock response for a list page."""
+    resp = AsyncMock()
+    resp.status = 200
+    resp.json.return_value = {
+        "_metadata": {
+            "count": len(values),
+            "next": next_url,
+            "previous": None,
+            },
+        "results": [{"attr1": value} for value in values],
+    }
+    return resp
+
+
+def test_result_iterator(session):
+    """Test iterating over every page of a result list."""
+    session._client_session.request.side_effect = [
+        _list_response("page_2", "value1", "value2"),
+        _list_response("page_3"),
+        _list_response(None, "value3"),
+    ]
+    iterator = base.ResultIterator(session, "page_1", MockDataObject)
+
+    @asyncio.coroutine
+    def consume():
+        items = []
+        while True:
+            item = yield from iterator.next()
+            if item is None:
+                return items
+            items.append(item.attr1)
+
+    items = session.loop.run_until_complete(consume())
+    assert items == ["value1", "value2", "value3"]
+    urls = [call[1][1] for call in session._client_session.request.mock_calls
+            if call[0] == ""]
+    assert urls == ["page_1", "page_2", "page_3"]
+
+
+def test_result_iterator_prefetch_limit(session):
+    """Test that pages are only fetched ahead up to the prefetch limit."""
+    session._client_session.request.side_effect = [
+        _list_response("page_2", "value1"),
+        _list_response("page_3", "value2"),
+        _list_response(None, "value3"),
+    ]
+    iterator = base.ResultIterator(
+        session, "page_1", MockDataObject, prefetch=1)
+
+    item = session.loop.run_until_complete(iterator.__anext__())
+    session.loop.run_until_complete(asyncio.sleep(0.01))
+    assert item.attr1 == "value1"
+    assert session._client_session.request.call_count == 2
+
+    iterator.close()
+    with pytest.raises(StopAsyncIteration):
+        session.loop.run_until_complete(iterator.__anext__())
+
+
+def test_result_iterator_error(session):
+    """Test that request errors are raised to the consumer."""
+    error = _list_response(None)
+    error.status = 500
+    session._client_session.request.side_effect = [
+        _list_response("page_2", "value1"),
+        error,
+    ]
+    iterator = base.ResultIterator(session, "page_1", MockDataObject)
+
+    item = session.loop.run_until_complete(iterator.__anext__())
+    assert item.attr1 == "value1"
+    with pytest.raises(exceptions.InternalError):
+        session.loop.run_until_complete(iterator.__anext__())
+    with pytest.raises(StopAsyncIteration):
+        session.loop.run_until_complete(iterator.__anext__())
+
+
+def test_result_iterator_exhausted(session):
+    """Test that an exhausted iterator keeps raising StopAsyncIteration."""
+    session._client_session.request.side_effect = [
+        _list_response(None, "value1"),
+    ]
+    iterator = base.ResultIterator(session, "page_1", MockDataObject)
+
+    item = session.loop.run_until_complete(iterator.__anext__())
+    assert item.attr1 == "value1"
+    for _ in range(2):
+        with pytest.raises(StopAsyncIteration):
+            session.loop.run_until_complete(
+                asyncio.wait_for(iterator.__anext__(), 1))
+
+
+def test_result_iterator_context(session):
+    """Test that leaving the iterator context stops fetching pages."""
+    session._client_session.request.side_effect = [
+        _list_response("page_2", "value1"),
+        _list_response("page_3", "value2"),
+    ]
+    iterator = base.ResultIterator(
+        session, "page_1", MockDataObject, prefetch=1)
+
+    @asyncio.coroutine
+    def consume():
+        context = yield from iterator.__aenter__()
+        try:
+            return (yield from context.__anext__())
+        finally:
+            yield from iterator.__aexit__(None, None, None)
+
+    item = session.loop.run_until_complete(consume())
+    assert item.attr1 == "value1"
+    session.loop.run_until_complete(asyncio.sleep(0.01))
+    assert iterator._fetch_task.cancelled()
+
+
+def test_result_iterator_invalid_prefetch(session):
+    """Test that the prefetch limit must be positive."""
+    with pytest.raises(ValueError):
+        base.ResultIterator(session, "page_1", MockDataObject, prefetch=0)
+
+
+def _stream_response(next_url, *values, chunk_size=16):
+    """Return a mock response streaming a list page in small chunks."""
+    body = json.dumps({
+        "_metadata": {
+            "count": len(values),
+            "next": next_url,
+            "previous": None,
+            },
+        "results": [{"attr1": value} for value in values],
+    }).encode('utf-8')
+    resp = MagicMock()
+    resp.status = 200
+    resp.content.read = AsyncMock(side_effect=[
+        body[start:start + chunk_size]
+        for start in range(0, len(body), chunk_size)] + [b''])
+    return resp
+
+
+def test_result_stream(session):
+    """Test streaming every page of a result list."""
+    session._client_session.request.side_effect = [
+        _stream_response("page_2", "value1", "value2"),
+        _stream_response("page_3"),
+        _stream_response(None, "value3"),
+    ]
+    stream = base.ResultStream(session, "page_1", MockDataObject)
+
+    @asyncio.coroutine
+    def consume():
+        items = []
+        while True:
+            item = yield from stream.next()
+            if item is None:
+                return items
+            items.append(item.attr1)
+
+    items = session.loop.run_until_complete(consume())
+    assert items == ["value1", "value2", "value3"]
+    urls = [call[1][1] for call in session._client_session.request.mock_calls
+            if call[0] == ""]
+    assert urls == ["page_1", "page_2", "page_3"]
+
+
+def test_result_stream_invalid_body(session):
+    """Test that a malformed page raises InvalidResponseError."""
+    resp = MagicMock()
+    resp.status = 200
+    resp.content.read = AsyncMock(side_effect=[b'{"results": [{"a', b''])
+    session._client_session.request.return_value = resp
+    stream = base.ResultStream(session, "page_1", MockDataObject)
+
+    with pytest.raises(exceptions.InvalidResponseError):
+        session.loop.run_until_complete(stream.__anext__())
+    assert resp.close.called
+    with pytest.raises(StopAsyncIteration):
+        session.loop.run_until_complete(stream.__anext__())
+
+
+@pytest.mark.parametrize("results", [None, {"attr1": "value1"}, "missing"])
+def test_result_stream_invalid_results(session, results):
+    """Test that a page without a results array is rejected."""
+    page = {"_metadata": {"count": 1, "next": None, "previous": None}}
+    if results != "missing":
+        page["results"] = results
+    resp = MagicMock()
+    resp.status = 200
+    resp.content.read = AsyncMock(
+        side_effect=[json.dumps(page).encode('utf-8'), b''])
+    session._client_session.request.return_value = resp
+    stream = base.ResultStream(session, "page_1", MockDataObject)
+
+    with pytest.raises(exceptions.InvalidMessageError):
+        session.loop.run_until_complete(stream.__anext__())
+    with pytest.raises(StopAsyncIteration):
+        session.loop.run_until_complete(stream.__anext__())
+
+
+def test_result_stream_context(session):
+    """Test that leaving the stream context closes its response."""
+    resp = _stream_response("page_2", "value1", "value2")
+    session._client_session.request.return_value = resp
+    stream = base.ResultStream(session, "page_1", MockDataObject)
+
+    @asyncio.coroutine
+    def consume():
+        context = yield from stream.__aenter__()
+        try:
+            return (yield from context.__anext__())
+        finally:
+            yield from stream.__aexit__(None, None, None)
+
+    item = session.loop.run_until_complete(consume())
+    assert item.attr1 == "value1"
+    assert resp.close.called
+    with pytest.raises(StopAsyncIteration):
+        session.loop.run_until_complete(stream.__anext__())
+
+
+def test_get_all_pages(session):
+    """Test fetching every page of a list concurrently."""
+    pages = {
+        "1": ["value1", "value2"],
+        "2": ["value2", "value3"],
+        "3": ["value4"],
+    }
+
+    def side_effect(method, url, **kwargs):
+        query = dict(
+            param.split("=") for param in url.split("?")[1].split("&"))
+        assert query["limit"] == "2"
+        resp = _list_response(None, *pages[query["page"]])
+        resp.json.return_value["_metadata"]["count"] = 5
+        for item in resp.json.return_value["results"]:
+            item["id"] = item["attr1"]
+        return resp
+
+    session._client_session.request.side_effect = side_effect
+    resp = session.loop.run_until_complete(
+        session._get_all_pages("list_url", {"limit": 2}, 2))
+    assert [item["id"] for item in resp["results"]] == [
+        "value1", "value2", "value3", "value4"]
+    assert resp["_metadata"]["count"] == 5
+    assert resp["_metadata"]["next"] is None
+    assert session._client_session.request.call_count == 3
+
+
+def test_get_all_pages_empty(session):
+    """Test fanning out over an empty list."""
+    session._client_session.request.return_value = _list_response(None)
+    resp = session.loop.run_until_complete(
+        session._get_all_pages("list_url", {}, 4))
+    assert resp["results"] == []
+    assert session._client_session.request.call_count == 1
+
+
+def test_get_all_pages_invalid_concurrency(session):
+    """Test that the concurrency limit must be positive."""
+    with pytest.raises(ValueError):
+        session.loop.run_until_complete(
+            session._get_all_pages("list_url", {}, 0))
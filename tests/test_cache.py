@@ -0,0 +1,189 @@
+"""Tests for automatic response caching."""
+import asyncio
+import math
+
+from aioautomatic import base
+from aioautomatic import cache
+from aioautomatic import exceptions
+
+from unittest.mock import patch
+from tests.common import AsyncMock
+
+TRIP_URL = "https://api.automatic.com/trip/mock_id"
+VEHICLE_URL = "https://api.automatic.com/vehicle/mock_id"
+
+
+def _response(data, status=200, headers=None):
+    """Return a mock response object."""
+    resp = AsyncMock()
+    resp.status = status
+    resp.headers = headers or {}
+    resp.json.return_value = data
+    return resp
+
+
+def test_finished_trip_ttl():
+    """Test that only finished trips are cached forever."""
+    assert cache.finished_trip_ttl({"ended_at": "mock"}) == math.inf
+    assert cache.finished_trip_ttl({"ended_at": None}) == 0
+
+
+def test_is_cacheable():
+    """Test that only configured endpoints are cached."""
+    response_cache = cache.ResponseCache()
+    assert response_cache.is_cacheable(TRIP_URL)
+    assert response_cache.is_cacheable(
+        "https://api.automatic.com/user/me/profile")
+    assert not response_cache.is_cacheable("https://api.automatic.com/trip")
+    assert not response_cache.is_cacheable(
+        "https://api.automatic.com/trip?limit=10")
+    assert not response_cache.is_cacheable(
+        "https://api.automatic.com/user/me")
+
+
+def test_lru_eviction():
+    """Test that the least recently used entry is evicted."""
+    response_cache = cache.ResponseCache(max_size=2)
+    response_cache.set("a", VEHICLE_URL, {"id": "a"}, {})
+    response_cache.set("b", VEHICLE_URL, {"id": "b"}, {})
+    assert response_cache.get("a").data == {"id": "a"}
+    response_cache.set("c", VEHICLE_URL, {"id": "c"}, {})
+    assert len(response_cache) == 2
+    assert response_cache.get("b") is None
+    assert response_cache.get("a") is not None
+    response_cache.clear()
+    assert len(response_cache) == 0
+
+
+def test_uncacheable_entry_not_stored():
+    """Test that entries without ttl or validators are not stored."""
+    response_cache = cache.ResponseCache()
+    response_cache.set("a", TRIP_URL, {"ended_at": None}, {})
+    assert response_cache.get("a") is None
+
+
+def test_fresh_response_served_from_cache(aiohttp_session):
+    """Test that fresh responses do not hit the network."""
+    obj = base.BaseApiObject(None, client_session=aiohttp_session,
+                             response_cache=cache.ResponseCache())
+    aiohttp_session.request.return_value = _response(
+        {"id": "mock_id", "ended_at": "2017-01-01T00:00:00Z"})
+
+    first = aiohttp_session.loop.run_until_complete(obj._get(TRIP_URL))
+    second = aiohttp_session.loop.run_until_complete(obj._get(TRIP_URL))
+    assert first is second
+    assert aiohttp_session.request.call_count == 1
+
+
+def test_stale_response_revalidated(aiohttp_session):
+    """Test that stale responses are revalidated with a conditional GET."""
+    obj = base.BaseApiObject(
+        None, client_session=aiohttp_session,
+        request_kwargs={"headers": {"Authorization": "Bearer 123"}},
+        response_cache=cache.ResponseCache(ttls={cache.const.VEHICLE_URL: 0}))
+    aiohttp_session.request.return_value = _response(
+        {"id": "mock_id"}, headers={"ETag": '"v1"'})
+    first = aiohttp_session.loop.run_until_complete(obj._get(VEHICLE_URL))
+
+    aiohttp_session.request.return_value = _response(None, status=304)
+    second = aiohttp_session.loop.run_until_complete(obj._get(VEHICLE_URL))
+    assert first is second
+    assert aiohttp_session.request.call_count == 2
+    headers = aiohttp_session.request.call_args[1]["headers"]
+    assert headers == {
+        "Authorization": "Bearer 123",
+        "If-None-Match": '"v1"',
+    }
+
+
+def test_expired_response_refetched(aiohttp_session):
+    """Test that expired responses are fetched again."""
+    obj = base.BaseApiObject(None, client_session=aiohttp_session,
+                             response_cache=cache.ResponseCache())
+    aiohttp_session.request.return_value = _response(
+        {"id": "mock_id"}, headers={"Last-Modified": "mock_date"})
+    aiohttp_session.loop.run_until_complete(obj._get(VEHICLE_URL))
+
+    with patch.object(cache.time, "monotonic", return_value=math.inf):
+        aiohttp_session.request.return_value = _response({"id": "new_id"})
+        result = aiohttp_session.loop.run_until_complete(
+            obj._get(VEHICLE_URL))
+    assert result == {"id": "new_id"}
+    assert aiohttp_session.request.call_args[1]["headers"] == {
+        "If-Modified-Since": "mock_date",
+    }
+
+
+def test_cache_inherited(aiohttp_session):
+    """Test that child objects share the parent cache."""
+    response_cache = cache.ResponseCache()
+    parent = base.BaseApiObject(None, client_session=aiohttp_session,
+                                response_cache=response_cache)
+    child = base.BaseApiObject(parent)
+    assert child.response_cache is response_cache
+
+
+def test_coalesce_concurrent_requests(aiohttp_session):
+    """Test that concurrent identical GETs share one request."""
+    coalescer = cache.RequestCoalescer()
+    obj = base.BaseApiObject(None, client_session=aiohttp_session,
+                             request_coalescer=coalescer)
+    release = asyncio.Event()
+
+    @asyncio.coroutine
+    def side_effect(*args, **kwargs):
+        yield from release.wait()
+        return _response({"id": "mock_id"})
+
+    aiohttp_session.request.side_effect = side_effect
+
+    @asyncio.coroutine
+    def run():
+        tasks = [aiohttp_session.loop.create_task(obj._get(VEHICLE_URL))
+                 for _ in range(3)]
+        other = aiohttp_session.loop.create_task(obj._get(TRIP_URL))
+        yield from asyncio.sleep(0)
+        assert coalescer.in_flight == 2
+        release.set()
+        return (yield from asyncio.gather(*tasks)), (yield from other)
+
+    results, other = aiohttp_session.loop.run_until_complete(run())
+    assert results[0] is results[1] is results[2]
+    assert aiohttp_session.request.call_count == 2
+    assert coalescer.requests == 2
+    assert coalescer.joins == 2
+    assert coalescer.hit_rate == 0.5
+    assert coalescer.in_flight == 0
+
+    aiohttp_session.loop.run_until_complete(obj._get(VEHICLE_URL))
+    assert aiohttp_session.request.call_count == 3
+
+
+def test_coalesce_shared_error(aiohttp_session):
+    """Test that errors are raised to every joined caller."""
+    coalescer = cache.RequestCoalescer()
+    obj = base.BaseApiObject(None, client_session=aiohttp_session,
+                             request_coalescer=coalescer)
+    aiohttp_session.request.return_value = _response({}, status=500)
+
+    @asyncio.coroutine
+    def run():
+        return (yield from asyncio.gather(
+            obj._get(VEHICLE_URL), obj._get(VEHICLE_URL),
+            return_exceptions=True))
+
+    results = aiohttp_session.loop.run_until_complete(run())
+    assert all(isinstance(result, exceptions.InternalError)
+               for result in results)
+    assert aiohttp_session.request.call_count == 1
+    assert coalescer.hit_rate == 0.5
+    assert cache.RequestCoalescer().hit_rate == 0.0
+
+
+def test_coalescer_inherited(aiohttp_session):
+    """Test that child objects share the parent coalescer."""
+    coalescer = cache.RequestCoalescer()
+    parent = base.BaseApiObject(None, client_session=aiohttp_session,
+                                request_coalescer=coalescer)
+    child = base.BaseApiObject(parent)
+    assert child.request_coalescer is coalescer
@@ -10,7 +10,7 @@ from aioautomatic import exceptions
 import aiohttp
 
 import pytest
-from tests.common import AsyncMock
+from tests.common import AsyncMock, SessionMock
 from unittest.mock import patch, MagicMock
 
 
@@ -23,6 +23,62 @@ def test_create_client(aiohttp_session):
     assert client.client_secret == client_secret
 
 
+def test_create_client_owned_session(event_loop):
+    """Create a client that owns a tuned client session."""
+    session = SessionMock()
+    session.closed = False
+    with patch.object(aiohttp, 'TCPConnector') as mock_connector, \
+            patch.object(aiohttp, 'ClientSession',
+                         return_value=session) as mock_session:
+        client = Client('mock_id', 'mock_secret',
+                        connector_kwargs={'limit_per_host': 5})
+
+    assert client.client_session is session
+    kwargs = mock_connector.call_args[1]
+    assert kwargs['limit_per_host'] == 5
+    assert kwargs['ttl_dns_cache'] == 300
+    assert kwargs['keepalive_timeout'] == 30
+    assert mock_session.call_args[1]['connector'] is \
+        mock_connector.return_value
+
+    @asyncio.coroutine
+    def run():
+        with patch.object(client, 'ws_close', AsyncMock()):
+            yield from client.__aenter__()
+            yield from client.__aexit__(None, None, None)
+
+    event_loop.run_until_complete(run())
+    assert session.close.called
+
+
+def test_close_external_session(client):
+    """Test that an external client session is left open."""
+    client.client_session.closed = False
+    client.loop.run_until_complete(client.close())
+    assert not client.client_session.close.called
+
+
+def test_prewarm(client):
+    """Test opening connections to the Automatic servers."""
+    resp = MagicMock()
+
+    @asyncio.coroutine
+    def side_effect(method, url, **kwargs):
+        if url == 'https://accounts.automatic.com':
+            raise aiohttp.ClientError()
+        return resp
+
+    client.client_session.request.side_effect = side_effect
+    client.loop.run_until_complete(client.prewarm(connections=2))
+    calls = client.client_session.request.call_args_list
+    assert len(calls) == 4
+    assert all(call[0][0] == 'HEAD' for call in calls)
+    assert sorted(call[0][1] for call in calls) == [
+        'https://accounts.automatic.com', 'https://accounts.automatic.com',
+        'https://api.automatic.com', 'https://api.automatic.com']
+    assert resp.release.call_count == 2
+
+
 @patch('random.SystemRandom.choice')
 def test_generate_state(choice, aiohttp_session):
     """Regenerate the client state."""
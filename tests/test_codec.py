@@ -0,0 +1,75 @@
+"""Tests for automatic json codecs."""
+import json
+
+from aioautomatic import base
+from aioautomatic import codec
+from aioautomatic.client import Client
+
+import pytest
+from unittest.mock import MagicMock, patch
+from tests.common import AsyncMock
+
+
+def test_get_stdlib_codec():
+    """Test getting the standard library codec."""
+    assert codec.get_codec('json') is codec.STDLIB_CODEC
+    assert codec.STDLIB_CODEC.loads('{"a": 1}') == {"a": 1}
+
+
+def test_get_missing_codec():
+    """Test falling back when a decoder is not installed."""
+    assert codec.get_codec('not_installed_json') is codec.STDLIB_CODEC
+
+
+def test_get_invalid_codec():
+    """Test requesting a module that is not a json decoder."""
+    with pytest.raises(ValueError):
+        codec.get_codec('string')
+
+
+def test_get_fastest_codec():
+    """Test that the fastest installed decoder is preferred."""
+    fake_orjson = MagicMock()
+    with patch.object(codec.importlib, 'import_module',
+                      return_value=fake_orjson) as mock_import:
+        selected = codec.get_codec()
+    assert mock_import.call_args[0][0] == 'orjson'
+    assert selected.name == 'orjson'
+    assert selected.loads is fake_orjson.loads
+
+    with patch.object(codec.importlib, 'import_module',
+                      side_effect=ImportError):
+        assert codec.get_codec() is codec.STDLIB_CODEC
+
+
+def test_request_uses_codec(aiohttp_session):
+    """Test that responses are decoded with the configured codec."""
+    custom = codec.JsonCodec('custom', json.loads)
+    obj = base.BaseApiObject(None, client_session=aiohttp_session,
+                             json_codec=custom)
+    resp = AsyncMock()
+    resp.status = 200
+    resp.json.return_value = {"id": "mock_id"}
+    aiohttp_session.request.return_value = resp
+
+    aiohttp_session.loop.run_until_complete(obj._get("url"))
+    assert resp.json.call_args[1]["loads"] is json.loads
+    assert base.BaseApiObject(obj).json_codec is custom
+
+
+def test_client_codec_by_name(aiohttp_session):
+    """Test selecting the client codec by module name."""
+    client = Client('mock_id', 'mock_secret', aiohttp_session,
+                    json_codec='json')
+    assert client.json_codec is codec.STDLIB_CODEC
+    assert Client('mock_id', 'mock_secret', aiohttp_session).json_codec \
+        is codec.STDLIB_CODEC
+
+
+def test_handle_packet_uses_codec(aiohttp_session):
+    """Test that websocket packets are decoded with the client codec."""
+    loads = MagicMock(return_value=["unknown:event", {}])
+    client = Client('mock_id', 'mock_secret', aiohttp_session,
+                    json_codec=codec.JsonCodec('custom', loads))
+    client._handle_packet('42["unknown:event", {}]')
+    assert loads.call_args[0][0] == '["unknown:event", {}]'
@@ -0,0 +1,135 @@
+"""Tests for automatic compiled validators."""
+import voluptuous as vol
+from aioautomatic import compiler
+from aioautomatic import validation
+
+import pytest
+from benchmarks import fixtures
+
+# Replacement values used to derive invalid payloads from valid ones
+MUTATIONS = (None, "invalid", "12.5", 3, 4.5, True, {}, [], [{}])
+
+RESPONSE_SCHEMAS = [
+    (name, getattr(validation, name)) for name in sorted(dir(validation))
+    if isinstance(getattr(validation, name), vol.Schema) and
+    not name.endswith("_REQUEST")]
+
+
+def _outcome(schema, value):
+    """Return the result or error of validating the value."""
+    try:
+        return "valid", schema(value)
+    except vol.Invalid as exc:
+        return "invalid", type(exc), str(exc)
+    except Exception as exc:  # pylint: disable=broad-except
+        return "error", type(exc)
+
+
+def _variants(value, depth=1):
+    """Yield the value and payloads derived from it."""
+    yield value
+    yield None
+    yield dict(value, extra_key="extra")
+    for key in value:
+        yield {k: v for k, v in value.items() if k != key}
+        for mutation in MUTATIONS:
+            yield dict(value, **{key: mutation})
+        if depth and isinstance(value[key], dict):
+            for nested in _variants(value[key], depth - 1):
+                yield dict(value, **{key: nested})
+
+
+def _samples():
+    """Return sample payloads matched with their schema."""
+    trip = next(trip for trip in fixtures.trip_page(count=20)["results"]
+                if trip["vehicle_events"] and trip["start_address"])
+    trip["vehicle_events"] = trip["vehicle_events"][:2]
+    vehicle = fixtures.vehicle_page(count=1)["results"][0]
+    events = {event["type"]: event for event in fixtures.realtime_events()}
+    events["trip:finished"]["trip"] = trip
+    return [
+        (validation.TRIP, trip),
+        (validation.TRIP, dict(trip, vehicle_events=[
+            dict(trip["vehicle_events"][0], g_force="0.5"), {}])),
+        (validation.VEHICLE, vehicle),
+        (validation.LOCATION, trip["start_location"]),
+        (validation.ADDRESS, trip["start_address"]),
+        (validation.VEHICLE_EVENT, trip["vehicle_events"][0]),
+        (validation.LIST_RESPONSE, fixtures.vehicle_page(count=2)),
+        (validation.AUTH_TOKEN, {
+            "access_token": "123",
+            "expires_in": 12345,
+            "scope": "scope:trip",
+            "refresh_token": "ABCD",
+            "token_type": "Bearer",
+        }),
+        (validation.REALTIME_BASE, events["ignition:on"]),
+        (validation.REALTIME_TRIP_FINISHED, events["trip:finished"]),
+        (validation.REALTIME_SPEEDING, events["notification:speeding"]),
+        (validation.REALTIME_HARD_BRAKE, events["notification:hard_brake"]),
+        (validation.REALTIME_HARD_ACCEL, events["notification:hard_accel"]),
+        (validation.REALTIME_MIL_ON, events["mil:on"]),
+        (validation.REALTIME_MIL_OFF, events["mil:off"]),
+    ]
+
+
+@pytest.mark.parametrize("name,schema", RESPONSE_SCHEMAS)
+def test_response_schemas_compiled(name, schema):
+    """Test that every response schema is compiled."""
+    assert isinstance(compiler.compile_schema(schema),
+                      compiler.CompiledSchema)
+
+
+@pytest.mark.parametrize("schema,value", _samples())
+def test_compiled_equivalence(schema, value):
+    """Test that compiled validators behave like voluptuous."""
+    compiled = compiler.compile_schema(schema)
+    for variant in _variants(value):
+        assert _outcome(compiled, variant) == _outcome(schema, variant)
+
+
+def test_compiled_defaults():
+    """Test that missing optional keys get their validated default."""
+    compiled = compiler.compile_schema(validation.TRIP)
+    trip = compiled({
+        "url": "mock_url",
+        "id": "mock_id",
+        "start_location": {"lat": 1, "lon": 2, "accuracy_m": 3},
+        "end_location": {"lat": 1, "lon": 2, "accuracy_m": 3},
+        "ignored": True,
+    })
+    assert trip["driver"] is None
+    assert trip["vehicle_events"] == []
+    assert trip["start_location"] == {"lat": 1.0, "lon": 2.0,
+                                      "accuracy_m": 3.0}
+    assert "ignored" not in trip
+
+
+def test_compiled_extra_keys():
+    """Test the extra keys settings of compiled schemas."""
+    for extra in (vol.PREVENT_EXTRA, vol.ALLOW_EXTRA, vol.REMOVE_EXTRA):
+        schema = vol.Schema({"a": int, vol.Optional("b"): [str]}, extra=extra)
+        compiled = compiler.compile_schema(schema)
+        for value in ({"a": 1}, {"a": 1, "c": 2}, {"b": ["x"]}, {"a": "1"}):
+            assert _outcome(compiled, value) == _outcome(schema, value)
+
+
+def test_compile_unsupported():
+    """Test that unsupported schemas are used as they are."""
+    schema = vol.Schema({vol.Exclusive("a", "group"): int})
+    assert compiler.compile_schema(schema) is schema
+
+    def validator(value):
+        """Validate nothing."""
+        return value
+    assert compiler.compile_schema(validator) is validator
+
+
+def test_compiled_nested_unsupported():
+    """Test a compiled schema holding a schema that is not compiled."""
+    nested = vol.Schema({vol.Exclusive("a", "group"): int})
+    schema = vol.Schema({"nested": nested, "b": str})
+    compiled = compiler.compile_schema(schema)
+    assert isinstance(compiled, compiler.CompiledSchema)
+    for value in ({"nested": {"a": 1}, "b": "x"}, {"nested": {"a": "1"}}):
+        assert _outcome(compiled, value) == _outcome(schema, value)
@@ -1,5 +1,9 @@
 """Tests for automatic data."""
 from aioautomatic import data
+from aioautomatic import exceptions
+from aioautomatic import validation
+
+import pytest
 
 from tests.common import AsyncMock
 
@@ -172,3 +176,114 @@ def test_realtime_get_device(client):
     assert device.id == 'mock_device_id'
     assert device.url == 'mock_device_url'
     assert device.version == 2
+
+
+def test_lazy_trip():
+    """Test a trip validating its fields on first access."""
+    trip = data.Trip({
+        "url": "mock_url",
+        "id": "mock_id",
+        "distance_m": "1200.5",
+        "start_location": {"lat": 1, "lon": 2, "accuracy_m": 3},
+        "end_location": {"lat": "invalid"},
+        "vehicle_events": [{"type": "hard_brake", "g_force": "0.4"}],
+    }, lazy=True)
+
+    assert trip.id == "mock_id"
+    assert trip.distance_m == 1200.5
+    assert trip.start_location.lat == 1.0
+    assert trip.start_address is None
+    assert trip.vehicle_events[0].g_force == 0.4
+    assert trip.tags == []
+    with pytest.raises(exceptions.InvalidMessageError):
+        trip.end_location.lat
+
+
+def test_lazy_realtime_event(client):
+    """Test lazily validated realtime event children."""
+    event = data.BaseRealtimeEvent(client, {
+        'id': 'mock_id',
+        'user': {
+            'id': 'mock_user_id',
+            'url': 'mock_user_url',
+            },
+        'type': 'location:updated',
+        'vehicle': {
+            'id': 'mock_vehicle_id',
+            'url': 'mock_vehicle_url',
+            },
+        'device': {
+            'id': 'mock_device_id',
+            },
+    }, lazy=True)
+    assert event.user.id == 'mock_user_id'
+    assert event.user.client_session is client.client_session
+    assert event.vehicle.active_dtcs == []
+    assert event.location is None
+
+
+def test_trip_data():
+    """Test rebuilding the data of a trip from its fields."""
+    raw = {
+        "url": "mock_url",
+        "id": "mock_id",
+        "started_at": "2017-01-01T00:00:00Z",
+        "start_location": {"lat": 1, "lon": 2, "accuracy_m": 3},
+        "end_location": {"lat": 4, "lon": 5, "accuracy_m": 6},
+        "start_address": {"name": "Home"},
+        "vehicle_events": [{"type": "hard_brake", "g_force": "0.4"}],
+        "tags": ["business"],
+        "unknown": "ignored",
+    }
+    trip = data.Trip(raw)
+    assert not hasattr(trip, "__dict__")
+    assert trip.data == validation.TRIP(raw)
+    assert data.Trip(raw, lazy=True).data == trip.data
+
+
+def test_data_keeps_converted_values():
+    """Test that data returns the validated value of converted fields."""
+    raw = {
+        "url": "mock_url",
+        "id": "mock_id",
+        "start_location": {"lat": 1, "lon": 2, "accuracy_m": 3},
+        "end_location": {"lat": 4, "lon": 5, "accuracy_m": 6},
+        "tags": None,
+    }
+    for lazy in (False, True):
+        trip = data.Trip(raw, lazy=lazy)
+        assert trip.tags == []
+        assert trip.data["tags"] is None
+        assert trip.data == validation.TRIP(raw)
+        with pytest.raises(AttributeError):
+            trip.custom = "value"
+
+    vehicle = data.Vehicle({
+        "url": "mock_url",
+        "id": "mock_id",
+        "active_dtcs": None,
+    })
+    assert vehicle.active_dtcs == []
+    assert vehicle.data["active_dtcs"] is None
+
+
+def test_realtime_event_data(client):
+    """Test that the data of a realtime event is its validated payload."""
+    raw = {
+        "id": "mock_id",
+        "user": {"id": "mock_user_id", "url": "mock_user_url"},
+        "type": "ignition:on",
+        "vehicle": {"id": "mock_vehicle_id", "url": "mock_vehicle_url"},
+        "device": {
+            "id": "mock_device_id",
+            "url": "mock_device_url",
+            "version": 2,
+            "direct_access_token": "mock_token",
+            "app_encryption_key": "mock_key",
+        },
+    }
+    for lazy in (False, True):
+        event = data.RealtimeIgnitionOn(client, raw, lazy=lazy)
+        assert event.device.id == "mock_device_id"
+        assert event.data == validation.REALTIME_BASE(raw)
+        assert event.data["device"]["app_encryption_key"] == "mock_key"
@@ -0,0 +1,85 @@
+"""Tests for automatic trip frames."""
+from datetime import datetime, timezone
+
+from aioautomatic import data
+
+import pytest
+from tests.common import minimal_trip
+
+np = pytest.importorskip("numpy")
+from aioautomatic.frame import TripFrame  # noqa: E402
+
+TRIPS = [
+    minimal_trip("T1", vehicle="V1", distance_m=1000, duration_s=60,
+                 score_speeding=50, started_at="2017-01-01T00:00:00Z"),
+    minimal_trip("T2", vehicle="V2", distance_m="500.5", hard_brakes=2,
+                 started_at="2017-01-02T00:00:00.500Z"),
+    minimal_trip("T3", vehicle="V1", distance_m=3000, duration_s=120,
+                 score_speeding=70, started_at="2017-01-03T00:00:00Z"),
+    minimal_trip("T4", vehicle=None, duration_s=30),
+]
+
+
+def test_from_trips():
+    """Test building a frame from Trip objects and raw dicts."""
+    for trips in (TRIPS, [data.Trip(trip) for trip in TRIPS],
+                  [data.Trip(trip, lazy=True) for trip in TRIPS]):
+        frame = TripFrame.from_trips(trips)
+        assert len(frame) == 4
+        assert list(frame.ids) == ["T1", "T2", "T3", "T4"]
+        assert frame.vehicles == ["V1", "V2", None]
+        assert list(frame.vehicle_codes) == [0, 1, 0, 2]
+        np.testing.assert_array_equal(
+            frame["distance_m"], [1000, 500.5, 3000, np.nan])
+        assert frame["started_at"][1] == np.datetime64(
+            "2017-01-02T00:00:00.500", "us")
+        assert np.isnat(frame["started_at"][3])
+        np.testing.assert_array_equal(frame["start_location"], [[1, 2]] * 4)
+        np.testing.assert_array_equal(frame["end_location"], [[1, 2]] * 4)
+
+
+def test_from_pages():
+    """Test building a frame from list responses."""
+    frame = TripFrame.from_pages([
+        {"_metadata": {}, "results": TRIPS[:2]},
+        [data.Trip(trip) for trip in TRIPS[2:]],
+    ])
+    assert list(frame.ids) == ["T1", "T2", "T3", "T4"]
+
+
+def test_aggregate():
+    """Test aggregating columns by vehicle."""
+    frame = TripFrame.from_trips(TRIPS)
+    np.testing.assert_array_equal(
+        frame.aggregate("distance_m"), [4000, 500.5, 0])
+    np.testing.assert_array_equal(
+        frame.aggregate("distance_m", "count"), [2, 1, 0])
+    np.testing.assert_array_equal(
+        frame.aggregate("score_speeding", "mean"), [60, np.nan, np.nan])
+    np.testing.assert_array_equal(
+        frame.aggregate("duration_s", "min"), [60, np.nan, 30])
+    np.testing.assert_array_equal(
+        frame.aggregate("duration_s", "max"), [120, np.nan, 30])
+    with pytest.raises(ValueError):
+        frame.aggregate("distance_m", "median")
+
+
+def test_summary_and_rank():
+    """Test per vehicle summaries and rankings."""
+    frame = TripFrame.from_trips(TRIPS)
+    assert frame.summary()["V1"] == {"distance_m": 4000, "duration_s": 180}
+    assert frame.rank("distance_m", "sum") == ["V1", "V2", None]
+    assert frame.rank("score_speeding") == ["V1"]
+    assert frame.rank("distance_m", "sum", descending=False) == \
+        [None, "V2", "V1"]
+
+
+def test_between():
+    """Test selecting trips by start time."""
+    frame = TripFrame.from_trips(TRIPS)
+    selected = frame.between(
+        datetime(2017, 1, 2, tzinfo=timezone.utc),
+        datetime(2017, 1, 3, tzinfo=timezone.utc))
+    assert list(selected.ids) == ["T2"]
+    assert list(frame.between().ids) == ["T1", "T2", "T3"]
+    assert selected.nbytes < frame.nbytes
@@ -0,0 +1,89 @@
+"""Tests for automatic geometry helpers."""
+from aioautomatic import data
+
+import pytest
+from tests.common import encode_polyline, minimal_trip
+
+np = pytest.importorskip("numpy")
+from aioautomatic import geometry  # noqa: E402
+from aioautomatic.frame import TripFrame  # noqa: E402
+
+# One degree of latitude, in metres
+DEGREE_M = geometry.EARTH_RADIUS_M * np.pi / 180
+
+
+def test_coordinates():
+    """Test getting coordinates from locations and events."""
+    location = data.Location({"lat": 1, "lon": 2, "accuracy_m": 3})
+    event = data.VehicleEvent({"type": "hard_brake", "lat": 3, "lon": 4})
+    no_location = data.VehicleEvent({"type": "hard_brake"})
+    coords = geometry.coordinates([
+        location, event, {"lat": 5, "lon": 6}, (7, 8), None, no_location])
+    np.testing.assert_array_equal(coords, [
+        [1, 2], [3, 4], [5, 6], [7, 8], [np.nan, np.nan],
+        [np.nan, np.nan]])
+    assert geometry.coordinates([]).shape == (0, 2)
+    assert np.shares_memory(geometry.coordinates(coords), coords)
+
+
+def test_haversine():
+    """Test great circle distances."""
+    np.testing.assert_allclose(geometry.haversine(0, 0, 1, 0), DEGREE_M)
+    np.testing.assert_allclose(geometry.haversine(0, 0, 0, 180),
+                               DEGREE_M * 180)
+    np.testing.assert_allclose(
+        geometry.haversine(60, [0, 1], 60, [1, 0]),
+        [DEGREE_M * 0.49996] * 2, rtol=1e-4)
+    assert geometry.haversine(1, 2, 1, 2) == 0
+
+
+def test_bearing():
+    """Test initial bearings."""
+    np.testing.assert_allclose(
+        geometry.bearing(0, 0, [1, 0, -1, 0], [0, 1, 0, -1]),
+        [0, 90, 180, 270])
+    np.testing.assert_allclose(
+        geometry.sequential_bearings([(0, 0), (1, 0), (1, 1)]),
+        [0, 89.99127], rtol=1e-6)
+
+
+def test_pairwise_and_sequential_distances():
+    """Test distances between sets of points."""
+    points = [(0, 0), (1, 0), (3, 0)]
+    distances = geometry.pairwise_distances(points)
+    np.testing.assert_allclose(distances, DEGREE_M * np.array(
+        [[0, 1, 3], [1, 0, 2], [3, 2, 0]]), atol=1e-6)
+    assert geometry.pairwise_distances(points, [(0, 0)]).shape == (3, 1)
+    np.testing.assert_allclose(geometry.sequential_distances(points),
+                               [DEGREE_M, DEGREE_M * 2])
+    assert geometry.sequential_distances(points[:1]).shape == (0,)
+
+
+def test_distances_to():
+    """Test distances from trip endpoints to a point."""
+    trips = [data.Trip(minimal_trip(start=(0, 0), end=(1, 0))),
+             data.Trip(minimal_trip(start=(2, 0), end=(0, 0)))]
+    for source in (trips, TripFrame.from_trips(trips)):
+        starts, ends = geometry.trip_endpoints(source)
+        np.testing.assert_array_equal(starts, [[0, 0], [2, 0]])
+        np.testing.assert_array_equal(ends, [[1, 0], [0, 0]])
+        from_start, from_end = geometry.distances_to(source, 0, 0)
+        np.testing.assert_allclose(from_start, [0, DEGREE_M * 2])
+        np.testing.assert_allclose(from_end, [DEGREE_M, 0])
+
+
+def test_path_lengths():
+    """Test the length of trip paths."""
+    paths = [[(0, 0), (0.01, 0), (0.01, 0.01)], [(1, 1)], None,
+             [(2, 2), (2, 2.01)]]
+    trips = [data.Trip(minimal_trip(
+        path=path and encode_polyline(path))) for path in paths]
+    lengths = geometry.path_lengths(trips)
+    expected = [geometry.sequential_distances(path).sum()
+                if path else np.nan for path in paths]
+    np.testing.assert_allclose(lengths, expected)
+    assert lengths[1] == 0
+    np.testing.assert_array_equal(geometry.path_lengths(trips[2:3]),
+                                  [np.nan])
+    np.testing.assert_allclose(geometry.path_lengths(trips[:1]),
+                               expected[:1])
@@ -0,0 +1,161 @@
+"""Tests for automatic hedged requests."""
+import asyncio
+
+from aioautomatic import base
+from aioautomatic import exceptions
+from aioautomatic import hedge
+
+import pytest
+from unittest.mock import MagicMock
+from tests.common import AsyncMock
+
+TRIP_URL = "https://api.automatic.com/trip/mock_id"
+
+
+def _response(status, data=None):
+    """Return a mock response object."""
+    resp = AsyncMock()
+    resp.status = status
+    resp.json.return_value = data or {}
+    return resp
+
+
+def _warm_policy(**kwargs):
+    """Return a hedge policy with recorded latencies for trips."""
+    policy = hedge.HedgePolicy(min_samples=5, min_delay=0, **kwargs)
+    for latency in (0.01, 0.01, 0.01, 0.01, 0.02):
+        policy.record(hedge.const.TRIP_URL, latency)
+    return policy
+
+
+def test_invalid_percentile():
+    """Test that the percentile must be in range."""
+    with pytest.raises(ValueError):
+        hedge.HedgePolicy(percentile=0)
+
+
+def test_endpoint():
+    """Test that urls are grouped by endpoint template."""
+    policy = hedge.HedgePolicy()
+    assert policy.endpoint(TRIP_URL) == hedge.const.TRIP_URL
+    assert policy.endpoint("https://api.automatic.com/user/me/profile") == \
+        hedge.const.USER_PROFILE_URL
+    assert policy.endpoint("https://api.automatic.com/trip?limit=1") == \
+        "https://api.automatic.com/trip"
+
+
+def test_delay():
+    """Test the hedge delay percentile."""
+    policy = hedge.HedgePolicy(min_samples=5, percentile=80)
+    assert policy.delay("endpoint") is None
+    for latency in (0.5, 0.1, 0.4, 0.2):
+        policy.record("endpoint", latency)
+    assert policy.delay("endpoint") is None
+    policy.record("endpoint", 0.3)
+    assert policy.delay("endpoint") == 0.4
+
+
+def test_no_hedge_without_samples(aiohttp_session):
+    """Test that requests are not hedged before latencies are known."""
+    policy = hedge.HedgePolicy()
+    obj = base.BaseApiObject(None, client_session=aiohttp_session,
+                             hedge_policy=policy)
+    aiohttp_session.request.return_value = _response(200, {"id": "mock"})
+
+    result = aiohttp_session.loop.run_until_complete(obj._get(TRIP_URL))
+    assert result == {"id": "mock"}
+    assert policy.hedges == 0
+    assert aiohttp_session.request.call_count == 1
+    assert len(policy._latencies[hedge.const.TRIP_URL]) == 1
+
+
+def test_hedge_slow_request(aiohttp_session):
+    """Test that a slow request is hedged and the fast response wins."""
+    policy = _warm_policy()
+    obj = base.BaseApiObject(None, client_session=aiohttp_session,
+                             hedge_policy=policy)
+    slow = _response(200, {"id": "slow"})
+    fast = _response(200, {"id": "fast"})
+    cancelled = []
+
+    @asyncio.coroutine
+    def side_effect(*args, **kwargs):
+        if not cancelled:
+            cancelled.append(False)
+            try:
+                yield from asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled[0] = True
+                raise
+            return slow
+        return fast
+
+    aiohttp_session.request.side_effect = side_effect
+    result = aiohttp_session.loop.run_until_complete(obj._get(TRIP_URL))
+    assert result == {"id": "fast"}
+    assert cancelled == [True]
+    assert policy.hedges == 1
+    assert policy.hedge_wins == 1
+
+
+def test_hedge_first_failure_waits_for_backup(aiohttp_session):
+    """Test that a failed request lets the hedged request answer."""
+    policy = _warm_policy()
+    obj = base.BaseApiObject(None, client_session=aiohttp_session,
+                             hedge_policy=policy)
+    calls = []
+
+    @asyncio.coroutine
+    def side_effect(*args, **kwargs):
+        calls.append(None)
+        if len(calls) == 1:
+            yield from asyncio.sleep(0.05)
+            return _response(500)
+        yield from asyncio.sleep(0.1)
+        return _response(200, {"id": "backup"})
+
+    aiohttp_session.request.side_effect = side_effect
+    result = aiohttp_session.loop.run_until_complete(obj._get(TRIP_URL))
+    assert result == {"id": "backup"}
+
+
+def test_hedge_all_failed(aiohttp_session):
+    """Test that the error is raised when every request fails."""
+    policy = _warm_policy()
+    obj = base.BaseApiObject(None, client_session=aiohttp_session,
+                             hedge_policy=policy)
+
+    @asyncio.coroutine
+    def side_effect(*args, **kwargs):
+        yield from asyncio.sleep(0.05)
+        return _response(500)
+
+    aiohttp_session.request.side_effect = side_effect
+    with pytest.raises(exceptions.InternalError):
+        aiohttp_session.loop.run_until_complete(obj._get(TRIP_URL))
+    assert aiohttp_session.request.call_count == 2
+
+
+def test_release_losing_response(event_loop):
+    """Test that only successful finished responses are released."""
+    resp = MagicMock()
+    won = asyncio.Future(loop=event_loop)
+    won.set_result(resp)
+    hedge._release(won)
+    assert resp.release.called
+
+    failed = asyncio.Future(loop=event_loop)
+    failed.set_exception(exceptions.InternalError())
+    hedge._release(failed)
+
+    cancelled = asyncio.Future(loop=event_loop)
+    cancelled.cancel()
+    hedge._release(cancelled)
+
+
+def test_hedge_policy_inherited(aiohttp_session):
+    """Test that child objects share the parent hedge policy."""
+    policy = hedge.HedgePolicy()
+    parent = base.BaseApiObject(None, client_session=aiohttp_session,
+                                hedge_policy=policy)
+    assert base.BaseApiObject(parent).hedge_policy is policy
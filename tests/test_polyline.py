@@ -0,0 +1,96 @@
+"""Tests for automatic polyline decoding."""
+import random
+
+from aioautomatic import data
+
+import pytest
+from tests.common import encode_polyline, minimal_trip, path_coords
+
+np = pytest.importorskip("numpy")
+from aioautomatic import polyline  # noqa: E402
+
+# Example of the Google encoded polyline format documentation
+EXAMPLE = "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+EXAMPLE_COORDS = [[38.5, -120.2], [40.7, -120.95], [43.252, -126.453]]
+
+
+def _reference_decode(path):
+    """Decode a polyline one character at a time."""
+    coords = []
+    index = lat = lon = 0
+    while index < len(path):
+        deltas = []
+        for _ in range(2):
+            shift = value = 0
+            while True:
+                chunk = ord(path[index]) - 63
+                index += 1
+                value |= (chunk & 0x1f) << shift
+                shift += 5
+                if chunk < 0x20:
+                    break
+            deltas.append(~(value >> 1) if value & 1 else value >> 1)
+        lat += deltas[0]
+        lon += deltas[1]
+        coords.append([lat / 1e5, lon / 1e5])
+    return coords
+
+
+def test_decode():
+    """Test decoding a polyline."""
+    coords = polyline.decode(EXAMPLE)
+    assert coords.shape == (3, 2)
+    np.testing.assert_allclose(coords, EXAMPLE_COORDS)
+    assert polyline.decode("").shape == (0, 2)
+
+
+def test_decode_many():
+    """Test decoding several polylines in one call."""
+    rng = random.Random(1)
+    paths = [encode_polyline(path_coords(rng, points))
+             for points in (1, 0, 500, 2, 0)]
+    decoded = polyline.decode_many(paths)
+    assert len(decoded) == len(paths)
+    for path, coords in zip(paths, decoded):
+        expected = np.array(_reference_decode(path)).reshape(-1, 2)
+        np.testing.assert_array_equal(coords, expected)
+    assert polyline.decode_many([]) == []
+
+
+@pytest.mark.parametrize("path", [
+    "_p~iF~ps|",  # Truncated value
+    "_p~iF",  # Latitude without longitude
+    "_p~iF~ps|U\n",  # Character out of range
+    "_p~iF~ps|Ué",  # Not ascii
+])
+def test_decode_invalid(path):
+    """Test that invalid polylines raise ValueError."""
+    with pytest.raises(ValueError):
+        polyline.decode(path)
+    with pytest.raises(ValueError):
+        polyline.decode_many([EXAMPLE, path])
+
+
+def test_trip_path_coordinates():
+    """Test that trip paths are decoded once and cached."""
+    trip = data.Trip(minimal_trip(path=EXAMPLE), lazy=True)
+    coords = trip.path_coordinates
+    np.testing.assert_allclose(coords, EXAMPLE_COORDS)
+    assert trip.path_coordinates is coords
+    assert not coords.flags.writeable
+
+
+def test_trip_decode_paths():
+    """Test decoding the paths of a list of trips."""
+    trips = [data.Trip(minimal_trip(path=path))
+             for path in (EXAMPLE, None, EXAMPLE[:10])]
+    decoded = data.Trip.decode_paths(trips)
+    assert decoded[1] is None
+    assert decoded[0] is trips[0].path_coordinates
+    assert len(trips[2].path_coordinates) == 1
+
+    trips.append(data.Trip(dict(trips[0].data, path="_p~iF")))
+    with pytest.raises(ValueError):
+        data.Trip.decode_paths(trips)
+    with pytest.raises(ValueError):
+        trips[3].path_coordinates
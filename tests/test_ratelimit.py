@@ -0,0 +1,133 @@
+"""Tests for automatic rate limiting."""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+from aioautomatic import base
+from aioautomatic import exceptions
+from aioautomatic import ratelimit
+
+import pytest
+from unittest.mock import patch
+from tests.common import AsyncMock
+
+
+def test_parse_retry_after_seconds():
+    """Test parsing a Retry-After delay in seconds."""
+    assert ratelimit.parse_retry_after("12") == 12.0
+    assert ratelimit.parse_retry_after("-1") == 0.0
+    assert ratelimit.parse_retry_after(None) is None
+    assert ratelimit.parse_retry_after("invalid") is None
+
+
+def test_parse_retry_after_date():
+    """Test parsing a Retry-After HTTP date."""
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+    delay = ratelimit.parse_retry_after(format_datetime(retry_at))
+    assert 25 < delay <= 30
+
+
+def test_invalid_rate():
+    """Test that the rate must be positive."""
+    with pytest.raises(ValueError):
+        ratelimit.RateLimiter(0)
+
+
+def test_acquire_waits_for_tokens(event_loop):
+    """Test that requests beyond the burst wait for new tokens."""
+    limiter = ratelimit.RateLimiter(10, burst=2)
+    now = [100.0]
+    sleeps = []
+
+    @asyncio.coroutine
+    def fake_sleep(delay):
+        sleeps.append(delay)
+        now[0] += delay
+
+    with patch.object(ratelimit.time, "monotonic", lambda: now[0]), \
+            patch.object(ratelimit.asyncio, "sleep", fake_sleep):
+        limiter._updated = now[0]
+        for _ in range(3):
+            event_loop.run_until_complete(limiter.acquire())
+    assert sleeps == [pytest.approx(0.1)]
+
+
+def test_throttled_backs_off_and_recovers(event_loop):
+    """Test the adaptive rate after 429 responses."""
+    limiter = ratelimit.RateLimiter(10, min_rate=4, recovery=1)
+    limiter.throttled()
+    assert limiter.rate == 5
+    limiter.throttled()
+    assert limiter.rate == 4
+    limiter.succeeded()
+    assert limiter.rate == 5
+    for _ in range(10):
+        limiter.succeeded()
+    assert limiter.rate == 10
+
+
+def test_throttled_retry_after(event_loop):
+    """Test that requests pause until the Retry-After delay passes."""
+    limiter = ratelimit.RateLimiter(100)
+    now = [100.0]
+    sleeps = []
+
+    @asyncio.coroutine
+    def fake_sleep(delay):
+        sleeps.append(delay)
+        now[0] += delay
+
+    with patch.object(ratelimit.time, "monotonic", lambda: now[0]), \
+            patch.object(ratelimit.asyncio, "sleep", fake_sleep):
+        limiter._updated = now[0]
+        limiter.throttled(retry_after=3)
+        event_loop.run_until_complete(limiter.acquire())
+    assert sleeps[0] == 3
+    assert now[0] >= 103
+
+
+def test_request_rate_limited(aiohttp_session):
+    """Test that 429 responses raise RateLimitedError and slow down."""
+    limiter = ratelimit.RateLimiter(1000)
+    obj = base.BaseApiObject(None, client_session=aiohttp_session,
+                             rate_limiter=limiter)
+    resp = AsyncMock()
+    resp.status = 429
+    resp.headers = {"Retry-After": "0"}
+    resp.json.return_value = {"error": "rate_limited"}
+    aiohttp_session.request.return_value = resp
+
+    with pytest.raises(exceptions.RateLimitedError) as exc_info:
+        aiohttp_session.loop.run_until_complete(obj._get("url"))
+    assert exc_info.value.retry_after == 0
+    assert limiter.rate == 500
+
+    resp.status = 200
+    aiohttp_session.loop.run_until_complete(obj._get("url"))
+    assert limiter.rate == 510
+
+
+def test_request_rate_limited_without_limiter(aiohttp_session):
+    """Test that 429 responses are raised without a rate limiter."""
+    obj = base.BaseApiObject(None, client_session=aiohttp_session)
+    resp = AsyncMock()
+    resp.status = 429
+    resp.headers = {}
+    resp.json.return_value = {}
+    aiohttp_session.request.return_value = resp
+
+    with pytest.raises(exceptions.RateLimitedError) as exc_info:
+        aiohttp_session.loop.run_until_complete(obj._get("url"))
+    assert exc_info.value.retry_after is None
+
+
+def test_session_rate_limiter(aiohttp_session):
+    """Test that a session limiter overrides the parent limiter."""
+    client_limiter = ratelimit.RateLimiter(10)
+    session_limiter = ratelimit.RateLimiter(5)
+    parent = base.BaseApiObject(None, client_session=aiohttp_session,
+                                rate_limiter=client_limiter)
+    assert base.BaseApiObject(parent).rate_limiter is client_limiter
+    child = base.BaseApiObject(parent, rate_limiter=session_limiter)
+    assert child.rate_limiter is session_limiter
+    assert base.BaseApiObject(child).rate_limiter is session_limiter
@@ -0,0 +1,145 @@
+"""Tests for automatic request retries."""
+import asyncio
+
+import aiohttp
+from aioautomatic import base
+from aioautomatic import const
+from aioautomatic import exceptions
+from aioautomatic import retry
+
+import pytest
+from unittest.mock import MagicMock, patch
+from tests.common import AsyncMock
+
+
+@pytest.fixture
+def no_sleep():
+    """Skip retry backoff sleeps, recording the delays."""
+    delays = []
+
+    @asyncio.coroutine
+    def fake_sleep(delay):
+        delays.append(delay)
+
+    with patch.object(retry.asyncio, "sleep", fake_sleep):
+        yield delays
+
+
+def _response(status, data=None):
+    """Return a mock response object."""
+    resp = AsyncMock()
+    resp.status = status
+    resp.headers = {}
+    resp.json.return_value = data or {}
+    return resp
+
+
+def test_invalid_max_attempts():
+    """Test that at least one attempt is required."""
+    with pytest.raises(ValueError):
+        retry.RetryPolicy(max_attempts=0)
+
+
+def test_is_retryable():
+    """Test which failed requests may be retried."""
+    policy = retry.RetryPolicy()
+    connect_error = exceptions.TransportError()
+    connect_error.__cause__ = aiohttp.client_exceptions.ClientConnectorError(
+        MagicMock(), OSError())
+    read_error = exceptions.TransportError()
+    read_error.__cause__ = asyncio.TimeoutError()
+
+    assert policy.is_retryable("GET", "url", exceptions.InternalError())
+    assert policy.is_retryable("GET", "url", read_error)
+    assert not policy.is_retryable("GET", "url", exceptions.BadRequestError())
+    assert not policy.is_retryable("POST", "url", exceptions.InternalError())
+    assert policy.is_retryable("POST", const.AUTH_URL, connect_error)
+    assert policy.is_retryable(
+        "POST", const.AUTH_URL, exceptions.RateLimitedError())
+    assert not policy.is_retryable("POST", const.AUTH_URL, read_error)
+    assert not retry.RetryPolicy(retry_token_requests=False).is_retryable(
+        "POST", const.AUTH_URL, connect_error)
+
+
+def test_backoff_is_bounded():
+    """Test the jittered exponential backoff range."""
+    policy = retry.RetryPolicy(base_delay=1, max_delay=5)
+    assert all(0 <= policy.backoff(1) <= 1 for _ in range(20))
+    assert all(0 <= policy.backoff(3) <= 4 for _ in range(20))
+    assert all(0 <= policy.backoff(10) <= 5 for _ in range(20))
+
+
+def test_retry_get(aiohttp_session, no_sleep):
+    """Test that failed GET requests are retried."""
+    policy = retry.RetryPolicy()
+    obj = base.BaseApiObject(None, client_session=aiohttp_session,
+                             retry_policy=policy)
+    aiohttp_session.request.side_effect = [
+        _response(500), _response(500), _response(200, {"id": "mock_id"})]
+
+    result = aiohttp_session.loop.run_until_complete(obj._get("url"))
+    assert result == {"id": "mock_id"}
+    assert policy.attempts == 3
+    assert policy.retries == 2
+    assert policy.failures == 0
+    assert len(no_sleep) == 2
+
+
+def test_retry_gives_up(aiohttp_session, no_sleep):
+    """Test that retries stop after the maximum attempts."""
+    policy = retry.RetryPolicy(max_attempts=2)
+    obj = base.BaseApiObject(None, client_session=aiohttp_session,
+                             retry_policy=policy)
+    aiohttp_session.request.return_value = _response(500)
+
+    with pytest.raises(exceptions.InternalError):
+        aiohttp_session.loop.run_until_complete(obj._get("url"))
+    assert aiohttp_session.request.call_count == 2
+    assert policy.failures == 1
+
+
+def test_no_retry_post(aiohttp_session, no_sleep):
+    """Test that non idempotent requests are not retried."""
+    policy = retry.RetryPolicy()
+    obj = base.BaseApiObject(None, client_session=aiohttp_session,
+                             retry_policy=policy)
+    aiohttp_session.request.return_value = _response(500)
+
+    with pytest.raises(exceptions.InternalError):
+        aiohttp_session.loop.run_until_complete(obj._post(const.AUTH_URL))
+    assert aiohttp_session.request.call_count == 1
+
+
+def test_retry_after_respected(aiohttp_session, no_sleep):
+    """Test that rate limited retries wait for the Retry-After delay."""
+    policy = retry.RetryPolicy(base_delay=0.01)
+    obj = base.BaseApiObject(None, client_session=aiohttp_session,
+                             retry_policy=policy)
+    limited = _response(429)
+    limited.headers = {"Retry-After": "7"}
+    aiohttp_session.request.side_effect = [limited, _response(200)]
+
+    aiohttp_session.loop.run_until_complete(obj._post(const.AUTH_URL))
+    assert no_sleep == [7]
+
+
+def test_deadline(aiohttp_session, no_sleep):
+    """Test that no retry is started past the call deadline."""
+    policy = retry.RetryPolicy(base_delay=10, deadline=1)
+    obj = base.BaseApiObject(None, client_session=aiohttp_session,
+                             retry_policy=policy)
+    aiohttp_session.request.return_value = _response(500)
+
+    with patch.object(policy, "backoff", return_value=5):
+        with pytest.raises(exceptions.InternalError):
+            aiohttp_session.loop.run_until_complete(obj._get("url"))
+    assert aiohttp_session.request.call_count == 1
+    assert no_sleep == []
+
+
+def test_retry_policy_inherited(aiohttp_session):
+    """Test that child objects share the parent retry policy."""
+    policy = retry.RetryPolicy()
+    parent = base.BaseApiObject(None, client_session=aiohttp_session,
+                                retry_policy=policy)
+    assert base.BaseApiObject(parent).retry_policy is policy
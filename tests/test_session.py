@@ -1,9 +1,14 @@
 """Tests for automatic client."""
-from datetime import datetime, timezone
-from aioautomatic.session import Session
-
+import asyncio
+from datetime import datetime, timedelta, timezone
+from aioautomatic.base import ResultIterator, ResultStream
+from aioautomatic.codec import STDLIB_CODEC
+from aioautomatic.exceptions import InvalidMessageError, TransportError
+from aioautomatic.session import Session, TripExport
+
+import pytest
 from unittest.mock import MagicMock, patch
-from tests.common import AsyncMock
+from tests.common import AsyncMock, minimal_trip
 
 
 def test_session_refresh(session):
@@ -45,6 +50,13 @@ def test_session_auto_refresh(aiohttp_session):
     client = AsyncMock()
     client.client_session = aiohttp_session
     client.request_kwargs = {}
+    client.response_cache = None
+    client.request_coalescer = None
+    client.rate_limiter = None
+    client.retry_policy = None
+    client.hedge_policy = None
+    client.json_codec = STDLIB_CODEC
+    client.lazy_validation = False
     data = {
         "access_token": "123",
         "refresh_token": "ABCD",
@@ -320,6 +332,24 @@ def test_get_trip(session):
     assert trip.end_address is None
 
 
+def test_get_trip_lazy_validation(session):
+    """Test getting a trip validated on attribute access."""
+    resp = AsyncMock()
+    resp.status = 200
+    resp.json.return_value = {
+        "url": "mock_url",
+        "id": "mock_id",
+        "distance_m": "invalid",
+    }
+    session._client_session.request.return_value = resp
+    session._lazy_validation = True
+
+    trip = session.loop.run_until_complete(session.get_trip("mock_id"))
+    assert trip.id == "mock_id"
+    with pytest.raises(InvalidMessageError):
+        trip.distance_m
+
+
 def test_get_vehicle(session):
     """Test getting vehicle information."""
     resp = AsyncMock()
@@ -362,3 +392,252 @@ def test_get_device(session):
     assert device.url == "mock_url"
     assert device.id == "mock_id"
     assert device.version == 2
+
+
+def test_iter_trips(session):
+    """Test iterating over all trip pages."""
+    resp = AsyncMock()
+    resp.status = 200
+    resp.json.return_value = {
+        "_metadata": {
+            "count": 1,
+            "next": None,
+            "previous": None,
+            },
+        "results": [{
+            "url": "mock_url",
+            "id": "mock_id",
+            "start_location": {
+                "lat": 43.12345,
+                "lon": 34.54321,
+                "accuracy_m": 12.2,
+                },
+            "end_location": {
+                "lat": 53.12345,
+                "lon": 44.54321,
+                "accuracy_m": 11.2,
+                },
+            }],
+    }
+    session._client_session.request.return_value = resp
+
+    iterator = session.iter_trips(vehicle="vehicle_id", limit=250)
+    trip = session.loop.run_until_complete(iterator.__anext__())
+    assert trip.id == "mock_id"
+    assert session._client_session.request.mock_calls[0][1][0] == "GET"
+    assert session._client_session.request.mock_calls[0][1][1] in (
+        "https://api.automatic.com/trip?vehicle=vehicle_id&limit=250",
+        "https://api.automatic.com/trip?limit=250&vehicle=vehicle_id")
+
+    iterator = session.iter_vehicles()
+    assert isinstance(iterator, ResultIterator)
+    iterator = session.iter_devices()
+    assert isinstance(iterator, ResultIterator)
+    for iterate in (session.iter_trips, session.iter_vehicles,
+                    session.iter_devices):
+        assert isinstance(iterate(stream=True), ResultStream)
+
+
+def test_get_devices_concurrency(session):
+    """Test fetching every device page concurrently."""
+    def side_effect(method, url, **kwargs):
+        page = int(url.split("page=")[1].split("&")[0])
+        resp = AsyncMock()
+        resp.status = 200
+        resp.json.return_value = {
+            "_metadata": {
+                "count": 3,
+                "next": None,
+                "previous": None,
+                },
+            "results": [{
+                "url": "mock_url",
+                "id": "mock_id_{}".format(page),
+                }],
+        }
+        return resp
+
+    session._client_session.request.side_effect = side_effect
+    devices = session.loop.run_until_complete(
+        session.get_devices(concurrency=2))
+    assert [device.id for device in devices] == [
+        "mock_id_1", "mock_id_2", "mock_id_3"]
+    assert devices.next is None
+
+
+def _trip_request_handler(trips, tolerance=0):
+    """Return a request side effect serving trips filtered by start time.
+
+    The start time filter is widened by tolerance seconds before the start.
+    """
+    def side_effect(method, url, **kwargs):
+        query = dict(
+            param.split("=") for param in url.split("?")[1].split("&"))
+        start = float(query["started_at__gte"]) - tolerance
+        end = float(query["started_at__lte"])
+        matches = [trip for trip in trips if start <= trip[1] <= end]
+        limit = int(query.get("limit", 250))
+        page = int(query.get("page", 1))
+        resp = AsyncMock()
+        resp.status = 200
+        resp.json.return_value = {
+            "_metadata": {
+                "count": len(matches),
+                "next": None,
+                "previous": None,
+                },
+            "results": [{
+                "url": "mock_url",
+                "id": trip_id,
+                "started_at": datetime.fromtimestamp(
+                    started, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "start_location": {"lat": 1, "lon": 2, "accuracy_m": 3},
+                "end_location": {"lat": 1, "lon": 2, "accuracy_m": 3},
+                } for trip_id, started in reversed(
+                    matches[(page - 1) * limit:page * limit])],
+        }
+        return resp
+    return side_effect
+
+
+def test_export_trips(session):
+    """Test exporting trips over concurrently fetched time windows."""
+    start = datetime(2017, 1, 1, tzinfo=timezone.utc)
+    end = datetime(2017, 1, 2, tzinfo=timezone.utc)
+    base_ts = start.timestamp()
+    trips = [("trip_{}".format(hour), base_ts + hour * 3600)
+             for hour in range(0, 25, 2)]
+    session._client_session.request.side_effect = \
+        _trip_request_handler(trips)
+
+    export = session.export_trips(start, end, concurrency=3,
+                                  trips_per_window=2, vehicle="vehicle_id")
+
+    @asyncio.coroutine
+    def consume():
+        ids = []
+        while True:
+            trip = yield from export.next()
+            if trip is None:
+                return ids
+            ids.append(trip.id)
+
+    ids = session.loop.run_until_complete(consume())
+    assert ids == [trip_id for trip_id, _ in trips]
+    urls = [call[1][1] for call in session._client_session.request.mock_calls
+            if call[0] == ""]
+    assert all("vehicle=vehicle_id" in url for url in urls)
+    assert "limit=1" in urls[0]
+    assert len(urls) > 2
+
+
+def test_export_trips_window(session):
+    """Test exporting trips with a fixed window length."""
+    start = datetime(2017, 1, 1, tzinfo=timezone.utc)
+    end = datetime(2017, 1, 1, 12, tzinfo=timezone.utc)
+    session._client_session.request.side_effect = \
+        _trip_request_handler([("trip_1", start.timestamp() + 60)])
+
+    export = session.export_trips(start, end, window=timedelta(hours=4))
+    trip = session.loop.run_until_complete(export.__anext__())
+    assert trip.id == "trip_1"
+    with pytest.raises(StopAsyncIteration):
+        session.loop.run_until_complete(export.__anext__())
+    assert session._client_session.request.call_count == 3
+
+
+def test_export_trips_overlapping_windows(session):
+    """Test that trips returned by several windows are yielded once."""
+    start = datetime(2017, 1, 1, tzinfo=timezone.utc)
+    end = datetime(2017, 1, 1, 0, 0, 5, tzinfo=timezone.utc)
+    base_ts = start.timestamp()
+    trips = [("trip_{}".format(second), base_ts + second)
+             for second in range(6)]
+    session._client_session.request.side_effect = \
+        _trip_request_handler(trips, tolerance=2)
+
+    export = session.export_trips(start, end, window=timedelta(seconds=1))
+
+    @asyncio.coroutine
+    def consume():
+        ids = []
+        while True:
+            trip = yield from export.next()
+            if trip is None:
+                return ids
+            ids.append(trip.id)
+
+    ids = session.loop.run_until_complete(consume())
+    assert ids == [trip_id for trip_id, _ in trips]
+
+
+def test_export_trips_error(session):
+    """Test that windows in flight are cancelled when one fails."""
+    start = datetime(2017, 1, 1, tzinfo=timezone.utc)
+    end = datetime(2017, 1, 1, 12, tzinfo=timezone.utc)
+    cancelled = []
+
+    @asyncio.coroutine
+    def get_all_pages(export, url, params, concurrency):
+        if params["started_at__gte"] == start.timestamp():
+            raise TransportError()
+        try:
+            yield from asyncio.sleep(3600)
+        except asyncio.CancelledError:
+            cancelled.append(params["started_at__gte"])
+            raise
+
+    export = session.export_trips(start, end, window=timedelta(hours=4))
+    with patch.object(TripExport, "_get_all_pages", get_all_pages):
+        with pytest.raises(TransportError):
+            session.loop.run_until_complete(export.__anext__())
+    assert len(cancelled) == 2
+    with pytest.raises(StopAsyncIteration):
+        session.loop.run_until_complete(export.__anext__())
+
+
+def test_export_trips_context(session):
+    """Test that leaving the export context cancels the windows in flight."""
+    start = datetime(2017, 1, 1, tzinfo=timezone.utc)
+    end = datetime(2017, 1, 1, 12, tzinfo=timezone.utc)
+    cancelled = []
+
+    @asyncio.coroutine
+    def get_all_pages(export, url, params, concurrency):
+        if params["started_at__gte"] == start.timestamp():
+            return {"results": [minimal_trip(
+                "trip_1", started_at="2017-01-01T00:01:00Z")]}
+        try:
+            yield from asyncio.sleep(3600)
+        except asyncio.CancelledError:
+            cancelled.append(params["started_at__gte"])
+            raise
+
+    export = session.export_trips(start, end, window=timedelta(hours=4))
+
+    @asyncio.coroutine
+    def consume():
+        context = yield from export.__aenter__()
+        try:
+            return (yield from context.__anext__())
+        finally:
+            yield from export.__aexit__(None, None, None)
+
+    with patch.object(TripExport, "_get_all_pages", get_all_pages):
+        trip = session.loop.run_until_complete(consume())
+    assert trip.id == "trip_1"
+    assert len(cancelled) == 2
+    with pytest.raises(StopAsyncIteration):
+        session.loop.run_until_complete(export.__anext__())
+
+
+def test_export_trips_empty(session):
+    """Test exporting a time range without any trips."""
+    start = datetime(2017, 1, 1, tzinfo=timezone.utc)
+    end = datetime(2017, 1, 2, tzinfo=timezone.utc)
+    session._client_session.request.side_effect = _trip_request_handler([])
+
+    export = session.export_trips(start, end)
+    with pytest.raises(StopAsyncIteration):
+        session.loop.run_until_complete(export.__anext__())
+    assert session._client_session.request.call_count == 1
@@ -0,0 +1,101 @@
+"""Tests for automatic path simplification."""
+import random
+
+from aioautomatic import data
+
+import pytest
+from tests.common import encode_polyline, minimal_trip, path_coords
+
+np = pytest.importorskip("numpy")
+from aioautomatic import geometry  # noqa: E402
+from aioautomatic import simplify  # noqa: E402
+
+
+def _reference(xy, tolerance, first, last, keep):
+    """Recursive Douglas-Peucker over projected points."""
+    start, end = xy[first], xy[last]
+    line = end - start
+    farthest, index = 0, None
+    for point in range(first + 1, last):
+        offset = xy[point] - start
+        length2 = line.dot(line)
+        ratio = 0 if length2 == 0 else min(max(
+            offset.dot(line) / length2, 0), 1)
+        error = offset - ratio * line
+        if error.dot(error) > farthest:
+            farthest, index = error.dot(error), point
+    if index is not None and farthest > tolerance ** 2:
+        keep.append(index)
+        _reference(xy, tolerance, first, index, keep)
+        _reference(xy, tolerance, index, last, keep)
+
+
+def _path(points, seed=1):
+    """Return a random walk path as an array."""
+    return np.array(path_coords(random.Random(seed), points))
+
+
+@pytest.mark.parametrize("tolerance", [0, 5, 30, 200])
+def test_simplify_matches_reference(tolerance):
+    """Test that simplification matches the recursive algorithm."""
+    coords = _path(300)
+    keep = [0, len(coords) - 1]
+    _reference(simplify._project(coords), tolerance, 0, len(coords) - 1,
+               keep)
+    expected = coords[sorted(keep)]
+    np.testing.assert_array_equal(
+        simplify.simplify(coords, tolerance), expected)
+
+
+def test_simplify_small_paths():
+    """Test simplifying straight lines and short paths."""
+    line = np.column_stack((np.linspace(37, 38, 50), np.full(50, -122.0)))
+    np.testing.assert_array_equal(
+        simplify.simplify(line, 1), line[[0, -1]])
+    assert simplify.simplify([], 1).shape == (0, 2)
+    assert simplify.simplify([[1, 2], [3, 4]], 1).shape == (2, 2)
+    # Loops back to the start point
+    loop = [[0, 0], [0, 0.001], [0, 0]]
+    assert len(simplify.simplify(loop, 1)) == 3
+
+
+def test_resample():
+    """Test resampling a path at a fixed distance."""
+    # About 1112 m between points along a meridian
+    line = np.array([[0, 0], [0.01, 0], [0.02, 0]])
+    resampled = simplify.resample(line, 500)
+    np.testing.assert_array_equal(resampled[[0, -1]], line[[0, -1]])
+    steps = np.diff(resampled[:, 0]) * np.radians(1) * \
+        geometry.EARTH_RADIUS_M
+    np.testing.assert_allclose(steps[:-1], 500)
+    assert 0 < steps[-1] <= 500
+    np.testing.assert_array_equal(resampled[:, 1], 0)
+
+    assert len(simplify.resample(line[[0, 0]], 10)) == 1
+    assert len(simplify.resample(line[:1], 10)) == 1
+    with pytest.raises(ValueError):
+        simplify.resample(line, 0)
+
+
+@pytest.mark.parametrize("processes", [None, 2])
+def test_trip_batches(processes):
+    """Test simplifying and resampling the paths of several trips."""
+    paths = [_path(200, seed) for seed in range(5)]
+    trips = [data.Trip(minimal_trip(
+        path=encode_polyline(path))) for path in paths]
+    trips.insert(2, data.Trip(minimal_trip(path=None)))
+
+    simplified = simplify.simplify_trips(trips, 10, processes)
+    resampled = simplify.resample_trips(trips, 50, processes)
+    assert simplified[2] is None
+    assert resampled[2] is None
+    for trip, result in zip(trips, simplified):
+        if trip.path:
+            np.testing.assert_array_equal(
+                result, simplify.simplify(trip.path_coordinates, 10))
+    for trip, result in zip(trips, resampled):
+        if trip.path:
+            np.testing.assert_array_equal(
+                result, simplify.resample(trip.path_coordinates, 50))
+    with pytest.raises(ValueError):
+        simplify.resample_trips(trips, -1)
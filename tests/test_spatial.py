@@ -0,0 +1,134 @@
+"""Tests for automatic spatial indexes."""
+from datetime import datetime, timezone
+
+from aioautomatic import data
+
+import pytest
+from tests.common import minimal_trip
+
+np = pytest.importorskip("numpy")
+from aioautomatic import spatial  # noqa: E402
+
+# About 111 m of latitude
+DELTA = 0.001
+
+
+def _events(*events):
+    """Return vehicle events at (type, lat, lon, created_at)."""
+    return [{
+        "type": event_type,
+        "lat": lat,
+        "lon": lon,
+        "created_at": created_at,
+        "g_force": 0.5,
+    } for event_type, lat, lon, created_at in events]
+
+
+@pytest.fixture
+def index():
+    """Return a spatial index of a few trips."""
+    result = spatial.SpatialIndex()
+    result.add_trips(data.Trip(trip) for trip in [
+        minimal_trip(
+            "T1", (40, -120), (40.1, -120), vehicle_events=_events(
+                ("hard_brake", 40 + DELTA, -120, "2017-01-10T00:00:00Z"),
+                ("speeding", 40.05, -120, "2017-01-10T00:00:00Z")),
+            started_at="2017-01-09T00:00:00Z",
+            ended_at="2017-01-10T01:00:00Z"),
+        minimal_trip(
+            "T2", (41, -120), (40 + 3 * DELTA, -120), vehicle_events=_events(
+                ("hard_brake", 40 - DELTA, -120, "2017-02-10T00:00:00Z"),
+                ("hard_accel", None, None, "2017-02-10T00:00:00Z"))),
+        minimal_trip("T3", (0, 179.9999), (0, -179.9999)),
+    ])
+    return result
+
+
+def test_add_trips(index):
+    """Test indexing trips."""
+    assert len(index) == 9
+    assert index.trip_ids == ["T1", "T2", "T3"]
+
+
+def test_within_radius(index):
+    """Test radius queries."""
+    assert index.within_radius(40, -120, 50) == ["T1"]
+    assert index.within_radius(40, -120, 200) == ["T1", "T2"]
+    assert index.within_radius(40, -120, 400) == ["T1", "T2"]
+    assert index.within_radius(40, -120, 200, "hard_brake") == ["T1", "T2"]
+    assert index.within_radius(40, -120, 200, ["speeding"]) == []
+    assert index.within_radius(40, -120, 200, "unknown") == []
+    assert index.within_radius(
+        40, -120, 400, spatial.TRIP_END) == ["T2"]
+    assert index.within_radius(
+        40, -120, 200, "hard_brake",
+        start=datetime(2017, 2, 1, tzinfo=timezone.utc)) == ["T2"]
+    assert index.within_radius(
+        40, -120, 200, end=datetime(2017, 2, 1)) == ["T1"]
+    # Trip ends on both sides of the antimeridian
+    assert index.within_radius(0, 180, 50) == ["T3"]
+    assert index.within_radius(0, -180, 50) == ["T3"]
+    # Large radius covering every column
+    assert index.within_radius(89, 0, 1e6) == []
+    assert index.within_radius(40, -120, 1e7) == ["T1", "T2", "T3"]
+
+
+def test_within_bbox(index):
+    """Test bounding box queries."""
+    assert index.within_bbox(39.99, -120.01, 40.01, -119.99) == ["T1", "T2"]
+    assert index.within_bbox(40.04, -120.01, 40.06, -119.99) == ["T1"]
+    assert index.within_bbox(39.99, -120.01, 40.01, -119.99,
+                             "hard_brake") == ["T1", "T2"]
+    assert index.within_bbox(39.99, -120.01, 40.01, -119.99,
+                             spatial.TRIP_START) == ["T1"]
+    assert index.within_bbox(39.99, -120.01, 40.01, -119.99,
+                             "speeding") == []
+    assert index.within_bbox(-1, 179, 1, -179) == ["T3"]
+    assert index.within_bbox(-1, -179, 1, 179) == []
+
+
+def test_replace_and_remove_trips(index):
+    """Test updating the index incrementally."""
+    index.add_trip(data.Trip(minimal_trip("T1", (10, 10))))
+    assert len(index) == 7
+    assert index.within_radius(40, -120, 200) == ["T2"]
+    assert index.within_radius(10, 10, 10) == ["T1"]
+    assert index.trip_ids == ["T2", "T3", "T1"]
+
+    index.remove_trip("T2")
+    index.remove_trip("unknown")
+    assert index.within_radius(40, -120, 200) == []
+    assert index.trip_ids == ["T3", "T1"]
+
+
+def test_compact():
+    """Test that the rows of replaced trips are reclaimed."""
+    index = spatial.SpatialIndex()
+    index.add_trip(data.Trip(minimal_trip("T1", (20, 20))))
+    for number in range(1000):
+        index.add_trip(data.Trip(minimal_trip(
+            "T2", (10, 10), (10 + DELTA, 10),
+            started_at="2017-01-01T00:00:00Z")))
+    assert len(index) == 4
+    assert index._size <= 8
+    assert sum(len(rows) for rows in index._cells.values()) == index._size
+    assert index.within_radius(10, 10, 50) == ["T2"]
+    assert index.within_radius(20, 20, 50) == ["T1"]
+    assert index.within_radius(10, 10, 50, types=spatial.TRIP_START,
+                               start=datetime(2017, 1, 1,
+                                              tzinfo=timezone.utc)) == ["T2"]
+    index.remove_trip("T1")
+    assert index.within_radius(20, 20, 50) == []
+    assert index.trip_ids == ["T2"]
+
+
+def test_grow():
+    """Test indexing more events than the initial capacity."""
+    index = spatial.SpatialIndex(cell_size_m=1000)
+    index.add_trips(
+        data.Trip(minimal_trip(
+            "T{}".format(number), (number * DELTA, 0), (0, 0)))
+        for number in range(1500))
+    assert len(index) == 3000
+    assert len(index.within_radius(0, 0, 500)) == 1500
+    assert index.within_radius(1000 * DELTA, 0, 50) == ["T1000"]
@@ -0,0 +1,105 @@
+"""Tests for automatic local storage."""
+from datetime import datetime, timezone
+
+from aioautomatic import data
+from aioautomatic.storage import SQLiteStore
+
+import pytest
+from benchmarks import fixtures
+from tests.common import minimal_trip
+
+
+@pytest.fixture
+def store():
+    """Return an in memory store."""
+    store = SQLiteStore(":memory:")
+    yield store
+    store.close()
+
+
+def test_trips(store):
+    """Test saving and querying trips."""
+    store.upsert_trips([data.Trip(minimal_trip(
+        trip_id, vehicle=vehicle, started_at=started_at, tags=tags))
+        for trip_id, vehicle, started_at, tags in (
+            ("T1", "https://api.automatic.com/vehicle/V1/",
+             "2017-01-01T00:00:00Z", ["business"]),
+            ("T2", "https://api.automatic.com/vehicle/V2/",
+             "2017-01-02T00:00:00Z", ["personal", "commute"]),
+            ("T3", "V1", "2017-01-03T00:00:00Z", None),
+            ("T4", None, None, None))])
+
+    def ids(**kwargs):
+        return [trip.id for trip in store.get_trips(**kwargs)]
+
+    assert ids() == ["T4", "T1", "T2", "T3"]
+    assert ids(vehicle="V1") == ["T1", "T3"]
+    assert ids(vehicle="https://api.automatic.com/vehicle/V2/") == ["T2"]
+    assert ids(started_at__gte=datetime(2017, 1, 2, tzinfo=timezone.utc)) \
+        == ["T2", "T3"]
+    assert ids(started_at__lte=datetime(2017, 1, 2, tzinfo=timezone.utc)) \
+        == ["T1", "T2"]
+    assert ids(tags__in="commute") == ["T2"]
+    assert ids(tags__in="business,commute") == ["T1", "T2"]
+    assert ids(tags__in=["business"], vehicle="V2") == []
+    assert ids(limit=2) == ["T4", "T1"]
+
+    trip = store.get_trip("T2")
+    assert isinstance(trip, data.Trip)
+    assert trip.started_at == datetime(2017, 1, 2, tzinfo=timezone.utc)
+    assert trip.tags == ["personal", "commute"]
+    assert trip.start_location.lat == 1
+    assert store.get_trip("unknown") is None
+
+    # Replacing a trip also replaces its tags
+    store.upsert_trips([data.Trip(minimal_trip(
+        "T2", vehicle="V2", started_at="2017-01-02T00:00:00Z"))])
+    assert ids(tags__in="commute") == []
+    assert store.get_trip("T2").tags == []
+
+
+def test_trip_data_round_trip(store):
+    """Test that saved trips keep all of their data."""
+    trips = [data.Trip(trip) for trip in fixtures.trip_page(20)['results']]
+    store.upsert_trips(trips)
+    for trip in trips:
+        assert store.get_trip(trip.id).data == trip.data
+    eager = SQLiteStore(":memory:", lazy_validation=False)
+    eager.upsert_trips(trips[:1])
+    assert eager.get_trip(trips[0].id).data == trips[0].data
+    eager.close()
+
+
+def test_vehicles_devices_users(store, session):
+    """Test saving and querying vehicles, devices and users."""
+    vehicles = [data.Vehicle(vehicle)
+                for vehicle in fixtures.vehicle_page(5)['results']]
+    store.upsert_vehicles(vehicles)
+    assert store.get_vehicle(vehicles[0].id).data == vehicles[0].data
+    assert sorted(vehicle.id for vehicle in store.get_vehicles()) == \
+        sorted(vehicle.id for vehicle in vehicles)
+    assert store.get_vehicle("unknown") is None
+
+    store.upsert_devices([data.Device({"id": "D1", "version": 5})])
+    assert store.get_device("D1").version == 5
+    assert [device.id for device in store.get_devices()] == ["D1"]
+
+    store.upsert_users([data.User(session, {"url": "mock_url", "id": "U1",
+                                            "email": "mock@example.com"})])
+    user = store.get_user(session, "U1")
+    assert isinstance(user, data.User)
+    assert user.email == "mock@example.com"
+    assert [user.id for user in store.get_users(session)] == ["U1"]
+    assert store.get_user(session, "unknown") is None
+
+
+def test_persistence(tmpdir):
+    """Test reopening a database file."""
+    path = str(tmpdir.join("automatic.db"))
+    store = SQLiteStore(path)
+    store.upsert_trips([data.Trip(minimal_trip(
+        "T1", vehicle="V1", started_at="2017-01-01T00:00:00Z"))])
+    store.close()
+    store = SQLiteStore(path)
+    assert store.get_trip("T1").vehicle == "V1"
+    store.close()
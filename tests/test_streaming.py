@@ -0,0 +1,107 @@
+"""Tests for automatic list response streaming."""
+import json
+
+from aioautomatic.streaming import ListStreamParser
+
+import pytest
+
+PAGE = {
+    "_metadata": {
+        "count": 3,
+        "next": "https://api.automatic.com/trip/?page=2",
+        "previous": None,
+        },
+    "results": [
+        {"id": "T1", "tags": ["a", "b"], "path": "ab\\\"c{[}]"},
+        {"id": "T2", "name": "été \"quoted\"", "nested": {"x": []}},
+        {"id": "T3", "value": 1.5},
+    ],
+}
+
+
+def _parse(body, chunk_size):
+    """Feed a body to a parser in chunks and return the parsed results."""
+    parser = ListStreamParser(json.loads)
+    items = []
+    for start in range(0, len(body), chunk_size):
+        items.extend(parser.feed(body[start:start + chunk_size]))
+    return items, parser.close()
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64, 100000])
+def test_parse_chunked(chunk_size):
+    """Test that results are parsed whatever the chunk boundaries."""
+    body = json.dumps(PAGE, ensure_ascii=False, indent=2).encode('utf-8')
+    items, values = _parse(body, chunk_size)
+    assert items == PAGE["results"]
+    assert values == {"_metadata": PAGE["_metadata"]}
+
+
+def test_parse_yields_completed_items():
+    """Test that each item is returned as soon as it is complete."""
+    parser = ListStreamParser(json.loads)
+    assert parser.feed(b'{"results": [{"id": "T1"}, {"id"') == [{"id": "T1"}]
+    assert parser.feed(b': "T2"}') == [{"id": "T2"}]
+    assert parser.feed(b'], "_metadata": {"next": null}}') == []
+    assert parser.close() == {"_metadata": {"next": None}}
+    assert parser.has_results
+
+
+def test_parse_buffers_only_pending_item():
+    """Test that completed items are dropped from the buffer."""
+    parser = ListStreamParser(json.loads)
+    parser.feed(b'{"results": [')
+    for _ in range(100):
+        parser.feed(b'{"id": "' + b'x' * 1000 + b'"},')
+    assert len(parser._buffer) < 1000
+
+
+def test_parse_scalars():
+    """Test parsing results and values that are not objects."""
+    body = b'{"count": 2, "results": [1, "two", null], "name": "x"}'
+    items, values = _parse(body, 3)
+    assert items == [1, "two", None]
+    assert values == {"count": 2, "name": "x"}
+
+
+@pytest.mark.parametrize("body", [
+    b'{"results": null}',
+    b'{"results": {"id": "T1"}}',
+    b'{"_metadata": {"results": []}}',
+])
+def test_parse_without_results(body):
+    """Test that results which are not a top level array are not seen."""
+    parser = ListStreamParser(json.loads)
+    assert parser.feed(body) == []
+    parser.close()
+    assert not parser.has_results
+
+
+def test_parse_not_an_object():
+    """Test that a list response must be a json object."""
+    parser = ListStreamParser(json.loads)
+    with pytest.raises(ValueError):
+        parser.feed(b'[{"id": "T1"}]')
+
+
+def test_parse_incomplete():
+    """Test that a truncated body is an error."""
+    parser = ListStreamParser(json.loads)
+    parser.feed(b'{"results": [{"id": "T1"}')
+    with pytest.raises(ValueError):
+        parser.close()
+
+
+def test_parse_invalid_item():
+    """Test that an invalid item raises ValueError."""
+    parser = ListStreamParser(json.loads)
+    with pytest.raises(ValueError):
+        parser.feed(b'{"results": [{"id": T1}]}')
+
+
+def test_parse_trailing_data():
+    """Test that data after the document is an error."""
+    parser = ListStreamParser(json.loads)
+    parser.feed(b'{"results": []}\n')
+    with pytest.raises(ValueError):
+        parser.feed(b'{}')
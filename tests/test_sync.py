@@ -0,0 +1,186 @@
+"""Tests for automatic trip synchronization."""
+from datetime import datetime, timedelta, timezone
+import json
+import os
+
+from aioautomatic import exceptions
+from aioautomatic import sync
+from aioautomatic.data import Trip
+
+import pytest
+from tests.common import AsyncMock, minimal_trip
+
+
+def _serve(session, trips):
+    """Answer trip list requests with a single page of trips."""
+    def side_effect(method, url, **kwargs):
+        resp = AsyncMock()
+        resp.status = 200
+        resp.json.return_value = {
+            "_metadata": {"count": len(trips), "next": None,
+                          "previous": None},
+            "results": trips,
+        }
+        return resp
+    session._client_session.request.reset_mock()
+    session._client_session.request.side_effect = side_effect
+
+
+def _urls(session):
+    """Return the requested urls."""
+    return [call[1][1] for call in session._client_session.request.mock_calls
+            if call[0] == ""]
+
+
+@pytest.fixture(params=["file", "sqlite"])
+def store(request, tmpdir):
+    """Return a checkpoint store of each kind."""
+    if request.param == "file":
+        yield sync.FileCheckpointStore(str(tmpdir.join("checkpoints.json")))
+    else:
+        store = sync.SQLiteCheckpointStore(str(tmpdir.join("sync.db")))
+        yield store
+        store.close()
+
+
+def test_checkpoint():
+    """Test recording trips in a checkpoint."""
+    checkpoint = sync.Checkpoint()
+    trips = [Trip(minimal_trip(trip_id, started_at=started_at,
+                               ended_at=ended_at))
+             for trip_id, started_at, ended_at in (
+                 ("T1", "2017-01-01T00:00:00Z", "2017-01-01T02:00:00Z"),
+                 ("T2", "2017-01-01T01:00:00Z", "2017-01-01T01:30:00Z"),
+                 ("T3", None, None))]
+    for trip in trips:
+        checkpoint.add(trip)
+    assert checkpoint.started_at == datetime(2017, 1, 1, 1,
+                                             tzinfo=timezone.utc)
+    assert checkpoint.ended_at == datetime(2017, 1, 1, 2,
+                                           tzinfo=timezone.utc)
+    assert all(trip.id in checkpoint for trip in trips)
+
+    restored = sync.Checkpoint.from_dict(
+        json.loads(json.dumps(checkpoint.to_dict())))
+    assert restored.started_at == checkpoint.started_at
+    assert restored.ended_at == checkpoint.ended_at
+    assert restored.trip_ids == checkpoint.trip_ids
+
+    checkpoint.prune(timedelta(minutes=30))
+    assert list(checkpoint.trip_ids) == ["T2"]
+
+    empty = sync.Checkpoint()
+    empty.prune(timedelta(0))
+    assert sync.Checkpoint.from_dict(empty.to_dict()).started_at is None
+
+
+def test_stores(store):
+    """Test saving and loading checkpoints."""
+    assert store.load("U1") is None
+    checkpoint = sync.Checkpoint(
+        datetime(2017, 1, 1, tzinfo=timezone.utc), None,
+        {"T1": datetime(2017, 1, 1, tzinfo=timezone.utc)})
+    store.save("U1", None, checkpoint)
+    store.save("U1", "V1", sync.Checkpoint())
+    store.save("U2", None, sync.Checkpoint())
+    loaded = store.load("U1")
+    assert loaded.started_at == checkpoint.started_at
+    assert loaded.trip_ids == checkpoint.trip_ids
+    assert store.load("U1", "V1").started_at is None
+    assert store.load("U2", "V1") is None
+
+
+def test_file_store_atomic(tmpdir, monkeypatch):
+    """Test that a failed save keeps the previous checkpoints."""
+    path = str(tmpdir.join("checkpoints.json"))
+    store = sync.FileCheckpointStore(path)
+    store.save("U1", None, sync.Checkpoint())
+
+    def fail(*args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(sync.os, "replace", fail)
+    with pytest.raises(OSError):
+        store.save("U2", None, sync.Checkpoint())
+    assert store.load("U1") is not None
+    assert store.load("U2") is None
+    assert os.listdir(str(tmpdir)) == ["checkpoints.json"]
+
+
+def test_sync_trips(session, store):
+    """Test fetching only the trips since the last synchronization."""
+    first = [minimal_trip("T1", started_at="2017-01-01T00:00:00Z"),
+             minimal_trip("T2", started_at="2017-01-01T10:00:00Z")]
+    _serve(session, first)
+    trips = session.loop.run_until_complete(
+        session.sync_trips(store, user="U1"))
+    assert [trip.id for trip in trips] == ["T1", "T2"]
+    assert "started_at__gte" not in _urls(session)[0]
+
+    # Trips of the overlap window are fetched again but not returned
+    _serve(session, first[1:] + [
+        minimal_trip("T3", started_at="2017-01-01T12:00:00Z")])
+    trips = session.loop.run_until_complete(
+        session.sync_trips(store, user="U1"))
+    assert [trip.id for trip in trips] == ["T3"]
+    since = datetime(2017, 1, 1, 4, tzinfo=timezone.utc).timestamp()
+    assert "started_at__gte={}".format(since) in _urls(session)[0]
+    assert store.load("U1").started_at == datetime(
+        2017, 1, 1, 12, tzinfo=timezone.utc)
+    assert sorted(store.load("U1").trip_ids) == ["T2", "T3"]
+
+    # Vehicles have their own checkpoint
+    _serve(session, first)
+    trip_sync = sync.TripSync(session, store, "U1", timedelta(0))
+    trips = session.loop.run_until_complete(trip_sync.run("V1"))
+    assert len(trips) == 2
+    assert "vehicle=V1" in _urls(session)[0]
+    assert "started_at__gte" not in _urls(session)[0]
+
+
+def test_sync_trips_user(session, store):
+    """Test synchronizing the trips of the session user."""
+    def side_effect(method, url, **kwargs):
+        resp = AsyncMock()
+        resp.status = 200
+        if url.endswith("/user/me"):
+            resp.json.return_value = {"url": "mock_url", "id": "U1"}
+        else:
+            resp.json.return_value = {
+                "_metadata": {"count": 0, "next": None, "previous": None},
+                "results": [minimal_trip(
+                    "T1", started_at="2017-01-01T00:00:00Z")],
+            }
+        return resp
+    session._client_session.request.side_effect = side_effect
+
+    trips = session.loop.run_until_complete(session.sync_trips(store))
+    assert len(trips) == 1
+    assert store.load("U1").started_at is not None
+
+
+def test_sync_trips_error(session, store):
+    """Test that the checkpoint is not saved when a request fails."""
+    resp = AsyncMock()
+    resp.status = 500
+    resp.json.return_value = {"error": "err", "detail": "detail"}
+    session._client_session.request.return_value = resp
+    with pytest.raises(exceptions.AutomaticError):
+        session.loop.run_until_complete(
+            session.sync_trips(store, user="U1"))
+    assert store.load("U1") is None
+
+
+def test_sync_trips_filters(session, store):
+    """Test that filters other than the vehicle are rejected."""
+    with pytest.raises(ValueError) as excinfo:
+        session.loop.run_until_complete(session.sync_trips(
+            store, user="U1", tags__in="work", started_at__gte=0))
+    assert "started_at__gte, tags__in" in str(excinfo.value)
+    assert not session._client_session.request.called
+
+    _serve(session, [minimal_trip("T1")])
+    trips = session.loop.run_until_complete(
+        session.sync_trips(store, user="U1", limit=10, stream=False))
+    assert len(trips) == 1
+    assert "limit=10" in _urls(session)[0]
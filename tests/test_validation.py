@@ -1,5 +1,7 @@
 """Tests for automatic validation."""
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+import json
+
 from aioautomatic import validation
 from aioautomatic import exceptions
 
@@ -49,10 +51,59 @@ def test_parse_datetime_no_ms():
     assert validation.coerce_datetime("2014-03-20T01:43:36Z") == dt
 
 
+def test_parse_datetime_fraction():
+    """Test that fractions shorter than microseconds are padded."""
+    dt = datetime(2014, 3, 20, 1, 43, 36, 500000, tzinfo=timezone.utc)
+    assert validation.coerce_datetime("2014-03-20T01:43:36.5Z") == dt
+    assert validation.coerce_datetime("2014-03-20T01:43:36.5Z") is \
+        validation.coerce_datetime("2014-03-20T01:43:36.5Z")
+
+
+def test_parse_datetime_unpadded():
+    """Test that other shapes accepted by strptime are still parsed."""
+    dt = datetime(2014, 3, 2, 1, 4, 6, tzinfo=timezone.utc)
+    assert validation.coerce_datetime("2014-3-2T1:4:6Z") == dt
+
+
+def test_parse_datetime_matches_strptime():
+    """Test that the fast parser agrees with strptime."""
+    for value in ("2017-01-01T00:00:00Z", "2017-12-31T23:59:59.999999Z",
+                  "2016-02-29T12:30:00.120Z", "2017-02-29T12:30:00Z",
+                  "2017-01-01T24:00:00Z", "2017-01-01T00:00:00.1234567Z",
+                  "2017-01-01T00:00:00", "2017-01-01 00:00:00Z"):
+        try:
+            expected = validation._strptime_datetime(value)
+        except validation.vol.DatetimeInvalid:
+            with pytest.raises(validation.vol.DatetimeInvalid):
+                validation.coerce_datetime(value)
+        else:
+            assert validation.coerce_datetime(value) == expected
+
+
 def test_invalid_datetime():
     """Test that an invalid string is not parsed."""
     with pytest.raises(validation.vol.DatetimeInvalid):
         validation.coerce_datetime("test")
+    with pytest.raises(validation.vol.DatetimeInvalid):
+        validation.coerce_datetime(1487651721)
+
+
+def test_format_datetime():
+    """Test formatting a datetime as an API timestamp."""
+    dt = datetime(2014, 3, 20, 1, 43, 36, 738000, tzinfo=timezone.utc)
+    assert validation.format_datetime(dt) == "2014-03-20T01:43:36.738000Z"
+    assert validation.coerce_datetime(validation.format_datetime(dt)) == dt
+    assert validation.format_datetime(dt.astimezone(
+        timezone(timedelta(hours=-7)))) == "2014-03-20T01:43:36.738000Z"
+
+
+def test_json_default():
+    """Test serializing datetimes as API timestamps in json."""
+    dt = datetime(2014, 3, 20, 1, 43, 36, 738000, tzinfo=timezone.utc)
+    assert json.dumps({"at": dt}, default=validation.json_default) == \
+        '{"at": "2014-03-20T01:43:36.738000Z"}'
+    with pytest.raises(TypeError):
+        json.dumps({"at": object()}, default=validation.json_default)
 
 
 def test_validate_schema():